@@ -0,0 +1,147 @@
+"""Inventory aggregates kept in summary tables.
+
+Each Summary keeps one row per group of a source table: product category or
+icecream size. The row holds the item count, total units in stock and total
+stock value (price * units). Write handlers call ``apply`` inside their own
+transaction with the rows they removed and added, so a summary commits or
+rolls back together with the change it describes. Dashboards then read
+O(groups) rows instead of scanning the source table.
+
+``reconcile`` rebuilds a summary from a GROUP BY over the source, as a
+backstop for anything written outside the API. It reads the source with a
+share lock before touching the summary, the same order the write handlers
+lock in, so the two cannot deadlock. The scan is never run on a read: run
+this module from cron, or POST /api/analytics/reconcile as an admin.
+
+Usage:
+    python analytics.py
+"""
+import argparse
+import sys
+from decimal import Decimal
+
+CENT = Decimal('0.01')
+
+
+def money(value):
+    if value is None:
+        return Decimal(0)
+    if isinstance(value, Decimal):
+        return value
+    return Decimal(str(value))
+
+
+class Summary:
+    """Per-group count, units and stock value of one source table."""
+
+    def __init__(self, table, source, pk, group, count_column, quantity, price, name):
+        self.table = table
+        self.source = source
+        self.pk = pk
+        self.group = group
+        self.count_column = count_column
+        self.quantity = quantity
+        self.price = price
+        self.name = name
+        self.totals = (count_column, 'units', 'stock_value')
+        self.read_sql = (f"SELECT {group}, {count_column}, units, stock_value FROM {table} "
+                         f"WHERE {count_column} > 0 ORDER BY {group}")
+        self.aggregate_sql = (f"SELECT {group}, COUNT(*) AS {count_column}, "
+                              f"COALESCE(SUM({quantity}), 0) AS units, "
+                              f"COALESCE(SUM({quantity} * {price}), 0) AS stock_value "
+                              f"FROM {source} GROUP BY {group}")
+        self.insert_sql = (f"INSERT INTO {table} ({group}, {', '.join(self.totals)}) "
+                           f"VALUES (%s, %s, %s, %s)")
+        self.clear_sql = f"DELETE FROM {table}"
+        # Served from the index on the quantity column, not a table scan.
+        self.low_stock_sql = (f"SELECT {pk}, {name}, {group}, {quantity}, {price} FROM {source} "
+                              f"WHERE {quantity} <= %s ORDER BY {quantity}, {pk} LIMIT %s")
+        self._upsert_sql = {}
+
+    def deltas(self, removed, added):
+        """Per-group (count, units, value) changes for rows leaving and entering the table."""
+        changes = {}
+        for sign, rows in ((-1, removed), (1, added)):
+            for row in rows:
+                units = row.get(self.quantity) or 0
+                change = changes.setdefault(row[self.group], [0, 0, Decimal(0)])
+                change[0] += sign
+                change[1] += sign * units
+                change[2] += sign * units * money(row.get(self.price))
+        # Sorted, so concurrent writers lock summary rows in the same order.
+        return [(group, count, units, value) for group, (count, units, value) in sorted(changes.items())
+                if count or units or value]
+
+    def statement(self, backend, removed=(), added=()):
+        """The (sql, rows) upsert folding removed and added rows in, or None if nothing changes.
+
+        backend is a storage backend or an async database; both carry name
+        and upsert_add_sql.
+        """
+        changes = self.deltas(removed, added)
+        if not changes:
+            return None
+        sql = self._upsert_sql.get(backend.name)
+        if sql is None:
+            sql = self._upsert_sql[backend.name] = backend.upsert_add_sql(self.table, self.group, self.totals)
+        return sql, changes
+
+    def apply(self, backend, cur, removed=(), added=()):
+        """Fold removed and added source rows into the summary, in cur's transaction."""
+        statement = self.statement(backend, removed, added)
+        if statement is not None:
+            cur.executemany(*statement)
+
+    def read(self, cur):
+        cur.execute(self.read_sql)
+        return [{self.group: row[self.group],
+                 self.count_column: int(row[self.count_column]),
+                 'units': int(row['units']),
+                 'stock_value': money(row['stock_value']).quantize(CENT)}
+                for row in cur.fetchall()]
+
+    def reconcile(self, backend, conn):
+        """Rebuild the summary from the source table and commit."""
+        cur = conn.cursor()
+        try:
+            backend.begin_write(conn)
+            cur.execute(self.aggregate_sql + backend.share_lock)
+            rows = [(row[self.group], row[self.count_column], row['units'], money(row['stock_value']))
+                    for row in cur.fetchall()]
+            cur.execute(self.clear_sql)
+            if rows:
+                cur.executemany(self.insert_sql, rows)
+            conn.commit()
+        except backend.Error:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+
+
+PRODUCT_CATEGORIES = Summary('product_category_summary', 'product', 'id', 'category', 'products',
+                             'quantity', 'price', 'product_name')
+ICECREAM_SIZES = Summary('icecream_size_summary', 'icecream', 'id', 'size', 'flavors',
+                         'stock', 'price', 'flavor')
+
+SUMMARIES = {summary.source: summary for summary in (PRODUCT_CATEGORIES, ICECREAM_SIZES)}
+
+
+def main(argv=None):
+    argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter).parse_args(argv)
+    import storage
+    from config import Config
+
+    backend = storage.create_backend(Config)
+    conn = backend.connect()
+    try:
+        for summary in SUMMARIES.values():
+            summary.reconcile(backend, conn)
+            print(f'reconciled {summary.table}', file=sys.stderr)
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,342 @@
+"""Asyncio serving path for the CRUD API.
+
+Exposes the single-row CRUD routes, validation, JWT handling and JSON/XML
+output of main.py on Quart, backed by an async MySQL pool (aiomysql) so one
+process can keep many slow queries in flight. Set DB_BACKEND=sqlite to run it
+against a local SQLite file instead. Serve with: hypercorn async_app:app
+
+Batch writes and streamed lists (?stream=1, ?format=ndjson) are not served
+here; they answer 400 instead of silently falling back to something else.
+"""
+import datetime
+import time
+import uuid
+from functools import wraps
+
+import jwt as pyjwt
+from quart import Quart, Response, g, jsonify, request
+
+from analytics import SUMMARIES
+from async_db import AsyncMySQLDatabase, AsyncSQLiteDatabase
+from changes import TOMBSTONES
+from config import Config
+import events
+from jwt_cache import PURGE_REVOKED_SQL, REVOKE_SQL, REVOKED_SQL, RevocationCache
+from paging import parse_page_args
+from resources import RESOURCES, RESOURCES_BY_NAME
+from validators import IdConverter
+import xml_encoder
+
+app = Quart(__name__)
+app.config.from_object(Config)
+app.url_map.converters['int'] = IdConverter
+
+DEMO_USER = {"username": "admin", "password": "admin"}
+
+fulltext_missing = set()
+revocations = RevocationCache(Config.JWT_CACHE_SIZE, Config.JWT_REVOCATION_CACHE_TTL)
+
+event_bus = events.EventBus(Config.EVENTS_HISTORY, Config.EVENTS_BUFFER, Config.EVENTS_MAX_SUBSCRIBERS)
+
+if Config.DB_BACKEND == 'sqlite':
+    db = AsyncSQLiteDatabase(Config.SQLITE_PATH)
+else:
+    db = AsyncMySQLDatabase(
+        minsize=Config.MYSQL_POOL_MIN,
+        maxsize=Config.MYSQL_POOL_MAX,
+        pool_recycle=int(Config.MYSQL_POOL_MAX_LIFETIME),
+        host=Config.MYSQL_HOST,
+        port=Config.MYSQL_PORT,
+        user=Config.MYSQL_USER,
+        password=Config.MYSQL_PASSWORD,
+        db=Config.MYSQL_DB,
+    )
+
+
+@app.errorhandler(db.IntegrityError)
+async def integrity_error(err):
+    """Report constraint violations (e.g. a duplicate student email) as 409, like main.py."""
+    return jsonify({"msg": err.args[1] if len(err.args) > 1 else str(err)}), 409
+
+
+@app.before_serving
+async def open_db():
+    await db.open()
+
+
+@app.after_serving
+async def close_db():
+    await db.close()
+
+
+def create_access_token(identity):
+    """Issue an access token with the claims flask_jwt_extended produces."""
+    now = datetime.datetime.now(datetime.timezone.utc)
+    claims = {
+        "fresh": False,
+        "iat": now,
+        "jti": str(uuid.uuid4()),
+        "type": "access",
+        "sub": identity,
+        "nbf": now,
+    }
+    expires = app.config['JWT_ACCESS_TOKEN_EXPIRES']
+    if expires is not False:
+        claims["exp"] = now + expires
+    return pyjwt.encode(claims, Config.JWT_SECRET_KEY, algorithm="HS256")
+
+
+async def is_revoked(claims):
+    """Whether the token was revoked through /logout of either app (revoked_tokens)."""
+    jti = claims.get("jti")
+    revoked = revocations.get(jti)
+    if revoked is None:
+        revoked = await db.fetchone(REVOKED_SQL, (jti,)) is not None
+        revocations.put(jti, revoked, claims.get("exp"))
+    return revoked
+
+
+def jwt_required(optional=False):
+    """Verify the bearer token like flask_jwt_extended's decorator of the same name."""
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(*args, **kwargs):
+            g.jwt_identity = None
+            g.jwt_claims = None
+            header = request.headers.get("Authorization")
+            if not header:
+                if optional:
+                    return await view(*args, **kwargs)
+                return jsonify({"msg": "Missing Authorization Header"}), 401
+            parts = header.split()
+            if len(parts) != 2 or parts[0] != "Bearer":
+                return jsonify({"msg": "Bad Authorization header. Expected 'Authorization: Bearer <JWT>'"}), 422
+            try:
+                claims = pyjwt.decode(parts[1], Config.JWT_SECRET_KEY, algorithms=["HS256"])
+            except pyjwt.ExpiredSignatureError:
+                return jsonify({"msg": "Token has expired"}), 401
+            except pyjwt.InvalidTokenError as err:
+                return jsonify({"msg": str(err)}), 422
+            if claims.get("type") != "access":
+                return jsonify({"msg": "Only non-refresh tokens are allowed"}), 422
+            if await is_revoked(claims):
+                return jsonify({"msg": "Token has been revoked"}), 401
+            g.jwt_identity = claims.get("sub")
+            g.jwt_claims = claims
+            return await view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def unsupported(feature):
+    """400 for a main.py feature async_app does not serve."""
+    return jsonify({"msg": f"{feature} are not supported by async_app; use main.py"}), 400
+
+
+def wants_stream(fmt):
+    """Whether the client asked for a streamed list, as main.wants_stream."""
+    if fmt and fmt.lower() == 'ndjson':
+        return True
+    return request.args.get('stream', '').lower() in ('1', 'true', 'yes')
+
+
+async def search_rows(res, q, limit, fields=None):
+    """Return up to limit rows matching q, most relevant first; see main.search_rows."""
+    term = q.strip()
+    if len(term) >= db.search_min_length and res.table not in fulltext_missing:
+        query, args = db.search_query(res, term, limit)
+        try:
+            return list(await db.fetchall(res.project(query, res.all_fields if fields is None else fields), args))
+        except db.Error as err:
+            if not db.missing_fulltext(err):
+                raise
+            fulltext_missing.add(res.table)
+    return list(await db.fetchall(res.project(res.like_search_sql, fields), (f'%{q}%',) * len(res.search) + (limit,)))
+
+
+def to_format(data, fmt):
+    """Convert response to specified format (JSON or XML)."""
+    if fmt and fmt.lower() == 'xml':
+        return Response(xml_encoder.dumps(data), content_type='application/xml')
+    return jsonify(data)
+
+
+@app.route("/login", methods=["POST"])
+async def login():
+    data = await request.get_json() or {}
+    username = data.get("username")
+    password = data.get("password")
+    if username == DEMO_USER["username"] and password == DEMO_USER["password"]:
+        return jsonify(access_token=create_access_token(username)), 200
+    return jsonify({"msg": "wrong credentials"}), 401
+
+
+@app.route("/logout", methods=["POST"])
+@jwt_required()
+async def logout():
+    """Revoke the bearer token for both apps, as main.py's /logout does."""
+    jti, exp = g.jwt_claims["jti"], g.jwt_claims.get("exp")
+    async with db.transaction() as tx:
+        await tx.execute(PURGE_REVOKED_SQL, (int(time.time()),))
+        await tx.execute(REVOKE_SQL, (jti, exp))
+    revocations.put(jti, True, exp)
+    return jsonify({"msg": "logged out"}), 200
+
+
+@app.route('/')
+async def home():
+    """Home route — return JSON overview."""
+    return jsonify({
+        "service": "sari-sari_store",
+        "status": "ok",
+        "endpoints": {
+            "products": "/api/products",
+            "suppliers": "/api/suppliers",
+            "icecream": "/api/icecream",
+            "students": "/api/students",
+            "login": "/login"
+        }
+    })
+
+
+@app.route('/api/events')
+@jwt_required(optional=True)
+async def event_stream():
+    """Server-sent events for writes committed by this process; see main.py.
+
+    Only single-row creates, updates and deletes are served here, so there
+    are never batch or ``stock`` events, and writes made through main.py or
+    another process do not appear.
+    """
+    names, error = events.parse_resources(request.args.get('resources'), RESOURCES_BY_NAME)
+    if error:
+        return jsonify({"msg": error}), 400
+    try:
+        body = events.AsyncStream(event_bus, names, request.headers.get('Last-Event-ID'),
+                                  Config.EVENTS_HEARTBEAT_SECONDS)
+    except events.Full:
+        return jsonify({"msg": "too many event subscribers"}), 503
+    response = Response(body, mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    # The stream is open-ended; don't let RESPONSE_TIMEOUT cut it off.
+    response.timeout = None
+    return response
+
+
+async def lock_rows(tx, res, ids):
+    """Lock the rows among ids that exist and return them keyed by primary key."""
+    rows = await tx.fetchall(db.lock_rows_sql(res, len(ids)), tuple(ids))
+    return {row[res.pk]: row for row in rows}
+
+
+async def apply_summary(tx, summary, removed=(), added=()):
+    """Fold a write into its summary table inside tx, like Summary.apply in main.py."""
+    statement = summary.statement(db, removed, added)
+    if statement is not None:
+        await tx.executemany(*statement)
+
+
+def register(res):
+    """Add the list/get/create/update/delete routes for one resource."""
+    summary = SUMMARIES.get(res.table)
+
+    @jwt_required(optional=True)
+    async def list_items():
+        fmt = request.args.get('format')
+        limit, after, error = parse_page_args(request.args)
+        if not error:
+            fields, filters, sort, after, error = res.parse_list_args(request.args, after)
+        if error:
+            return jsonify({"msg": error}), 400
+        if wants_stream(fmt):
+            return unsupported("streamed lists (?stream=1, ?format=ndjson)")
+        q = request.args.get('q')
+        if q and not filters and sort is None:
+            rows = await search_rows(res, q, limit, fields)
+            return to_format({res.collection: rows, 'next_cursor': None}, fmt)
+        query, args = res.list_query(q, after, limit + 1, filters, sort)
+        rows = list(await db.fetchall(res.project(query, fields), args))
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = res.next_cursor(rows[-1], sort)
+        return to_format({res.collection: rows, 'next_cursor': next_cursor}, fmt)
+
+    @jwt_required(optional=True)
+    async def get_item(item_id):
+        fmt = request.args.get('format')
+        fields, error = res.parse_fields(request.args.get('fields'))
+        if error:
+            return jsonify({"msg": error}), 400
+        row = await db.fetchone(res.project(res.select_sql, fields), (item_id,))
+        if not row:
+            return jsonify({"msg": "Not Found"}), 404
+        return to_format({res.item: row}, fmt)
+
+    @jwt_required()
+    async def create_item():
+        payload = await request.get_json() or {}
+        if not isinstance(payload, dict):
+            return jsonify({"msg": "Expected a JSON object"}), 400
+        data, errors = res.clean(payload, partial=False)
+        if errors:
+            return jsonify({"errors": errors}), 400
+        async with db.transaction() as tx:
+            _, new_id = await tx.execute(res.insert_sql, res.row(data))
+            if summary is not None:
+                await apply_summary(tx, summary, added=[data])
+        event_bus.publish(res.name, 'created', {'ids': [new_id]})
+        return jsonify({"msg": "created", "id": new_id}), 201
+
+    @jwt_required()
+    async def update_item(item_id):
+        payload = await request.get_json() or {}
+        if not payload:
+            return jsonify({"msg": "No payload"}), 400
+        if not isinstance(payload, dict):
+            return jsonify({"msg": "Expected a JSON object"}), 400
+        data, errors = res.clean(payload, partial=True)
+        if errors:
+            return jsonify({"errors": errors}), 400
+        query, args = res.update_query(data, item_id)
+        if query is None:
+            return jsonify({"msg": "Nothing to update"}), 400
+        async with db.transaction() as tx:
+            old = (await lock_rows(tx, res, [item_id])).get(item_id) if summary else None
+            changed, _ = await tx.execute(query, args)
+            if old is not None:
+                await apply_summary(tx, summary, [old], [{**old, **data}])
+        if changed == 0:
+            return jsonify({"msg": "Not found"}), 404
+        event_bus.publish(res.name, 'updated', {'ids': [item_id]})
+        return jsonify({"msg": "updated"}), 200
+
+    @jwt_required()
+    async def delete_item(item_id):
+        async with db.transaction() as tx:
+            old = (await lock_rows(tx, res, [item_id])).get(item_id) if summary else None
+            rc, _ = await tx.execute(res.delete_sql, (item_id,))
+            if rc:
+                await tx.executemany(*TOMBSTONES.statement(res.table, [item_id]))
+            if old is not None:
+                await apply_summary(tx, summary, removed=[old])
+        if rc == 0:
+            return jsonify({"msg": "Not found"}), 404
+        event_bus.publish(res.name, 'deleted', {'ids': [item_id]})
+        return jsonify({"msg": "deleted"}), 200
+
+    @jwt_required()
+    async def batch():
+        return unsupported("batch writes")
+
+    base = f"/api/{res.name}"
+    app.add_url_rule(base, f"list_{res.name}", list_items, methods=["GET"])
+    app.add_url_rule(f"{base}/<int:item_id>", f"get_{res.name}", get_item, methods=["GET"])
+    app.add_url_rule(base, f"create_{res.name}", create_item, methods=["POST"])
+    app.add_url_rule(f"{base}/<int:item_id>", f"update_{res.name}", update_item, methods=["PUT"])
+    app.add_url_rule(f"{base}/<int:item_id>", f"delete_{res.name}", delete_item, methods=["DELETE"])
+    app.add_url_rule(f"{base}/batch", f"batch_{res.name}", batch, methods=["POST", "PATCH", "DELETE"])
+
+
+for _res in RESOURCES:
+    register(_res)
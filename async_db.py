@@ -0,0 +1,212 @@
+"""Async database access for async_app.
+
+AsyncMySQLDatabase wraps an aiomysql pool; AsyncSQLiteDatabase is a stand-in
+for tests and local runs that pushes sqlite3 calls onto a worker thread. Both
+take the same ``%s`` paramstyle queries main.py uses and return dict rows.
+
+Single statements autocommit. Writes that must land together (a row, its
+summary deltas, its tombstone) run in ``async with db.transaction() as tx``,
+which commits on exit and rolls back if the block raises. Each database also
+carries the ``name``, ``upsert_add_sql`` and search statements of its storage
+backend, so analytics, changes and ?q= build the same statements for both
+apps.
+"""
+import asyncio
+import contextlib
+
+from storage import MySQLBackend, SQLiteBackend, ensure_schema, qmark, sqlite_connect
+
+
+class AsyncMySQLTransaction:
+    """Statements on one pooled connection inside BEGIN ... COMMIT."""
+
+    def __init__(self, cur):
+        self._cur = cur
+
+    async def fetchall(self, query, args=()):
+        await self._cur.execute(query, args)
+        return await self._cur.fetchall()
+
+    async def execute(self, query, args=()):
+        """Run a write and return (rowcount, lastrowid)."""
+        await self._cur.execute(query, args)
+        return self._cur.rowcount, self._cur.lastrowid
+
+    async def executemany(self, query, rows):
+        await self._cur.executemany(query, rows)
+
+
+class AsyncMySQLDatabase:
+    """aiomysql connection pool with autocommit, one statement per call."""
+
+    name = MySQLBackend.name
+    upsert_add_sql = MySQLBackend.upsert_add_sql
+    search_min_length = MySQLBackend.search_min_length
+    search_query = MySQLBackend.search_query
+    missing_fulltext = MySQLBackend.missing_fulltext
+
+    def __init__(self, minsize, maxsize, pool_recycle, **connect_kwargs):
+        import aiomysql
+        self.Error = aiomysql.Error
+        self.IntegrityError = aiomysql.IntegrityError
+        self.minsize = minsize
+        self.maxsize = maxsize
+        self.pool_recycle = pool_recycle
+        self.connect_kwargs = connect_kwargs
+        self.pool = None
+
+    async def open(self):
+        import aiomysql
+        self._cursorclass = aiomysql.DictCursor
+        self.pool = await aiomysql.create_pool(
+            minsize=self.minsize,
+            maxsize=self.maxsize,
+            pool_recycle=self.pool_recycle,
+            autocommit=True,
+            charset='utf8mb4',
+            **self.connect_kwargs,
+        )
+
+    async def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            await self.pool.wait_closed()
+            self.pool = None
+
+    async def fetchone(self, query, args=()):
+        async with self.pool.acquire() as conn:
+            async with conn.cursor(self._cursorclass) as cur:
+                await cur.execute(query, args)
+                return await cur.fetchone()
+
+    async def fetchall(self, query, args=()):
+        async with self.pool.acquire() as conn:
+            async with conn.cursor(self._cursorclass) as cur:
+                await cur.execute(query, args)
+                return await cur.fetchall()
+
+    async def execute(self, query, args=()):
+        """Run a write and return (rowcount, lastrowid)."""
+        async with self.pool.acquire() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(query, args)
+                return cur.rowcount, cur.lastrowid
+
+    def lock_rows_sql(self, res, count):
+        """SELECT rows by primary key, locking them for the rest of the transaction."""
+        return res.lock_rows_sql(count)
+
+    @contextlib.asynccontextmanager
+    async def transaction(self):
+        async with self.pool.acquire() as conn:
+            await conn.begin()
+            try:
+                async with conn.cursor(self._cursorclass) as cur:
+                    yield AsyncMySQLTransaction(cur)
+            except BaseException:
+                await conn.rollback()
+                raise
+            await conn.commit()
+
+
+class AsyncSQLiteTransaction:
+    """Statements on the shared connection inside BEGIN IMMEDIATE ... COMMIT.
+
+    The database's lock is held for the whole transaction, so calls here run
+    on the worker thread without taking it again.
+    """
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def _execute(self, query, args):
+        cur = self._conn.execute(query, args)
+        return cur.rowcount, cur.lastrowid
+
+    async def fetchall(self, query, args=()):
+        return await asyncio.to_thread(lambda: self._conn.execute(qmark(query), tuple(args)).fetchall())
+
+    async def execute(self, query, args=()):
+        """Run a write and return (rowcount, lastrowid)."""
+        return await asyncio.to_thread(self._execute, qmark(query), tuple(args))
+
+    async def executemany(self, query, rows):
+        await asyncio.to_thread(self._conn.executemany, qmark(query), rows)
+
+
+class AsyncSQLiteDatabase:
+    """Single sqlite3 connection driven from a worker thread.
+
+    Calls are serialized with an asyncio lock, so this is meant for tests and
+    small local runs rather than concurrent production traffic. Without an
+    explicit schema the database is created from setup_sqlite.sql.
+    """
+
+    name = SQLiteBackend.name
+    upsert_add_sql = SQLiteBackend.upsert_add_sql
+    search_min_length = SQLiteBackend.search_min_length
+    search_query = SQLiteBackend.search_query
+    missing_fulltext = SQLiteBackend.missing_fulltext
+    Error = SQLiteBackend.Error
+    IntegrityError = SQLiteBackend.IntegrityError
+
+    def __init__(self, path=':memory:', schema=None):
+        self.path = path
+        self.schema = schema
+        self.conn = None
+        self._lock = None
+
+    async def open(self):
+        self._lock = asyncio.Lock()
+        self.conn = await asyncio.to_thread(self._connect)
+
+    def _connect(self):
+        conn = sqlite_connect(self.path, self.schema)
+        if self.schema is None:
+            ensure_schema(conn)
+        return conn
+
+    async def close(self):
+        if self.conn is not None:
+            await asyncio.to_thread(self.conn.close)
+            self.conn = None
+
+    async def _run(self, func, query, args):
+        async with self._lock:
+            return await asyncio.to_thread(func, qmark(query), tuple(args))
+
+    def _fetchone(self, query, args):
+        return self.conn.execute(query, args).fetchone()
+
+    def _fetchall(self, query, args):
+        return self.conn.execute(query, args).fetchall()
+
+    def _execute(self, query, args):
+        cur = self.conn.execute(query, args)
+        self.conn.commit()
+        return cur.rowcount, cur.lastrowid
+
+    async def fetchone(self, query, args=()):
+        return await self._run(self._fetchone, query, args)
+
+    async def fetchall(self, query, args=()):
+        return await self._run(self._fetchall, query, args)
+
+    async def execute(self, query, args=()):
+        """Run a write and return (rowcount, lastrowid)."""
+        return await self._run(self._execute, query, args)
+
+    def lock_rows_sql(self, res, count):
+        """SELECT rows by primary key; BEGIN IMMEDIATE already holds the write lock."""
+        return res.select_in_sql(count)
+
+    @contextlib.asynccontextmanager
+    async def transaction(self):
+        async with self._lock:
+            await asyncio.to_thread(self.conn.execute, 'BEGIN IMMEDIATE')
+            try:
+                yield AsyncSQLiteTransaction(self.conn)
+            except BaseException:
+                await asyncio.to_thread(self.conn.rollback)
+                raise
+            await asyncio.to_thread(self.conn.commit)
@@ -0,0 +1,396 @@
+#!/usr/bin/env python
+"""HTTP benchmark suite for main.py.
+
+Seeds the configured database (DB_BACKEND=mysql or sqlite) with --rows rows
+per table (1k to 1M), then drives every route of main.py through the Flask test client and/or a
+real threaded WSGI server: reads, paging, searches, XML output, sparse
+fieldsets, filters, single and batch writes, and auth. For each scenario it
+reports p50/p95/p99 latency and requests per second; peak RSS is sampled
+after every scenario. Each run is written to a JSON file named after the git
+commit, and --compare prints the change between two such files.
+
+Usage:
+    python benchmarks/bench_http.py --seed --rows 100000 --target both
+    python benchmarks/bench_http.py --target wsgi --concurrency 16 --requests 2000
+    python benchmarks/bench_http.py --compare results/old.json results/new.json
+
+Seeding empties the product, supplier, icecream and students tables of the
+database named by MYSQL_DB or SQLITE_PATH; point it at a scratch database.
+With DB_BACKEND=sqlite SQLITE_PATH=:memory: the suite needs no server at
+all. Set RESPONSE_CACHE_SIZE=0 to measure without the in-memory response cache.
+"""
+import argparse
+import datetime
+import http.client
+import json
+import platform
+import random
+import resource
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+RESULTS_DIR = Path(__file__).parent / 'results'
+SEED_CHUNK = 1000
+
+CATEGORIES = ('Food', 'Drinks', 'Snacks', 'Toiletries', 'Goods')
+SIZES = ('1.3L', '750ml', '100ml Cup', 'Cone', '80ml Bar')
+MAJORS = ('CS', 'IT', 'Math', 'Physics', 'Business')
+
+
+def seed_row(name, i):
+    """Deterministic JSON payload number i for a resource."""
+    if name == 'products':
+        return {'product_name': f'Product {i}', 'category': CATEGORIES[i % 5], 'unit': 'pack',
+                'price': f'{5 + i % 20000 / 100:.2f}', 'quantity': i % 300,
+                'description': f'Seeded product {i}'}
+    if name == 'suppliers':
+        return {'supplier_name': f'Supplier {i}', 'contact_number': f'09{i:09d}',
+                'address': f'{i} Rizal Street, Quezon City', 'contact_person': f'Contact {i}',
+                'phone': f'09{i:09d}', 'email': f'supplier{i}@example.com'}
+    if name == 'icecream':
+        return {'flavor': f'Flavor {i}', 'size': SIZES[i % 5], 'price': f'{25 + i % 15000 / 100:.2f}',
+                'stock': i % 50, 'description': f'Seeded ice cream {i}'}
+    return {'student_name': f'Student {i}', 'email': f'student{i}@example.com', 'major': MAJORS[i % 5],
+            'gpa': f'{1 + i % 300 / 100:.2f}',
+            'enrollment_date': (datetime.date(2020, 1, 1) + datetime.timedelta(days=i % 1500)).isoformat()}
+
+
+def seed(rows):
+    """Replace every table's contents with rows deterministic rows.
+
+    Goes through the app's own backend and pool, so an in-memory SQLite
+    database is seeded in place.
+    """
+    from main import backend, pool
+    from resources import RESOURCES
+
+    entry = pool.acquire()
+    conn = entry.conn
+    try:
+        cur = conn.cursor()
+        for res in RESOURCES:
+            start = time.perf_counter()
+            backend.truncate(cur, res.table)
+            for first in range(0, rows, SEED_CHUNK):
+                batch = [res.row(res.clean(seed_row(res.name, i))[0])
+                         for i in range(first, min(first + SEED_CHUNK, rows))]
+                backend.insert_many(cur, res, batch, SEED_CHUNK)
+                conn.commit()
+            print(f'seeded {rows} {res.table} rows in {time.perf_counter() - start:.1f}s')
+        cur.close()
+    finally:
+        pool.release(entry)
+
+
+class TestClientDriver:
+    """Runs requests in-process through Flask's test client."""
+
+    name = 'testclient'
+
+    def __init__(self, app):
+        self.app = app
+
+    def session(self):
+        client = self.app.test_client()
+
+        def call(method, path, body=None, headers=None):
+            response = client.open(path, method=method, json=body, headers=headers)
+            response.get_data()
+            return response.status_code
+        return call
+
+    def close(self):
+        pass
+
+
+class WSGIDriver:
+    """Serves the app from a threaded WSGI server and calls it over keep-alive HTTP."""
+
+    name = 'wsgi'
+
+    def __init__(self, app):
+        from werkzeug.serving import make_server, WSGIRequestHandler
+        WSGIRequestHandler.protocol_version = 'HTTP/1.1'
+        WSGIRequestHandler.log_request = lambda *args, **kwargs: None
+        self.server = make_server('127.0.0.1', 0, app, threaded=True)
+        self.port = self.server.server_port
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def session(self):
+        conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=60)
+
+        def call(method, path, body=None, headers=None):
+            headers = dict(headers or {})
+            data = None
+            if body is not None:
+                data = json.dumps(body, default=str)
+                headers['Content-Type'] = 'application/json'
+            conn.request(method, path, body=data, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            return response.status
+        return call
+
+    def close(self):
+        self.server.shutdown()
+
+
+def scenarios(rows, token, created):
+    """(name, expected status, request builder) for every route.
+
+    A builder takes (rng, i) and returns (method, path, body, headers).
+    created maps a resource name to the first id its create scenario made.
+    """
+    auth = {'Authorization': f'Bearer {token}'}
+
+    def any_id(rng):
+        return rng.randint(1, rows)
+
+    tag = time.strftime('%Y%m%d%H%M%S')
+
+    def create(name, offset):
+        def build(rng, i):
+            payload = seed_row(name, offset + i)
+            if name == 'students':
+                # students.email is UNIQUE; keep reruns without --seed from colliding.
+                payload['email'] = f'bench-{tag}-{offset + i}@example.com'
+            return 'POST', f'/api/{name}', payload, auth
+        return build
+
+    def delete_created(name):
+        def build(rng, i):
+            return 'DELETE', f'/api/{name}/{created[name] + i}', None, auth
+        return build
+
+    return [
+        ('home', 200, lambda rng, i: ('GET', '/', None, None)),
+        ('login', 200, lambda rng, i: ('POST', '/login', {'username': 'admin', 'password': 'admin'}, None)),
+        ('login wrong password', 401, lambda rng, i: ('POST', '/login', {'username': 'admin', 'password': 'x'}, None)),
+        ('list products page', 200, lambda rng, i: ('GET', '/api/products?limit=100', None, None)),
+        ('list products deep cursor', 200, lambda rng, i: (
+            'GET', f'/api/products?limit=100&cursor={cursor_for(any_id(rng))}', None, None)),
+        ('list students max page', 200, lambda rng, i: ('GET', '/api/students?limit=1000', None, None)),
+        ('list products xml', 200, lambda rng, i: ('GET', '/api/products?limit=100&format=xml', None, None)),
+        ('list products fields', 200, lambda rng, i: (
+            'GET', '/api/products?limit=100&fields=product_name,price', None, None)),
+        ('filter products sort', 200, lambda rng, i: (
+            'GET', f'/api/products?category={CATEGORIES[i % 5]}&price_min=10&price_max=50&sort=-price',
+            None, None)),
+        ('filter icecream low stock', 200, lambda rng, i: ('GET', '/api/icecream?stock_lt=5', None, None)),
+        ('get product', 200, lambda rng, i: ('GET', f'/api/products/{any_id(rng)}', None, None)),
+        ('get supplier xml', 200, lambda rng, i: ('GET', f'/api/suppliers/{any_id(rng)}?format=xml', None, None)),
+        ('get missing', 404, lambda rng, i: ('GET', f'/api/icecream/{rows + 10_000_000}', None, None)),
+        ('search products', 200, lambda rng, i: ('GET', f'/api/products?q=Product%20{any_id(rng)}', None, None)),
+        ('search suppliers short', 200, lambda rng, i: ('GET', '/api/suppliers?q=9', None, None)),
+        ('search students', 200, lambda rng, i: ('GET', f'/api/students?q=student{any_id(rng)}', None, None)),
+        ('stream icecream ndjson', 200, lambda rng, i: ('GET', '/api/icecream?format=ndjson&limit=5000', None, None)),
+        ('create product', 201, create('products', rows)),
+        ('create without token', 401, lambda rng, i: ('POST', '/api/products', seed_row('products', 0), None)),
+        ('update product', 200, lambda rng, i: (
+            'PUT', f'/api/products/{any_id(rng)}', {'quantity': i % 300, 'price': '19.50'}, auth)),
+        ('update invalid', 400, lambda rng, i: ('PUT', f'/api/products/{any_id(rng)}', {'price': 'free'}, auth)),
+        ('create student', 201, create('students', rows * 2)),
+        ('batch create icecream 100', 201, lambda rng, i: (
+            'POST', '/api/icecream/batch', [seed_row('icecream', rows + i * 100 + k) for k in range(100)], auth)),
+        ('batch update icecream 100', 200, lambda rng, i: (
+            'PATCH', '/api/icecream/batch',
+            [{'id': k, 'fields': {'stock': i % 50}} for k in rng.sample(range(1, rows + 1), min(100, rows))],
+            auth)),
+        ('delete created product', 200, delete_created('products')),
+    ]
+
+
+def cursor_for(last_id):
+    from paging import encode_cursor
+    return encode_cursor(last_id)
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def peak_rss_kib():
+    """Peak resident set size of this process so far, in KiB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def run_scenario(driver, build, expected, requests, concurrency, warmup, seed_value):
+    """Issue requests (split across concurrency sessions) and collect latencies."""
+    latencies = []
+    unexpected = {}
+    lock = threading.Lock()
+    share = -(-requests // concurrency)
+
+    def worker(index):
+        rng = random.Random(seed_value + index)
+        call = driver.session()
+        for i in range(warmup):
+            call(*build(rng, -1 - i - index * warmup))
+        local = []
+        bad = {}
+        base = index * share
+        for i in range(base, min(base + share, requests)):
+            method, path, body, headers = build(rng, i)
+            start = time.perf_counter()
+            status = call(method, path, body, headers)
+            local.append(time.perf_counter() - start)
+            if status != expected:
+                bad[status] = bad.get(status, 0) + 1
+        with lock:
+            latencies.extend(local)
+            for status, count in bad.items():
+                unexpected[status] = unexpected.get(status, 0) + count
+
+    start = time.perf_counter()
+    if concurrency == 1:
+        worker(0)
+    else:
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    ms = 1000.0
+    return {
+        'requests': len(latencies),
+        'concurrency': concurrency,
+        'seconds': round(elapsed, 4),
+        'rps': round(len(latencies) / elapsed, 1) if elapsed else None,
+        'p50_ms': round(percentile(latencies, 50) * ms, 3),
+        'p95_ms': round(percentile(latencies, 95) * ms, 3),
+        'p99_ms': round(percentile(latencies, 99) * ms, 3),
+        'max_ms': round(latencies[-1] * ms, 3),
+        'unexpected_status': {str(k): v for k, v in sorted(unexpected.items())},
+        'peak_rss_kib': peak_rss_kib(),
+    }
+
+
+def next_id(client, name, pk='id'):
+    """Id the next row created in name will get, read through the API."""
+    rows = client.get(f'/api/{name}?sort=-{pk}&limit=1&fields={pk}').get_json()[name]
+    return rows[0][pk] + 1 if rows else 1
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                       cwd=Path(__file__).parent, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def run(opts):
+    from main import app, backend
+
+    app.config['TESTING'] = True
+    drivers = []
+    if opts.target in ('testclient', 'both'):
+        drivers.append(TestClientDriver(app))
+    if opts.target in ('wsgi', 'both'):
+        drivers.append(WSGIDriver(app))
+
+    results = {
+        'commit': git_commit(),
+        'started_at': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'backend': backend.name,
+        'rows_per_table': opts.rows,
+        'requests_per_scenario': opts.requests,
+        'response_cache_size': app.config.get('RESPONSE_CACHE_SIZE'),
+        'targets': {},
+    }
+    for driver in drivers:
+        concurrency = 1 if driver.name == 'testclient' else opts.concurrency
+        client = app.test_client()
+        token = client.post('/login', json={'username': 'admin', 'password': 'admin'}).get_json()['access_token']
+        created = {}
+        print(f'\n[{driver.name}] {opts.requests} requests per scenario, concurrency {concurrency}')
+        print(f'{"scenario":<28} {"rps":>9} {"p50 ms":>9} {"p95 ms":>9} {"p99 ms":>9} {"rss MiB":>8}')
+        out = results['targets'][driver.name] = {}
+        for name, expected, build in scenarios(opts.rows, token, created):
+            if opts.only and not any(part in name for part in opts.only):
+                continue
+            warmup = opts.warmup
+            if name == 'create product':
+                created['products'] = next_id(client, 'products')
+            elif name == 'delete created product':
+                # Remove the rows 'create product' added, keeping the table size steady.
+                if 'products' not in created:
+                    continue
+                warmup = 0
+            stats = run_scenario(driver, build, expected, opts.requests, concurrency, warmup, opts.seed_value)
+            out[name] = stats
+            flag = '' if not stats['unexpected_status'] else f"  unexpected {stats['unexpected_status']}"
+            print(f"{name:<28} {stats['rps']:>9.1f} {stats['p50_ms']:>9.3f} {stats['p95_ms']:>9.3f} "
+                  f"{stats['p99_ms']:>9.3f} {stats['peak_rss_kib'] / 1024:>8.1f}{flag}")
+        driver.close()
+
+    output = Path(opts.output) if opts.output else RESULTS_DIR / (
+        f"http-{results['commit']}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2) + '\n')
+    print(f'\nwrote {output}')
+
+
+def compare(base_path, head_path):
+    """Print p50/p99/rps changes between two result files."""
+    base = json.loads(Path(base_path).read_text())
+    head = json.loads(Path(head_path).read_text())
+    print(f"{base['commit']} -> {head['commit']}")
+    for target, scenarios_head in head['targets'].items():
+        scenarios_base = base['targets'].get(target, {})
+        print(f'\n[{target}]')
+        print(f'{"scenario":<28} {"p50":>16} {"p99":>16} {"rps":>16}')
+        for name, new in scenarios_head.items():
+            old = scenarios_base.get(name)
+            if old is None:
+                continue
+            cells = []
+            for key in ('p50_ms', 'p99_ms', 'rps'):
+                change = (new[key] - old[key]) / old[key] * 100 if old[key] else 0.0
+                cells.append(f'{new[key]:>9.2f} {change:+5.0f}%')
+            print(f'{name:<28} ' + ' '.join(cells))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1000, help='rows per table to seed and address (1k-1M)')
+    parser.add_argument('--seed', action='store_true', help='truncate and reseed the tables first')
+    parser.add_argument('--target', choices=('testclient', 'wsgi', 'both'), default='both')
+    parser.add_argument('--requests', type=int, default=500, help='measured requests per scenario')
+    parser.add_argument('--warmup', type=int, default=20, help='unmeasured requests per session first')
+    parser.add_argument('--concurrency', type=int, default=8, help='client threads for the wsgi target')
+    parser.add_argument('--only', action='append', help='run scenarios whose name contains this')
+    parser.add_argument('--seed-value', type=int, default=1234, help='random seed for ids picked per request')
+    parser.add_argument('--output', help='result file (default benchmarks/results/http-<commit>-<time>.json)')
+    parser.add_argument('--compare', nargs=2, metavar=('BASE', 'HEAD'), help='compare two result files')
+    opts = parser.parse_args()
+
+    if opts.compare:
+        compare(*opts.compare)
+        return
+    if not 1 <= opts.rows <= 1_000_000:
+        parser.error('--rows must be between 1 and 1000000')
+    if opts.requests < 1 or opts.concurrency < 1:
+        parser.error('--requests and --concurrency must be positive')
+    if opts.seed:
+        seed(opts.rows)
+    run(opts)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,173 @@
+#!/usr/bin/env python
+"""Measure the payload schemas against the old hand-written validators.
+
+Times one create (validate + INSERT row) per payload, for valid and invalid
+payloads, and reports the cost per payload. The old validators only check
+values and bind them as sent; "legacy+coerce" adds the Decimal/int/date
+conversion the schemas now do, so it produces the same row. The schemas
+also bound every value to its column, so they are not expected to be faster;
+this tracks what that costs.
+
+Usage: python benchmarks/bench_validation.py [--number 100000] [--repeat 5]
+"""
+import argparse
+import datetime
+import sys
+import timeit
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from validators import PRODUCT, STUDENT
+
+
+# The validators as they were before validators.Schema, kept here as the baseline.
+
+def legacy_validate_int(val):
+    try:
+        return int(val)
+    except:
+        return None
+
+
+def legacy_validate_product_payload(payload, partial=False):
+    errors = []
+    if not partial:
+        if "product_name" not in payload:
+            errors.append("product_name is required")
+        if "category" not in payload:
+            errors.append("category is required")
+        if "unit" not in payload:
+            errors.append("unit is required")
+    if "product_name" in payload and (not isinstance(payload["product_name"], str) or not payload["product_name"].strip()):
+        errors.append("product_name must be a non-empty string")
+    if "category" in payload and (not isinstance(payload["category"], str) or not payload["category"].strip()):
+        errors.append("category must be a non-empty string")
+    if "unit" in payload and (not isinstance(payload["unit"], str) or not payload["unit"].strip()):
+        errors.append("unit must be a non-empty string")
+    if "price" in payload:
+        try:
+            float(payload["price"])
+        except (TypeError, ValueError):
+            errors.append("price must be a number")
+    if "quantity" in payload:
+        if legacy_validate_int(payload["quantity"]) is None:
+            errors.append("quantity must be an integer")
+    return errors
+
+
+def legacy_product_row(payload):
+    return (
+        payload.get("product_name"),
+        payload.get("category"),
+        payload.get("unit"),
+        payload.get("price", 0.0),
+        payload.get("quantity", 0),
+        payload.get("description", ""),
+    )
+
+
+def legacy_validate_student_payload(payload, partial=False):
+    errors = []
+    if not partial:
+        if "student_name" not in payload:
+            errors.append("student_name is required")
+        if "email" not in payload:
+            errors.append("email is required")
+    if "student_name" in payload and (not isinstance(payload["student_name"], str) or not payload["student_name"].strip()):
+        errors.append("student_name must be a non-empty string")
+    if "email" in payload and (not isinstance(payload["email"], str) or not payload["email"].strip()):
+        errors.append("email must be a non-empty string")
+    if "major" in payload and (not isinstance(payload["major"], str) or not payload["major"].strip()):
+        errors.append("major must be a non-empty string")
+    if "gpa" in payload:
+        try:
+            float(payload["gpa"])
+        except (TypeError, ValueError):
+            errors.append("gpa must be a number")
+    return errors
+
+
+def legacy_student_row(payload):
+    return (
+        payload.get("student_name"),
+        payload.get("email"),
+        payload.get("major", ""),
+        payload.get("gpa", 0.0),
+        payload.get("enrollment_date", None),
+    )
+
+
+def legacy_create(validate, row):
+    def create(payload):
+        if not validate(payload, partial=False):
+            return row(payload)
+    return create
+
+
+def legacy_product_coerce(payload):
+    name, category, unit, price, quantity, description = legacy_product_row(payload)
+    return name, category, unit, Decimal(str(price)), int(quantity), description
+
+
+def legacy_student_coerce(payload):
+    name, email, major, gpa, enrolled = legacy_student_row(payload)
+    if enrolled is not None:
+        enrolled = datetime.date.fromisoformat(enrolled)
+    return name, email, major, Decimal(str(gpa)), enrolled
+
+
+def schema_create(schema):
+    def create(payload):
+        data, errors = schema.clean(payload, partial=False)
+        if not errors:
+            return schema.row(data)
+    return create
+
+
+PRODUCT_FUNCS = (
+    legacy_create(legacy_validate_product_payload, legacy_product_row),
+    legacy_create(legacy_validate_product_payload, legacy_product_coerce),
+    schema_create(PRODUCT),
+)
+STUDENT_FUNCS = (
+    legacy_create(legacy_validate_student_payload, legacy_student_row),
+    legacy_create(legacy_validate_student_payload, legacy_student_coerce),
+    schema_create(STUDENT),
+)
+
+CASES = [
+    ('product valid', {'product_name': 'Canned Tuna', 'category': 'Food', 'unit': 'can',
+                       'price': 35.0, 'quantity': 80, 'description': 'In oil'}, PRODUCT_FUNCS),
+    ('product invalid', {'product_name': '', 'unit': 'can', 'price': 'free', 'quantity': 'many'},
+     PRODUCT_FUNCS),
+    ('student valid', {'student_name': 'Ana Cruz', 'email': 'ana@example.com', 'major': 'CS',
+                       'gpa': '3.75', 'enrollment_date': '2024-06-01'}, STUDENT_FUNCS),
+]
+
+
+def per_payload(funcs, payload, number, repeat):
+    """Best per-call time of each function in microseconds, timed round-robin."""
+    best = [float('inf')] * len(funcs)
+    for _ in range(repeat):
+        for i, func in enumerate(funcs):
+            best[i] = min(best[i], timeit.timeit(lambda: func(payload), number=number))
+    return [seconds / number * 1e6 for seconds in best]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--number', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=5)
+    opts = parser.parse_args()
+
+    print(f'{opts.number} payloads per run, best of {opts.repeat}')
+    print(f'{"case":<18} {"legacy us":>10} {"legacy+coerce us":>17} {"schema us":>10} {"schema/coerce":>14}')
+    for label, payload, funcs in CASES:
+        old_us, coerce_us, new_us = per_payload(funcs, payload, opts.number, opts.repeat)
+        print(f'{label:<18} {old_us:10.3f} {coerce_us:17.3f} {new_us:10.3f} {new_us / coerce_us:13.2f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+"""Benchmark xml_encoder against dicttoxml on list and single-item responses.
+
+Usage: python benchmarks/bench_xml.py [--rows 1000] [--repeat 5]
+"""
+import argparse
+import datetime
+import sys
+import timeit
+import tracemalloc
+from decimal import Decimal
+from pathlib import Path
+
+from dicttoxml import dicttoxml
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import xml_encoder
+
+
+def make_rows(n):
+    """Build product rows shaped like DictCursor results."""
+    created = datetime.datetime(2024, 1, 15, 8, 30, 0)
+    return [{
+        'id': i,
+        'product_name': f'Product {i} & Sons',
+        'category': ('Food', 'Drinks', 'Snacks', 'Toiletries')[i % 4],
+        'unit': 'pack',
+        'price': Decimal('12.50') + i,
+        'quantity': i % 200,
+        'description': 'Imported <special> item' if i % 3 else None,
+        'created_at': created,
+    } for i in range(1, n + 1)]
+
+
+def measure(label, func, repeat):
+    """Time func and record its peak traced allocation."""
+    best = min(timeit.repeat(func, number=1, repeat=repeat))
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f'{label:<34} {best * 1000:10.2f} ms   peak {peak / 1024:10.1f} KiB')
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=5)
+    opts = parser.parse_args()
+
+    listing = {'products': make_rows(opts.rows), 'next_cursor': None}
+    single = {'product': listing['products'][0]}
+    assert xml_encoder.dumps(listing) == dicttoxml(listing, custom_root='response', attr_type=False)
+
+    print(f'{opts.rows} rows, best of {opts.repeat}')
+    old = measure('dicttoxml list', lambda: dicttoxml(listing, custom_root='response', attr_type=False), opts.repeat)
+    new = measure('xml_encoder.dumps list', lambda: xml_encoder.dumps(listing), opts.repeat)
+    print(f'list speedup: {old / new:.1f}x')
+    old = measure('dicttoxml single', lambda: dicttoxml(single, custom_root='response', attr_type=False), opts.repeat * 100)
+    new = measure('xml_encoder.dumps single', lambda: xml_encoder.dumps(single), opts.repeat * 100)
+    print(f'single speedup: {old / new:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
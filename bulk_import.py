@@ -0,0 +1,388 @@
+#!/usr/bin/env python
+"""Bulk import of CSV, JSON or NDJSON files into one of the API's tables.
+
+Records are streamed from the file, checked with the same schema as the API
+and written in chunks of --chunk-size rows: one multi-row INSERT per chunk,
+or LOAD DATA LOCAL INFILE with --method load-data on MySQL. JSON files may
+hold an array of records or, like sample_db.json, an object with one array
+per table; the array named after the table is read (--section picks another).
+A ``<item>_id`` field, e.g. product_id, is the row's primary key, and is kept
+only with --keep-ids.
+
+Each chunk commits together with the run's row in import_checkpoints, so an
+interrupted import rerun with the same arguments skips the records already
+loaded and resumes after the last committed chunk. --defer-indexes drops the
+table's non-unique secondary indexes for the load and rebuilds them at the
+end, which is faster than maintaining them row by row; the dropped
+definitions are kept in the checkpoint until they are rebuilt. Inventory
+summaries (analytics.py) are rebuilt after loading product or icecream rows.
+A --truncate import ends by starting a new sync generation for the table
+(changes.reset), so /changes clients sync it again from scratch.
+
+Usage:
+    python bulk_import.py products catalog.csv --chunk-size 5000 --defer-indexes
+    python bulk_import.py icecream sample_db.json --keep-ids --truncate
+    python bulk_import.py students students.ndjson --method load-data
+
+Progress and the final rate go to stderr in rows per second. Invalid records
+stop the import unless --max-errors allows some; they are never loaded.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+from analytics import SUMMARIES
+from config import Config
+from resources import RESOURCES
+from validators import to_int
+import changes
+import storage
+
+FORMATS = {'.csv': 'csv', '.json': 'json', '.ndjson': 'ndjson', '.jsonl': 'ndjson'}
+READ_SIZE = 1 << 16
+REPORT_EVERY = 1.0
+
+
+class ImportFailed(Exception):
+    """Raised when records fail validation beyond --max-errors."""
+
+
+def read_csv(path):
+    with open(path, newline='', encoding='utf-8-sig') as fp:
+        for record in csv.DictReader(fp):
+            # Empty cells are missing values, so column defaults apply.
+            yield {key: value for key, value in record.items() if value != '' and key is not None}
+
+
+def read_ndjson(path):
+    with open(path, encoding='utf-8') as fp:
+        for line in fp:
+            if line.strip():
+                yield json.loads(line)
+
+
+class JSONStream:
+    """Pulls JSON values one at a time from a file, reading READ_SIZE characters at a time."""
+
+    def __init__(self, fp, read_size=READ_SIZE):
+        self.fp = fp
+        self.read_size = read_size
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _more(self):
+        if self.eof:
+            return False
+        chunk = self.fp.read(self.read_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """The next non-whitespace character, or '' at the end of the file."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in ' \t\r\n':
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._more():
+                return ''
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"expected {char!r} in JSON input")
+        self.pos += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self._more():
+                    continue
+                raise
+            # A number at the end of the buffer may go on in the next read.
+            if end == len(self.buf) and self._more():
+                continue
+            self.pos = end
+            return value
+
+    def array(self):
+        """Yield the items of the array starting at the current position."""
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            char = self.peek()
+            self.pos += 1
+            if char == ']':
+                return
+            if char != ',':
+                raise ValueError("expected ',' or ']' in JSON array")
+
+
+def read_json(path, sections):
+    """Yield the records of a top-level array, or of the first array named in sections."""
+    with open(path, encoding='utf-8') as fp:
+        stream = JSONStream(fp)
+        if stream.peek() == '[':
+            yield from stream.array()
+            return
+        stream.expect('{')
+        while stream.peek() != '}':
+            key = stream.value()
+            stream.expect(':')
+            if key in sections and stream.peek() == '[':
+                yield from stream.array()
+                return
+            if stream.peek() == '[':
+                for _ in stream.array():
+                    pass
+            else:
+                stream.value()
+            if stream.peek() == ',':
+                stream.pos += 1
+        raise ValueError(f"no array named {' or '.join(sections)} in {path}")
+
+
+def read_records(path, fmt, sections):
+    if fmt == 'csv':
+        return read_csv(path)
+    if fmt == 'ndjson':
+        return read_ndjson(path)
+    return read_json(path, sections)
+
+
+class Checkpoint:
+    """A run's row in import_checkpoints, written inside each chunk's transaction."""
+
+    def __init__(self, name, table):
+        self.name = name
+        self.table = table
+        self.position = 0
+        self.rows_loaded = 0
+        self.deferred = []
+
+    def load(self, cur):
+        cur.execute("SELECT position, rows_loaded, deferred_indexes FROM import_checkpoints WHERE name = %s",
+                    (self.name,))
+        row = cur.fetchone()
+        if row is None:
+            return False
+        self.position = row['position']
+        self.rows_loaded = row['rows_loaded']
+        self.deferred = [tuple(index) for index in json.loads(row['deferred_indexes'] or '[]')]
+        return True
+
+    def save(self, cur):
+        cur.execute("DELETE FROM import_checkpoints WHERE name = %s", (self.name,))
+        cur.execute("INSERT INTO import_checkpoints (name, table_name, position, rows_loaded, deferred_indexes) "
+                    "VALUES (%s, %s, %s, %s, %s)",
+                    (self.name, self.table, self.position, self.rows_loaded, json.dumps(self.deferred)))
+
+    def delete(self, cur):
+        cur.execute("DELETE FROM import_checkpoints WHERE name = %s", (self.name,))
+
+
+class Importer:
+    """Loads validated records into res's table in checkpointed chunks."""
+
+    def __init__(self, backend, conn, res, chunk_size=1000, method='insert', keep_ids=False,
+                 max_errors=0, report=None):
+        self.backend = backend
+        self.conn = conn
+        self.res = res
+        self.chunk_size = chunk_size
+        self.method = method
+        self.keep_ids = keep_ids
+        self.max_errors = max_errors
+        self.report = report
+        self.columns = ((res.pk,) if keep_ids else ()) + res.columns
+        self.insert_sql = (f"INSERT INTO {res.table} ({', '.join(self.columns)}) "
+                           f"VALUES ({', '.join(['%s'] * len(self.columns))})")
+        self.id_fields = {res.pk, f"{res.item}_id"}
+        self.errors = []
+        self.rows_loaded = 0
+
+    def row(self, record):
+        """The INSERT values for one record, or a list of errors."""
+        if not isinstance(record, dict):
+            return None, ["record must be an object"]
+        data, errors = self.res.clean(record, partial=False)
+        if errors:
+            return None, errors
+        row = self.res.row(data)
+        if self.keep_ids:
+            raw = next((record[key] for key in self.id_fields if key in record), None)
+            try:
+                row = (to_int(raw),) + row
+            except (TypeError, ValueError):
+                return None, [f"{self.res.pk} must be an integer"]
+        return row, None
+
+    def run(self, records, checkpoint, truncate=False, defer_indexes=False):
+        """Import records, resuming from checkpoint if it was saved before.
+
+        Returns the number of rows loaded by this call.
+        """
+        backend, res = self.backend, self.res
+        cur = self.conn.cursor()
+        try:
+            resumed = checkpoint.load(cur)
+            self.conn.commit()
+            if not resumed:
+                if truncate:
+                    backend.begin_write(self.conn)
+                    backend.truncate(cur, res.table)
+                    self.conn.commit()
+                if defer_indexes:
+                    checkpoint.deferred = backend.deferrable_indexes(cur, res.table)
+                backend.begin_write(self.conn)
+                checkpoint.save(cur)
+                self.conn.commit()
+                # Dropped only once the definitions are safe in the checkpoint.
+                backend.drop_indexes(cur, res.table, checkpoint.deferred)
+                self.conn.commit()
+            self.rows_loaded = checkpoint.rows_loaded
+            started = time.perf_counter()
+            loaded = self._load(cur, records, checkpoint, started)
+            if checkpoint.deferred:
+                present = {name for name, _ in backend.deferrable_indexes(cur, res.table)}
+                backend.create_indexes(cur, res.table,
+                                       [index for index in checkpoint.deferred if index[0] not in present])
+                self.conn.commit()
+            summary = SUMMARIES.get(res.table)
+            if summary is not None:
+                summary.reconcile(backend, self.conn)
+            backend.begin_write(self.conn)
+            if truncate:
+                # Clients of /changes hold tokens for rows that are gone.
+                changes.reset(backend, cur, res.table)
+            checkpoint.delete(cur)
+            self.conn.commit()
+            if self.report:
+                self.report(self.rows_loaded, loaded, time.perf_counter() - started, done=True)
+            return loaded
+        except BaseException:
+            self.conn.rollback()
+            raise
+        finally:
+            cur.close()
+
+    def _load(self, cur, records, checkpoint, started):
+        rows = []
+        loaded = 0
+        position = 0
+        reported = started
+        for position, record in enumerate(records, 1):
+            if position <= checkpoint.position:
+                continue
+            row, errors = self.row(record)
+            if errors:
+                self.errors.append((position, errors))
+                if len(self.errors) > self.max_errors:
+                    raise ImportFailed(f"record {position}: {'; '.join(errors)}")
+                continue
+            rows.append(row)
+            if len(rows) >= self.chunk_size:
+                loaded += self._flush(cur, rows, checkpoint, position)
+                rows = []
+                now = time.perf_counter()
+                if self.report and now - reported >= REPORT_EVERY:
+                    self.report(self.rows_loaded, loaded, now - started)
+                    reported = now
+        if rows or position > checkpoint.position:
+            loaded += self._flush(cur, rows, checkpoint, position)
+        return loaded
+
+    def _flush(self, cur, rows, checkpoint, position):
+        """Write rows and advance the checkpoint to position in one transaction."""
+        self.backend.begin_write(self.conn)
+        if rows:
+            if self.method == 'load-data':
+                self.backend.load_data(cur, self.res.table, self.columns, rows)
+            else:
+                self.backend.insert_rows(cur, self.insert_sql, rows)
+        checkpoint.position = position
+        checkpoint.rows_loaded += len(rows)
+        checkpoint.save(cur)
+        self.conn.commit()
+        self.rows_loaded = checkpoint.rows_loaded
+        return len(rows)
+
+
+def print_progress(total, loaded, seconds, done=False):
+    rate = loaded / seconds if seconds > 0 else 0.0
+    label = 'imported' if done else 'loaded'
+    print(f'{label} {total:,} rows ({loaded:,} this run) in {seconds:.1f}s, {rate:,.0f} rows/s', file=sys.stderr)
+
+
+def main(argv=None):
+    tables = {name: res for res in RESOURCES for name in (res.name, res.table)}
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('table', choices=sorted(tables), help='resource or table to load')
+    parser.add_argument('path', help='CSV, JSON or NDJSON file')
+    parser.add_argument('--format', choices=('csv', 'json', 'ndjson'), help='default: from the file extension')
+    parser.add_argument('--section', help='array to read from a JSON object (default: the table name)')
+    parser.add_argument('--chunk-size', type=int, default=Config.BATCH_INSERT_CHUNK, help='rows per transaction')
+    parser.add_argument('--method', choices=('insert', 'load-data'), default='insert')
+    parser.add_argument('--defer-indexes', action='store_true', help='rebuild secondary indexes after loading')
+    parser.add_argument('--keep-ids', action='store_true', help='load the primary keys given in the file')
+    parser.add_argument('--truncate', action='store_true', help='empty the table first (not when resuming)')
+    parser.add_argument('--checkpoint', help='checkpoint name (default: table and absolute path)')
+    parser.add_argument('--restart', action='store_true', help='discard a saved checkpoint and start over')
+    parser.add_argument('--max-errors', type=int, default=0, help='invalid records to skip before failing')
+    parser.add_argument('--quiet', action='store_true', help='print only the final summary')
+    opts = parser.parse_args(argv)
+
+    res = tables[opts.table]
+    fmt = opts.format or FORMATS.get(Path(opts.path).suffix.lower())
+    if fmt is None:
+        parser.error('cannot tell the format from the file name; pass --format')
+    if opts.chunk_size < 1:
+        parser.error('--chunk-size must be positive')
+    backend = storage.create_backend(Config)
+    if opts.method == 'load-data' and backend.load_data is None:
+        parser.error(f'--method load-data needs DB_BACKEND=mysql, not {backend.name}')
+
+    conn = backend.connect(local_infile=1) if opts.method == 'load-data' else backend.connect()
+    try:
+        checkpoint = Checkpoint(opts.checkpoint or f'{res.table}:{os.path.abspath(opts.path)}', res.table)
+        if opts.restart:
+            cur = conn.cursor()
+            checkpoint.delete(cur)
+            conn.commit()
+            cur.close()
+        sections = [opts.section] if opts.section else [res.name, res.collection, res.table]
+        importer = Importer(backend, conn, res, opts.chunk_size, opts.method, opts.keep_ids, opts.max_errors,
+                            report=None if opts.quiet else print_progress)
+        try:
+            importer.run(read_records(opts.path, fmt, sections), checkpoint, opts.truncate, opts.defer_indexes)
+        except ImportFailed as err:
+            print(f'import stopped at {err}; {importer.rows_loaded:,} rows committed, '
+                  f'rerun to resume after fixing the file', file=sys.stderr)
+            return 1
+        finally:
+            for position, errors in importer.errors[:20]:
+                print(f'record {position}: {"; ".join(errors)}', file=sys.stderr)
+        if opts.quiet:
+            print(f'imported {importer.rows_loaded:,} rows into {res.table}', file=sys.stderr)
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
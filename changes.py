@@ -0,0 +1,195 @@
+"""Delta sync: the rows of a table created, updated or deleted since a token.
+
+Every synced table has an ``updated_at`` column, set on insert and bumped on
+every update (ON UPDATE CURRENT_TIMESTAMP(6) on MySQL, a trigger on SQLite),
+with an (updated_at, pk) index. Deletes leave a row in ``tombstones``, written
+by the delete handlers of main.py and async_app in the same transaction. A poll range-scans both in
+(timestamp, id) order from the token's position, so it costs O(changes)
+rather than O(table).
+
+A row's timestamp is taken when its statement runs, but other connections
+only see it once its transaction commits, so a change can appear behind a
+position that was already handed out. Reads therefore stop at a horizon
+``lag`` seconds behind the database clock, and tokens never move past it; a
+write transaction that stays open longer than the lag can still be missed.
+
+Tombstones are pruned after the retention period. A token older than that
+could miss deletes, so it is refused and the client has to sync from scratch.
+
+A table whose rows are replaced wholesale (a truncating bulk import, such
+as seed_data.py) gets a new sync generation through ``reset``. Tokens carry
+the generation they were issued under, and one from an older generation is
+refused the same way. Its client can then drop rows that no longer exist,
+which no tombstone would ever name.
+"""
+import datetime
+import threading
+import time
+
+from paging import decode_key, encode_cursor
+
+# How often one process prunes old tombstones, in seconds.
+PRUNE_INTERVAL = 3600
+GENERATIONS_TABLE = 'sync_generations'
+GENERATION_SQL = f"SELECT generation FROM {GENERATIONS_TABLE} WHERE table_name = %s"
+
+
+def parse_timestamp(value):
+    return datetime.datetime.fromisoformat(value)
+
+
+def valid_id(value):
+    return value is None or (isinstance(value, int) and not isinstance(value, bool))
+
+
+def encode_since(since, generation):
+    """Opaque token for a (rows position, tombstones position) pair in a sync generation."""
+    (rows_at, rows_id), (deleted_at, deleted_id) = since
+    return encode_cursor([rows_at, rows_id, deleted_at, deleted_id, generation])
+
+
+def decode_since(token, backend):
+    """Decode a ?since= token into (positions in backend's timestamp format, generation).
+
+    Returns None if the token is invalid. Tokens issued before generations
+    existed have four fields and belong to generation 0.
+    """
+    key = decode_key(token)
+    if not isinstance(key, list) or len(key) not in (4, 5):
+        return None
+    rows_at, rows_id, deleted_at, deleted_id, generation = key if len(key) == 5 else key + [0]
+    if not (isinstance(rows_at, str) and isinstance(deleted_at, str)
+            and valid_id(rows_id) and valid_id(deleted_id) and valid_id(generation) and generation is not None):
+        return None
+    try:
+        rows_at = backend.timestamp(parse_timestamp(rows_at))
+        deleted_at = backend.timestamp(parse_timestamp(deleted_at))
+    except ValueError:
+        return None
+    return ((rows_at, rows_id), (deleted_at, deleted_id)), generation
+
+
+def generation(cur, table):
+    """The current sync generation of table; 0 until it is first reset."""
+    cur.execute(GENERATION_SQL, (table,))
+    row = cur.fetchone()
+    return row['generation'] if row else 0
+
+
+def reset(backend, cur, table):
+    """Start a new sync generation for table, in cur's transaction.
+
+    Call it once the table's rows have been replaced wholesale. Every
+    outstanding token for the table is refused from then on, and the table's
+    tombstones, which no valid token can reach, are deleted.
+    """
+    cur.execute(backend.upsert_add_sql(GENERATIONS_TABLE, 'table_name', ('generation',)), (table, 1))
+    cur.execute(TOMBSTONES.clear_sql, (table,))
+
+
+def expired(since, horizon, retention):
+    """Whether deletes since this token may already have been pruned."""
+    deleted_at = parse_timestamp(since[1][0])
+    return parse_timestamp(horizon) - deleted_at > datetime.timedelta(seconds=retention)
+
+
+def page_end(backend, items, limit, timestamp_key, id_key, after, horizon):
+    """Trim items to limit and return the position after the page.
+
+    A full page ends at its last item. Otherwise everything up to the
+    horizon has been read, and the position moves there.
+    """
+    if len(items) > limit:
+        del items[limit:]
+        last = items[-1]
+        return backend.timestamp(last[timestamp_key]), last[id_key]
+    if after is None or after[0] < horizon:
+        return horizon, None
+    return after
+
+
+class Tombstones:
+    """Ids of deleted rows, kept for the changes feed."""
+
+    def __init__(self, table):
+        self.table = table
+        self.insert_sql = f"INSERT INTO {table} (table_name, row_id) VALUES (%s, %s)"
+        read = (f"SELECT id, row_id, deleted_at FROM {table} WHERE table_name = %s AND {{}}"
+                f"deleted_at <= %s ORDER BY deleted_at, id LIMIT %s")
+        self.read_sql = {
+            False: read.format("deleted_at > %s AND "),
+            True: read.format("(deleted_at > %s OR (deleted_at = %s AND id > %s)) AND "),
+        }
+        self.prune_sql = f"DELETE FROM {table} WHERE deleted_at < %s"
+        self.clear_sql = f"DELETE FROM {table} WHERE table_name = %s"
+        self.pruned_at = 0.0
+        self._prune_lock = threading.Lock()
+
+    def statement(self, table, ids):
+        """The (sql, rows) insert marking ids of table deleted, or None for no ids.
+
+        Shared by main.py's record() and async_app's transactions.
+        """
+        if not ids:
+            return None
+        return self.insert_sql, [(table, row_id) for row_id in ids]
+
+    def record(self, cur, table, ids):
+        """Mark ids of table deleted, in cur's transaction."""
+        statement = self.statement(table, ids)
+        if statement is not None:
+            cur.executemany(*statement)
+
+    def read(self, cur, table, after, horizon, limit):
+        timestamp, last_id = after
+        if last_id is None:
+            cur.execute(self.read_sql[False], (table, timestamp, horizon, limit))
+        else:
+            cur.execute(self.read_sql[True], (table, timestamp, timestamp, last_id, horizon, limit))
+        return list(cur.fetchall())
+
+    def prune(self, backend, conn, before):
+        """Delete tombstones older than the timestamp before, and commit."""
+        cur = conn.cursor()
+        try:
+            backend.begin_write(conn)
+            cur.execute(self.prune_sql, (before,))
+            conn.commit()
+        except backend.Error:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+        self.pruned_at = time.monotonic()
+
+    def prune_if_stale(self, backend, conn, horizon, retention):
+        """Prune tombstones past retention seconds, at most once per PRUNE_INTERVAL in this process."""
+        if self.pruned_at and time.monotonic() - self.pruned_at < PRUNE_INTERVAL:
+            return False
+        with self._prune_lock:
+            if self.pruned_at and time.monotonic() - self.pruned_at < PRUNE_INTERVAL:
+                return False
+            before = parse_timestamp(horizon) - datetime.timedelta(seconds=retention)
+            self.prune(backend, conn, backend.timestamp(before))
+            return True
+
+
+TOMBSTONES = Tombstones('tombstones')
+
+
+def read(backend, cur, res, since, horizon, limit, fields=None):
+    """One page of changes to res after since, up to horizon.
+
+    since is a decoded token, or None for a first sync that starts with every
+    row and no deletes. Returns (rows, deleted ids, next since, more), more
+    being True if either side filled its page.
+    """
+    rows_after, deleted_after = since if since is not None else (None, (horizon, None))
+    query, args = res.changes_query(rows_after, horizon, limit + 1)
+    cur.execute(res.project(query, fields), args)
+    rows = list(cur.fetchall())
+    tombstones = TOMBSTONES.read(cur, res.table, deleted_after, horizon, limit + 1)
+    more = len(rows) > limit or len(tombstones) > limit
+    rows_after = page_end(backend, rows, limit, 'updated_at', res.pk, rows_after, horizon)
+    deleted_after = page_end(backend, tombstones, limit, 'deleted_at', 'id', deleted_after, horizon)
+    return rows, [row['row_id'] for row in tombstones], (rows_after, deleted_after), more
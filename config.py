@@ -1,4 +1,5 @@
 # config.py
+import datetime
 import os
 from dotenv import load_dotenv
 
@@ -10,6 +11,39 @@ class Config:
     MYSQL_USER = os.getenv('MYSQL_USER', 'root')
     MYSQL_PASSWORD = os.getenv('MYSQL_PASSWORD', 'estares223')
     MYSQL_DB = os.getenv('MYSQL_DB', 'sari-sari_store')
-    MYSQL_CURSORCLASS = 'DictCursor'
+    MYSQL_PORT = int(os.getenv('MYSQL_PORT', '3306'))
+    DB_BACKEND = os.getenv('DB_BACKEND', 'mysql')
+    SQLITE_PATH = os.getenv('SQLITE_PATH', 'sari-sari_store.db')
+    MYSQL_POOL_MIN = int(os.getenv('MYSQL_POOL_MIN', '2'))
+    MYSQL_POOL_MAX = int(os.getenv('MYSQL_POOL_MAX', '20'))
+    MYSQL_POOL_TIMEOUT = float(os.getenv('MYSQL_POOL_TIMEOUT', '10'))
+    MYSQL_POOL_MAX_LIFETIME = float(os.getenv('MYSQL_POOL_MAX_LIFETIME', '1800'))
+    MYSQL_POOL_PING_INTERVAL = float(os.getenv('MYSQL_POOL_PING_INTERVAL', '30'))
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'dev-secret-key')
-    JSON_SORT_KEYS = False
\ No newline at end of file
+    # flask_jwt_extended's default; async_app issues its tokens with it too.
+    JWT_ACCESS_TOKEN_EXPIRES = datetime.timedelta(seconds=int(os.getenv('JWT_ACCESS_TOKEN_EXPIRES', '900')))
+    JWT_CACHE_SIZE = int(os.getenv('JWT_CACHE_SIZE', '4096'))
+    JWT_CACHE_TTL = int(os.getenv('JWT_CACHE_TTL', '300'))
+    JWT_REVOCATION_CACHE_TTL = int(os.getenv('JWT_REVOCATION_CACHE_TTL', '5'))
+    JSON_SORT_KEYS = False
+    DEFAULT_PAGE_SIZE = int(os.getenv('DEFAULT_PAGE_SIZE', '100'))
+    MAX_PAGE_SIZE = int(os.getenv('MAX_PAGE_SIZE', '1000'))
+    STREAM_CHUNK_SIZE = int(os.getenv('STREAM_CHUNK_SIZE', '500'))
+    EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', '5000'))
+    EXPORT_GZIP_LEVEL = int(os.getenv('EXPORT_GZIP_LEVEL', '6'))
+    RESPONSE_CACHE_SIZE = int(os.getenv('RESPONSE_CACHE_SIZE', '512'))
+    RESPONSE_CACHE_TTL = int(os.getenv('RESPONSE_CACHE_TTL', '10'))
+    RESPONSE_CACHE_MAX_BODY = int(os.getenv('RESPONSE_CACHE_MAX_BODY', str(1024 * 1024)))
+    MAX_BATCH_SIZE = int(os.getenv('MAX_BATCH_SIZE', '5000'))
+    BATCH_INSERT_CHUNK = int(os.getenv('BATCH_INSERT_CHUNK', '500'))
+    MAX_CHECKOUT_LINES = int(os.getenv('MAX_CHECKOUT_LINES', '200'))
+    LOW_STOCK_THRESHOLD = int(os.getenv('LOW_STOCK_THRESHOLD', '10'))
+    CHANGES_LAG_SECONDS = float(os.getenv('CHANGES_LAG_SECONDS', '5'))
+    TOMBSTONE_RETENTION_DAYS = int(os.getenv('TOMBSTONE_RETENTION_DAYS', '30'))
+    EVENTS_HISTORY = int(os.getenv('EVENTS_HISTORY', '1000'))
+    EVENTS_BUFFER = int(os.getenv('EVENTS_BUFFER', '256'))
+    EVENTS_MAX_SUBSCRIBERS = int(os.getenv('EVENTS_MAX_SUBSCRIBERS', '10000'))
+    EVENTS_HEARTBEAT_SECONDS = float(os.getenv('EVENTS_HEARTBEAT_SECONDS', '15'))
+    SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', '200'))
+    SLOW_QUERY_LOG_SIZE = int(os.getenv('SLOW_QUERY_LOG_SIZE', '100'))
+    SLOW_QUERY_REDACT = os.getenv('SLOW_QUERY_REDACT', '0').lower() in ('1', 'true', 'yes')
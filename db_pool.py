@@ -0,0 +1,165 @@
+"""Thread-safe database connection pool.
+
+Connections are created by a ``connect`` callable, kept idle in a LIFO stack
+so the warmest connection is reused first, and handed out one per request.
+Checkout pings connections that sat idle for longer than ``ping_interval``
+and replaces those older than ``max_lifetime``; waits for a free connection
+are timed and exposed through ``stats()``.
+"""
+import os
+import threading
+import time
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection becomes free within the checkout timeout."""
+
+
+class PooledConnection:
+    """A raw connection plus the bookkeeping the pool needs."""
+
+    __slots__ = ('conn', 'created_at', 'last_used')
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.created_at = self.last_used = time.monotonic()
+
+
+class ConnectionPool:
+    """Bounded pool of connections shared by all request threads."""
+
+    def __init__(self, connect, min_size=1, max_size=10, timeout=10.0,
+                 max_lifetime=1800.0, ping_interval=30.0):
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.ping_interval = ping_interval
+        self._cond = threading.Condition()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._idle = []
+        self._size = 0
+        self._filled = False
+        self.checkouts = 0
+        self.created = 0
+        self.discarded = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def _open(self):
+        entry = PooledConnection(self._connect())
+        with self._cond:
+            self.created += 1
+        return entry
+
+    def _close(self, entry):
+        with self._cond:
+            self.discarded += 1
+        try:
+            entry.conn.close()
+        except Exception:
+            pass
+
+    def _fill(self):
+        """Open min_size connections the first time the pool is used."""
+        self._filled = True
+        while self._size < self.min_size:
+            self._idle.append(self._open())
+            self._size += 1
+
+    def _healthy(self, entry, now):
+        if now - entry.created_at > self.max_lifetime:
+            return False
+        if now - entry.last_used > self.ping_interval:
+            try:
+                entry.conn.ping()
+            except Exception:
+                return False
+        return True
+
+    def acquire(self):
+        """Check out a healthy connection, waiting up to timeout seconds."""
+        start = time.monotonic()
+        with self._cond:
+            if self._pid != os.getpid():
+                # Forked worker: the parent's sockets must not be shared.
+                self._reset()
+            if not self._filled:
+                self._fill()
+            while True:
+                if self._idle:
+                    entry = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    entry = None
+                    break
+                remaining = self.timeout - (time.monotonic() - start)
+                if remaining <= 0:
+                    self.timeouts += 1
+                    self.wait_total += self.timeout
+                    self.wait_max = max(self.wait_max, self.timeout)
+                    raise PoolTimeout(f"no connection free after {self.timeout}s")
+                self._cond.wait(remaining)
+            waited = time.monotonic() - start
+            self.checkouts += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+
+        now = time.monotonic()
+        if entry is not None and not self._healthy(entry, now):
+            self._close(entry)
+            entry = None
+        if entry is None:
+            try:
+                entry = self._open()
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                raise
+        return entry
+
+    def release(self, entry, discard=False):
+        """Return a connection, rolling back anything left uncommitted."""
+        if not discard:
+            try:
+                entry.conn.rollback()
+            except Exception:
+                discard = True
+        with self._cond:
+            if discard or time.monotonic() - entry.created_at > self.max_lifetime:
+                self._close(entry)
+                self._size -= 1
+            else:
+                entry.last_used = time.monotonic()
+                self._idle.append(entry)
+            self._cond.notify()
+
+    def stats(self):
+        """Return pool size, usage and checkout wait-time counters."""
+        with self._cond:
+            return {
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._size - len(self._idle),
+                'max_size': self.max_size,
+                'checkouts': self.checkouts,
+                'created': self.created,
+                'discarded': self.discarded,
+                'timeouts': self.timeouts,
+                'wait_seconds_total': self.wait_total,
+                'wait_seconds_max': self.wait_max,
+            }
+
+    def close(self):
+        """Close every idle connection."""
+        with self._cond:
+            while self._idle:
+                self._close(self._idle.pop())
+                self._size -= 1
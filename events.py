@@ -0,0 +1,235 @@
+"""Server-sent events for committed writes.
+
+Write handlers call ``EventBus.publish`` after they commit. Each event is
+serialized to its SSE frame once and appended to the buffers of the
+subscribers of its resource only. Waiting subscribers are woken through a
+callback, so an idle subscriber is a small object and a blocked thread or
+task, not a poll loop. Under async_app, or main.py on gevent workers, that is
+cheap enough for thousands of open streams per process.
+
+Every buffer is bounded. A subscriber that falls a full buffer behind is
+dropped: it receives what was buffered, a ``dropped`` event, and the stream
+ends. The last ``history`` events are kept for ``Last-Event-ID`` resume.
+Event ids carry a per-process epoch, so after a restart, or when the
+requested id has left the history, the client gets a ``reset`` event and
+should catch up through GET /api/<resource>/changes.
+
+Events are per process and nothing is shared between processes: a
+subscriber sees only the writes made by the process it is connected to.
+Behind several workers or hosts, every stream misses the writes the others
+handle, so either run a single process or treat events as hints and catch up
+through /changes. async_app has a bus of its own and no batch or checkout
+routes, so its subscribers never see ``stock`` events.
+"""
+import asyncio
+import collections
+import json
+import threading
+import uuid
+
+RETRY_MS = 3000
+KEEP_ALIVE = ': keep-alive\n\n'
+DROPPED = 'event: dropped\ndata: {}\n\n'
+
+
+def frame(event_id, kind, payload):
+    return f'id: {event_id}\nevent: {kind}\ndata: {payload}\n\n'
+
+
+def parse_resources(raw, known):
+    """Read ?resources=a,b against the known names; returns (names, error)."""
+    if not raw:
+        return list(known), None
+    names = [name.strip() for name in raw.split(',') if name.strip()]
+    unknown = [name for name in names if name not in known]
+    if unknown:
+        return None, f"unknown resources: {', '.join(unknown)}"
+    if not names:
+        return None, "no resources"
+    return names, None
+
+
+class Full(Exception):
+    """Raised by subscribe when the bus already has max_subscribers."""
+
+
+class Subscriber:
+    __slots__ = ('resources', 'pending', 'dropped', 'active', 'wake')
+
+    def __init__(self, resources, wake):
+        self.resources = resources
+        self.pending = []
+        self.dropped = False
+        self.active = True
+        self.wake = wake
+
+
+class EventBus:
+    """Fan-out of committed writes to per-resource SSE subscribers."""
+
+    def __init__(self, history=1000, buffer_size=256, max_subscribers=10000):
+        self.epoch = uuid.uuid4().hex[:8]
+        self.buffer_size = buffer_size
+        self.max_subscribers = max_subscribers
+        self._seq = 0
+        self._history = collections.deque(maxlen=history)
+        self._by_resource = collections.defaultdict(set)
+        self._count = 0
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def publish(self, resource, kind, data):
+        """Send a kind event for resource with data (a dict) to its subscribers."""
+        payload = json.dumps({'resource': resource, **data}, default=str, separators=(',', ':'))
+        woken = []
+        with self._lock:
+            self._seq += 1
+            text = frame(f'{self.epoch}-{self._seq}', kind, payload)
+            self._history.append((self._seq, resource, text))
+            subscribers = self._by_resource.get(resource)
+            if not subscribers:
+                return
+            for sub in list(subscribers):
+                if len(sub.pending) >= self.buffer_size:
+                    sub.dropped = True
+                    self._remove(sub)
+                    self.dropped += 1
+                else:
+                    sub.pending.append(text)
+                woken.append(sub)
+        for sub in woken:
+            sub.wake()
+
+    def subscribe(self, resources, last_event_id, wake):
+        """Register a subscriber to resources; returns (subscriber, frames to replay first).
+
+        Replay and registration happen under one lock, so no event falls
+        between them. Raises Full at max_subscribers.
+        """
+        resources = frozenset(resources)
+        with self._lock:
+            if self._count >= self.max_subscribers:
+                raise Full()
+            replay = self._replay(resources, last_event_id)
+            sub = Subscriber(resources, wake)
+            for resource in resources:
+                self._by_resource[resource].add(sub)
+            self._count += 1
+        return sub, replay
+
+    def _replay(self, resources, last_event_id):
+        if not last_event_id:
+            return []
+        epoch, _, seq = last_event_id.partition('-')
+        try:
+            seq = int(seq)
+        except ValueError:
+            seq = None
+        oldest = self._history[0][0] if self._history else self._seq + 1
+        if epoch != self.epoch or seq is None or seq > self._seq or seq < oldest - 1:
+            return [frame(f'{self.epoch}-{self._seq}', 'reset', '{}')]
+        return [text for event_seq, resource, text in self._history
+                if event_seq > seq and resource in resources]
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            self._remove(sub)
+
+    def _remove(self, sub):
+        if not sub.active:
+            return
+        sub.active = False
+        for resource in sub.resources:
+            subscribers = self._by_resource.get(resource)
+            if subscribers is not None:
+                subscribers.discard(sub)
+                if not subscribers:
+                    del self._by_resource[resource]
+        self._count -= 1
+
+    def take(self, sub):
+        """Pop the frames buffered for sub."""
+        with self._lock:
+            pending, sub.pending = sub.pending, []
+        return pending
+
+    def stats(self):
+        with self._lock:
+            return {'subscribers': self._count, 'published': self._seq, 'dropped': self.dropped}
+
+
+class Stream:
+    """SSE text for one subscriber, from a threaded server.
+
+    Closing it unsubscribes, even if the server never started iterating.
+    """
+
+    def __init__(self, bus, resources, last_event_id, heartbeat):
+        self.bus = bus
+        self.ready = threading.Event()
+        self.sub, replay = bus.subscribe(resources, last_event_id, self.ready.set)
+        self._frames = self._generate(replay, heartbeat)
+
+    def _generate(self, replay, heartbeat):
+        bus, sub, ready = self.bus, self.sub, self.ready
+        yield f'retry: {RETRY_MS}\n\n' + ''.join(replay)
+        while True:
+            # Cleared before take(), so a publish in between still wakes wait().
+            ready.clear()
+            frames = bus.take(sub)
+            if frames:
+                yield ''.join(frames)
+            elif sub.dropped:
+                yield DROPPED
+                return
+            elif not ready.wait(heartbeat):
+                yield KEEP_ALIVE
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._frames)
+
+    def close(self):
+        self._frames.close()
+        self.bus.unsubscribe(self.sub)
+
+
+class AsyncStream:
+    """SSE text for one subscriber, from an asyncio server; aclose() unsubscribes."""
+
+    def __init__(self, bus, resources, last_event_id, heartbeat):
+        loop = asyncio.get_running_loop()
+        self.bus = bus
+        self.ready = asyncio.Event()
+        self.sub, replay = bus.subscribe(resources, last_event_id,
+                                         lambda: loop.call_soon_threadsafe(self.ready.set))
+        self._frames = self._generate(replay, heartbeat)
+
+    async def _generate(self, replay, heartbeat):
+        bus, sub, ready = self.bus, self.sub, self.ready
+        yield f'retry: {RETRY_MS}\n\n' + ''.join(replay)
+        while True:
+            ready.clear()
+            frames = bus.take(sub)
+            if frames:
+                yield ''.join(frames)
+            elif sub.dropped:
+                yield DROPPED
+                return
+            else:
+                try:
+                    await asyncio.wait_for(ready.wait(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield KEEP_ALIVE
+
+    def __aiter__(self):
+        return self
+
+    def __anext__(self):
+        return self._frames.__anext__()
+
+    async def aclose(self):
+        await self._frames.aclose()
+        self.bus.unsubscribe(self.sub)
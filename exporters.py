@@ -0,0 +1,128 @@
+"""Incremental encoders for GET /api/<resource>/export.
+
+Each encoder takes the column names and an iterator of row chunks (lists of
+tuples in column order) and yields text one chunk at a time, so an export
+holds a single chunk in memory however large the table is. Values JSON and
+CSV can't hold natively (Decimal, dates) are written as their str(), the
+same text the rest of the API uses.
+
+The columnar format is newline-delimited JSON laid out column-wise:
+
+    {"format": "columnar-v1", "columns": [...]}
+    {"rows": n, "columns": [<column chunk>, ...]}      one per row group
+    {"row_groups": k, "rows": total}
+
+A column chunk is ``{"values": [...]}``, or ``{"dictionary": [...],
+"indices": [...]}`` for string columns with few distinct values, plus
+``nulls`` and, where the values compare, ``min`` and ``max``, so a reader
+can skip row groups without decoding them. read_columnar turns it back into
+rows.
+"""
+import collections
+import csv
+import io
+import json
+import zlib
+
+FORMAT_VERSION = 'columnar-v1'
+
+Format = collections.namedtuple('Format', 'encode mimetype extension')
+
+_dumps = json.JSONEncoder(default=str, ensure_ascii=False, separators=(',', ':')).encode
+
+
+def csv_chunks(columns, chunks):
+    """A header line, then each chunk of rows as CSV; NULL is an empty field."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    writer.writerow(columns)
+    for rows in chunks:
+        writer.writerows(rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def ndjson_chunks(columns, chunks):
+    """One JSON object per row."""
+    for rows in chunks:
+        yield ''.join(_dumps(dict(zip(columns, row))) + '\n' for row in rows)
+
+
+def column_chunk(values):
+    """Encode one column of a row group, with its null count and min/max."""
+    present = [value for value in values if value is not None]
+    chunk = {}
+    if present and all(isinstance(value, str) for value in present):
+        index = {}
+        for value in present:
+            index.setdefault(value, len(index))
+        if len(index) <= len(values) // 2:
+            chunk['dictionary'] = list(index)
+            chunk['indices'] = [None if value is None else index[value] for value in values]
+    if 'dictionary' not in chunk:
+        chunk['values'] = list(values)
+    chunk['nulls'] = len(values) - len(present)
+    if present:
+        try:
+            chunk['min'], chunk['max'] = min(present), max(present)
+        except TypeError:
+            # SQLite lets one column hold mixed types; leave stats out.
+            pass
+    return chunk
+
+
+def columnar_chunks(columns, chunks):
+    """The columnar format, one row group per chunk."""
+    yield _dumps({'format': FORMAT_VERSION, 'columns': list(columns)}) + '\n'
+    groups = total = 0
+    for rows in chunks:
+        if not rows:
+            continue
+        yield _dumps({'rows': len(rows),
+                      'columns': [column_chunk(values) for values in zip(*rows)]}) + '\n'
+        groups += 1
+        total += len(rows)
+    yield _dumps({'row_groups': groups, 'rows': total}) + '\n'
+
+
+def read_columnar(lines):
+    """Yield the rows of a columnar export as dicts; lines is an iterable of its lines."""
+    lines = iter(lines)
+    header = json.loads(next(lines))
+    if header.get('format') != FORMAT_VERSION:
+        raise ValueError(f"not a {FORMAT_VERSION} export")
+    columns = header['columns']
+    for line in lines:
+        group = json.loads(line)
+        if 'row_groups' in group:
+            return
+        decoded = []
+        for chunk in group['columns']:
+            if 'dictionary' in chunk:
+                dictionary = chunk['dictionary']
+                decoded.append([None if i is None else dictionary[i] for i in chunk['indices']])
+            else:
+                decoded.append(chunk['values'])
+        for values in zip(*decoded):
+            yield dict(zip(columns, values))
+    raise ValueError("export is truncated")
+
+
+def gzip_chunks(chunks, level=6):
+    """Compress text chunks into a gzip stream as they come."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for text in chunks:
+        data = compressor.compress(text.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+FORMATS = {
+    'csv': Format(csv_chunks, 'text/csv', 'csv'),
+    'ndjson': Format(ndjson_chunks, 'application/x-ndjson', 'ndjson'),
+    'columnar': Format(columnar_chunks, 'application/x-ndjson', 'columnar.ndjson'),
+}
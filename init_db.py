@@ -1,44 +1,95 @@
 #!/usr/bin/env python
-import mysql.connector
+"""Create the database from setup_db.sql.
+
+The script is read line by line and split into statements on semicolons
+outside quotes and comments, so a ';' inside a string literal stays put and
+the file is never held in memory whole. The first statement that fails stops
+the run with its error. With DB_BACKEND=sqlite the SQLite schema is created
+from setup_sqlite.sql instead. Load larger data sets with bulk_import.py.
+"""
+import sys
+
 from config import Config
+import storage
+
+
+def iter_statements(lines):
+    """Yield the SQL statements in lines, without their trailing semicolons."""
+    statement = []
+    quote = None
+    block_comment = False
+    for line in lines:
+        i = 0
+        start = 0
+        while i < len(line):
+            char = line[i]
+            if block_comment:
+                if line.startswith('*/', i):
+                    block_comment = False
+                    i += 1
+            elif quote:
+                if char == '\\' and quote != '`':
+                    i += 1
+                elif char == quote:
+                    quote = None
+            elif char in '\'"`':
+                quote = char
+            elif line.startswith('/*', i):
+                block_comment = True
+                i += 1
+            elif line.startswith('-- ', i) or line.startswith('--\n', i) or char == '#':
+                statement.append(line[start:i] + '\n')
+                start = len(line)
+                break
+            elif char == ';':
+                statement.append(line[start:i])
+                text = ''.join(statement).strip()
+                if text:
+                    yield text
+                statement = []
+                start = i + 1
+            i += 1
+        statement.append(line[start:])
+    text = ''.join(statement).strip()
+    if text:
+        yield text
+
 
-try:
-    conn = mysql.connector.connect(
-        host=Config.MYSQL_HOST,
-        user=Config.MYSQL_USER,
-        password=Config.MYSQL_PASSWORD,
-        port=3306
-    )
+def main():
+    if Config.DB_BACKEND == 'sqlite':
+        storage.create_backend(Config)
+        print(f'✓ SQLite database ready at {Config.SQLITE_PATH}')
+        return 0
+
+    import MySQLdb
+
+    conn = MySQLdb.connect(host=Config.MYSQL_HOST, user=Config.MYSQL_USER, password=Config.MYSQL_PASSWORD,
+                           port=Config.MYSQL_PORT, charset='utf8mb4')
     cursor = conn.cursor()
-    
-    # Read SQL file
-    with open('setup_db.sql', 'r') as f:
-        sql_script = f.read()
-    
-    # Execute each statement
-    for statement in sql_script.split(';'):
-        statement = statement.strip()
-        if statement:
-            try:
-                cursor.execute(statement)
-            except mysql.connector.Error as err:
-                if err.errno == 1064:  # Syntax error
-                    continue
-                raise
-    
-    conn.commit()
-    print('✓ Database setup complete!')
-    
-    # Verify tables
-    cursor.execute('USE `sari-sari_store`')
-    cursor.execute('SHOW TABLES')
-    tables = cursor.fetchall()
-    print(f'✓ Tables: {", ".join(t[0] for t in tables)}')
-    
-    cursor.close()
-    conn.close()
-    
-except Exception as e:
-    print(f'✗ Error: {e}')
-    import traceback
-    traceback.print_exc()
+    try:
+        with open('setup_db.sql', encoding='utf-8') as f:
+            for number, statement in enumerate(iter_statements(f), 1):
+                try:
+                    # No args, so '%' in the script is never taken for a placeholder.
+                    cursor.execute(statement)
+                    cursor.fetchall()
+                except MySQLdb.MySQLError as err:
+                    print(f'✗ Statement {number} failed: {err}\n{statement.splitlines()[0]}')
+                    conn.rollback()
+                    return 1
+        conn.commit()
+        print('✓ Database setup complete!')
+
+        # Verify tables
+        cursor.execute('USE `sari-sari_store`')
+        cursor.execute('SHOW TABLES')
+        tables = cursor.fetchall()
+        print(f'✓ Tables: {", ".join(t[0] for t in tables)}')
+    finally:
+        cursor.close()
+        conn.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
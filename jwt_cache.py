@@ -0,0 +1,173 @@
+"""JWTManager that caches verified token claims, with a revocation blocklist.
+
+A terminal sends the same bearer token with every request, and
+flask_jwt_extended base64-decodes, parses and HMAC-verifies it each time.
+CachingJWTManager remembers the claims of tokens that passed full
+verification in a bounded LRU. Entries are keyed by an HMAC-SHA256 of the
+token under the current decode key, so raw tokens are never held in memory
+and changing JWT_SECRET_KEY makes every entry unreachable. An entry lives
+until the token's exp or the cache TTL, whichever comes first; expired tokens
+go through the normal decode path and get its errors.
+
+Revoked tokens are stored by jti in the revoked_tokens table until they
+expire, so a logout holds across processes and restarts. flask_jwt_extended's
+blocklist check still runs on every request, cached or not; it asks a small
+RevocationCache first and the table only when that has no answer. Answers
+that a token is *not* revoked are kept for a few seconds (the cache's ttl),
+so another process's revocation takes effect within that time; this
+process's own revocations take effect at once.
+"""
+import hashlib
+import hmac
+import threading
+import time
+from collections import OrderedDict
+
+from flask_jwt_extended import JWTManager
+from flask_jwt_extended.config import config
+
+
+REVOKE_SQL = "INSERT INTO revoked_tokens (jti, expires_at) VALUES (%s, %s)"
+REVOKED_SQL = "SELECT 1 FROM revoked_tokens WHERE jti = %s"
+PURGE_REVOKED_SQL = "DELETE FROM revoked_tokens WHERE expires_at < %s"
+COUNT_REVOKED_SQL = "SELECT COUNT(*) AS n FROM revoked_tokens WHERE expires_at IS NULL OR expires_at >= %s"
+
+
+class RevocationCache:
+    """Bounded LRU of recent answers to "is this jti revoked?".
+
+    Revoked answers are kept until the token's exp, since a revocation is
+    never undone; others for ttl seconds. Shared by main.py's manager and
+    async_app.
+    """
+
+    def __init__(self, max_entries=4096, ttl=5):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, jti):
+        """True or False if the answer for jti is still fresh, else None."""
+        with self._lock:
+            entry = self._entries.get(jti)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                del self._entries[jti]
+                return None
+            self._entries.move_to_end(jti)
+            return entry[1]
+
+    def put(self, jti, revoked, exp=None):
+        until = time.time() + self.ttl
+        if revoked:
+            until = float('inf') if exp is None else exp
+        with self._lock:
+            self._entries[jti] = (until, revoked)
+            self._entries.move_to_end(jti)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class CachingJWTManager(JWTManager):
+    """flask_jwt_extended.JWTManager with a verified-claims cache and a revoked_tokens blocklist.
+
+    connect returns the database connection to read and record revocations
+    on (main.py passes get_db); without one there is no blocklist.
+    """
+
+    def __init__(self, app=None, max_entries=4096, ttl=300, add_context_processor=False,
+                 connect=None, revocation_ttl=5):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.connect = connect
+        self._entries = OrderedDict()
+        self.revocations = RevocationCache(max_entries, revocation_ttl)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        super().__init__(app, add_context_processor)
+        if connect is not None:
+            self.token_in_blocklist_loader(self._in_blocklist)
+
+    def _digest(self, encoded_token):
+        key = config.decode_key
+        if isinstance(key, str):
+            key = key.encode()
+        elif not isinstance(key, bytes):
+            key = str(key).encode()
+        token = encoded_token.encode() if isinstance(encoded_token, str) else encoded_token
+        return hmac.new(key, token, hashlib.sha256).digest()
+
+    def _decode_jwt_from_config(self, encoded_token, csrf_value=None, allow_expired=False):
+        if self.max_entries <= 0 or csrf_value is not None or allow_expired:
+            return super()._decode_jwt_from_config(encoded_token, csrf_value, allow_expired)
+        digest = self._digest(encoded_token)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(digest)
+                    self.hits += 1
+                    return dict(entry[1])
+                del self._entries[digest]
+            self.misses += 1
+        claims = super()._decode_jwt_from_config(encoded_token, csrf_value, allow_expired)
+        expires = now + self.ttl
+        if 'exp' in claims:
+            expires = min(expires, claims['exp'])
+        with self._lock:
+            if self.revocations.get(claims.get('jti')) is not True:
+                self._entries[digest] = (expires, dict(claims))
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return claims
+
+    def revoke(self, claims):
+        """Record the token with these claims in revoked_tokens and drop it from the cache.
+
+        Expired revocations are purged in the same transaction.
+        """
+        jti = claims['jti']
+        exp = claims.get('exp')
+        conn = self.connect()
+        cur = conn.cursor()
+        try:
+            cur.execute(PURGE_REVOKED_SQL, (int(time.time()),))
+            cur.execute(REVOKE_SQL, (jti, exp))
+            conn.commit()
+        finally:
+            cur.close()
+        self.revocations.put(jti, True, exp)
+        with self._lock:
+            for digest, (_, cached) in list(self._entries.items()):
+                if cached.get('jti') == jti:
+                    del self._entries[digest]
+
+    def _in_blocklist(self, jwt_header, jwt_data):
+        jti = jwt_data.get('jti')
+        revoked = self.revocations.get(jti)
+        if revoked is None:
+            cur = self.connect().cursor()
+            try:
+                cur.execute(REVOKED_SQL, (jti,))
+                revoked = cur.fetchone() is not None
+            finally:
+                cur.close()
+            self.revocations.put(jti, revoked, jwt_data.get('exp'))
+        return revoked
+
+    def revoked_count(self):
+        """Revoked tokens that have not expired yet, from revoked_tokens."""
+        cur = self.connect().cursor()
+        try:
+            cur.execute(COUNT_REVOKED_SQL, (int(time.time()),))
+            return cur.fetchone()['n']
+        finally:
+            cur.close()
+
+    def stats(self):
+        with self._lock:
+            return {'size': len(self._entries), 'hits': self.hits, 'misses': self.misses}
@@ -1,20 +1,104 @@
-from flask import Flask, request, jsonify, make_response
-from flask_mysqldb import MySQL
-from dicttoxml import dicttoxml
+from flask import Flask, Response, current_app, g, has_request_context, request, jsonify, make_response, stream_with_context
 from flask_jwt_extended import (
-    JWTManager, create_access_token, jwt_required, get_jwt_identity
+    create_access_token, verify_jwt_in_request, get_jwt, get_jwt_identity
 )
-import re
+import functools
 from config import Config
+from db_pool import ConnectionPool
+from jwt_cache import CachingJWTManager
+import storage
+from response_cache import ResponseCache
+import xml_encoder
+import metrics
+from metrics import perf_counter
+import slow_log
+from paging import parse_limit, parse_page_args
+from resources import RESOURCES, RESOURCES_BY_NAME
+from validators import COUNT_MAX, IdConverter, validate_int
+import analytics
+from analytics import SUMMARIES
+import changes
+from changes import TOMBSTONES
+import events
+import exporters
 
 app = Flask(__name__)
 app.config.from_object(Config)
+app.url_map.converters['int'] = IdConverter
+
+backend = storage.create_backend(Config)
+pool = ConnectionPool(
+    backend.connect,
+    min_size=Config.MYSQL_POOL_MIN,
+    max_size=Config.MYSQL_POOL_MAX,
+    timeout=Config.MYSQL_POOL_TIMEOUT,
+    max_lifetime=Config.MYSQL_POOL_MAX_LIFETIME,
+    ping_interval=Config.MYSQL_POOL_PING_INTERVAL,
+)
+
+
+def get_db():
+    """Return this request's connection, checking one out of the pool on first use."""
+    if 'db' not in g:
+        g.db = pool.acquire()
+    return g.db.conn
+
 
-mysql = MySQL(app)
-jwt = JWTManager(app)
+jwt = CachingJWTManager(app, max_entries=Config.JWT_CACHE_SIZE, ttl=Config.JWT_CACHE_TTL,
+                        connect=get_db, revocation_ttl=Config.JWT_REVOCATION_CACHE_TTL)
 
 DEMO_USER = {"username": "admin", "password": "admin"}
-    
+
+fulltext_missing = set()
+response_cache = ResponseCache(Config.RESPONSE_CACHE_SIZE, Config.RESPONSE_CACHE_TTL,
+                               Config.RESPONSE_CACHE_MAX_BODY)
+request_metrics = metrics.Registry()
+event_bus = events.EventBus(Config.EVENTS_HISTORY, Config.EVENTS_BUFFER, Config.EVENTS_MAX_SUBSCRIBERS)
+
+
+def slow_query_context():
+    """The request behind a slow query; without its query string when parameters are redacted."""
+    if not has_request_context():
+        return None
+    path = request.path if slow_queries.redact else request.full_path.rstrip('?')
+    return f"{request.method} {path}"
+
+slow_queries = slow_log.SlowQueryLog(
+    Config.SLOW_QUERY_MS / 1000,
+    Config.SLOW_QUERY_LOG_SIZE,
+    slow_log.Explainer(backend.connect, backend.explain_prefix),
+    redact=Config.SLOW_QUERY_REDACT,
+    context=slow_query_context,
+)
+if Config.SLOW_QUERY_LOG_SIZE > 0:
+    backend.statement_hook = slow_queries.observe
+
+
+@app.before_request
+def start_metrics():
+    request_metrics.start()
+
+@app.after_request
+def record_metrics(response):
+    """Count the request under its route pattern; unmatched URLs share one label."""
+    rule = request.url_rule
+    request_metrics.finish(rule.rule if rule is not None else 'unmatched', request.method,
+                           response.status_code)
+    return response
+
+def jwt_required(optional=False):
+    """flask_jwt_extended's jwt_required, timing token verification as its own phase."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = perf_counter()
+            try:
+                verify_jwt_in_request(optional=optional)
+            finally:
+                request_metrics.add(metrics.JWT, perf_counter() - start)
+            return current_app.ensure_sync(fn)(*args, **kwargs)
+        return wrapper
+    return decorator
 
 
 @app.route("/login", methods=["POST"])
@@ -27,133 +111,206 @@ def login():
         return jsonify(access_token=access_token), 200
     return jsonify({"msg": "wrong credentials"}), 401
 
+@app.route("/logout", methods=["POST"])
+@jwt_required()
+def logout():
+    """Revoke the bearer token; it is rejected from the next request on."""
+    jwt.revoke(get_jwt())
+    return jsonify({"msg": "logged out"}), 200
 
 
 def to_format(data, fmt):
     """Convert response to specified format (JSON or XML)."""
+    start = perf_counter()
     if fmt and fmt.lower() == 'xml':
-        xml = dicttoxml(data, custom_root='response', attr_type=False)
+        xml = xml_encoder.dumps(data)
         response = make_response(xml)
         response.headers['Content-Type'] = 'application/xml'
-        return response
     else:
         response = make_response(jsonify(data))
         response.headers['Content-Type'] = 'application/json'
-        return response
+    request_metrics.add(metrics.SERIALIZE, perf_counter() - start)
+    return response
 
-def validate_int(val):
-    """Validate if value can be converted to integer."""
-    try:
-        return int(val)
-    except:
-        return None
+@app.teardown_appcontext
+def release_db(exc):
+    """Give the request's connection back to the pool.
+
+    Connections that saw a server or network error are discarded rather than
+    reused.
+    """
+    entry = g.pop('db', None)
+    if entry is not None:
+        pool.release(entry, discard=isinstance(exc, backend.OperationalError))
+
+def constraint_message(err):
+    """The human-readable part of an IntegrityError from either backend."""
+    return err.args[1] if len(err.args) > 1 else str(err)
+
+@app.errorhandler(backend.IntegrityError)
+def integrity_error(err):
+    """Report constraint violations (e.g. a duplicate student email) as 409."""
+    return jsonify({"msg": constraint_message(err)}), 409
 
 def fetchone(query, args=()):
     """Execute query and return single row."""
-    cur = mysql.connection.cursor()
+    cur = get_db().cursor()
+    start = perf_counter()
     cur.execute(query, args)
     rv = cur.fetchone()
+    request_metrics.add(metrics.SQL, perf_counter() - start)
     cur.close()
     return rv
 
 def fetchall(query, args=()):
     """Execute query and return all rows."""
-    cur = mysql.connection.cursor()
+    cur = get_db().cursor()
+    start = perf_counter()
     cur.execute(query, args)
     rv = cur.fetchall()
+    request_metrics.add(metrics.SQL, perf_counter() - start)
     cur.close()
     return rv
 
-def validate_product_payload(payload, partial=False):
-    """Validate product data."""
-    errors = []
-    if not partial:
-        if "product_name" not in payload:
-            errors.append("product_name is required")
-        if "category" not in payload:
-            errors.append("category is required")
-        if "unit" not in payload:
-            errors.append("unit is required")
-    if "product_name" in payload and (not isinstance(payload["product_name"], str) or not payload["product_name"].strip()):
-        errors.append("product_name must be a non-empty string")
-    if "category" in payload and (not isinstance(payload["category"], str) or not payload["category"].strip()):
-        errors.append("category must be a non-empty string")
-    if "unit" in payload and (not isinstance(payload["unit"], str) or not payload["unit"].strip()):
-        errors.append("unit must be a non-empty string")
-    if "price" in payload:
+def fetch_page(res, limit, after, fields=None, q=None, filters=(), sort=None):
+    """Fetch one keyset page of rows and the cursor for the next one.
+
+    One extra row is read to decide whether a next_cursor is needed.
+    """
+    query, args = res.list_query(q, after, limit + 1, filters, sort)
+    rows = list(fetchall(res.project(query, fields), args))
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = res.next_cursor(rows[-1], sort)
+    return rows, next_cursor
+
+def search_rows(res, q, limit, fields=None):
+    """Return up to limit rows matching q, most relevant first.
+
+    The backend's search index does the matching: MySQL's FULLTEXT (ngram)
+    index from setup_db.sql, or SQLite's FTS5 trigram table from
+    setup_sqlite.sql. Both match q as a substring and are kept current by
+    the database itself. Queries shorter than the index's grams, and tables
+    whose index is missing, use LIKE.
+    """
+    term = q.strip()
+    if len(term) >= backend.search_min_length and res.table not in fulltext_missing:
+        query, args = backend.search_query(res, term, limit)
         try:
-            float(payload["price"])
-        except (TypeError, ValueError):
-            errors.append("price must be a number")
-    if "quantity" in payload:
-        if validate_int(payload["quantity"]) is None:
-            errors.append("quantity must be an integer")
-    return errors
-
-def validate_supplier_payload(payload, partial=False):
-    """Validate supplier data."""
-    errors = []
-    if not partial:
-        if "supplier_name" not in payload:
-            errors.append("supplier_name is required")
-        if "contact_number" not in payload:
-            errors.append("contact_number is required")
-        if "address" not in payload:
-            errors.append("address is required")
-    if "supplier_name" in payload and (not isinstance(payload["supplier_name"], str) or not payload["supplier_name"].strip()):
-        errors.append("supplier_name must be a non-empty string")
-    if "contact_number" in payload and (not isinstance(payload["contact_number"], str) or not payload["contact_number"].strip()):
-        errors.append("contact_number must be a non-empty string")
-    if "address" in payload and (not isinstance(payload["address"], str) or not payload["address"].strip()):
-        errors.append("address must be a non-empty string")
-    return errors
-
-def validate_icecream_payload(payload, partial=False):
-    """Validate ice cream data."""
-    errors = []
-    if not partial:
-        if "flavor" not in payload:
-            errors.append("flavor is required")
-        if "size" not in payload:
-            errors.append("size is required")
-        if "price" not in payload:
-            errors.append("price is required")
-    if "flavor" in payload and (not isinstance(payload["flavor"], str) or not payload["flavor"].strip()):
-        errors.append("flavor must be a non-empty string")
-    if "size" in payload and (not isinstance(payload["size"], str) or not payload["size"].strip()):
-        errors.append("size must be a non-empty string")
-    if "price" in payload:
-        try:
-            float(payload["price"])
-        except (TypeError, ValueError):
-            errors.append("price must be a number")
-    if "stock" in payload:
-        if validate_int(payload["stock"]) is None:
-            errors.append("stock must be an integer")
-    return errors
-
-def validate_student_payload(payload, partial=False):
-    """Validate student data."""
-    errors = []
-    if not partial:
-        if "student_name" not in payload:
-            errors.append("student_name is required")
-        if "email" not in payload:
-            errors.append("email is required")
-    if "student_name" in payload and (not isinstance(payload["student_name"], str) or not payload["student_name"].strip()):
-        errors.append("student_name must be a non-empty string")
-    if "email" in payload and (not isinstance(payload["email"], str) or not payload["email"].strip()):
-        errors.append("email must be a non-empty string")
-    if "major" in payload and (not isinstance(payload["major"], str) or not payload["major"].strip()):
-        errors.append("major must be a non-empty string")
-    if "gpa" in payload:
-        try:
-            float(payload["gpa"])
-        except (TypeError, ValueError):
-            errors.append("gpa must be a number")
-    return errors
-
-
+            return list(fetchall(res.project(query, res.all_fields if fields is None else fields), args))
+        except backend.Error as err:
+            if not backend.missing_fulltext(err):
+                raise
+            fulltext_missing.add(res.table)
+    return list(fetchall(res.project(res.like_search_sql, fields), (f'%{q}%',) * len(res.search) + (limit,)))
+
+def table_changed(res):
+    """Drop cached reads after a committed write to res's table."""
+    response_cache.bump(res.table)
+
+def announce(res, kind, **data):
+    """Push a committed write to /api/events subscribers of res."""
+    event_bus.publish(res.name, kind, data)
+
+def wants_stream(fmt):
+    """Whether the client asked for a streamed list (?stream=1 or format=ndjson)."""
+    if fmt and fmt.lower() == 'ndjson':
+        return True
+    return request.args.get('stream', '').lower() in ('1', 'true', 'yes')
+
+def stream_rows(query, args=(), size=None, tuples=False):
+    """Yield chunks of rows from the backend's streaming cursor.
+
+    Rows are pulled size (default Config.STREAM_CHUNK_SIZE) at a time, so
+    memory stays flat regardless of how many rows the query returns.
+    tuples=True yields rows as tuples in select-list order.
+    """
+    size = size or Config.STREAM_CHUNK_SIZE
+    cur = backend.stream_cursor(get_db(), tuples)
+    try:
+        cur.execute(query, args)
+        while True:
+            rows = cur.fetchmany(size)
+            if not rows:
+                break
+            yield rows
+    finally:
+        cur.close()
+
+def stream_list(res, q, limit, after, fmt, fields=None, filters=(), sort=None):
+    """Stream a list endpoint as a JSON array, NDJSON or XML.
+
+    Unlike paged reads the default page size does not apply; only an explicit
+    ?limit= bounds the stream. ?cursor=, filters and ?sort= apply as on
+    paged reads, and ?q= filters with LIKE, since a stream reads every match
+    anyway.
+    """
+    if not request.args.get('limit'):
+        limit = None
+    query, args = res.list_query(q, after, limit, filters, sort)
+    chunks = stream_rows(res.project(query, fields), args)
+    key = res.collection
+    fmt = (fmt or 'json').lower()
+    dumps = app.json.dumps
+
+    if fmt == 'ndjson':
+        def generate():
+            for rows in chunks:
+                yield ''.join(dumps(row) + '\n' for row in rows)
+        mimetype = 'application/x-ndjson'
+    elif fmt == 'xml':
+        def generate():
+            yield f'{xml_encoder.XML_DECLARATION}<response><{key}>'
+            for rows in chunks:
+                yield ''.join(map(xml_encoder.encode_item, rows))
+            yield f'</{key}></response>'
+        mimetype = 'application/xml'
+    else:
+        def generate():
+            yield '{' + dumps(key) + ': ['
+            sep = ''
+            for rows in chunks:
+                yield sep + ', '.join(dumps(row) for row in rows)
+                sep = ', '
+            yield ']}'
+        mimetype = 'application/json'
+    return Response(stream_with_context(generate()), mimetype=mimetype)
+
+def lock_existing_ids(cur, res, ids):
+    """Return the subset of ids present in the resource's table, locking those rows."""
+    if not ids:
+        return set()
+    backend.lock_ids(get_db(), cur, res, ids)
+    return {row[res.pk] for row in cur.fetchall()}
+
+def lock_rows(cur, res, ids):
+    """Lock the rows among ids that exist and return them keyed by primary key."""
+    if not ids:
+        return {}
+    backend.lock_rows(get_db(), cur, res, ids)
+    return {row[res.pk]: row for row in cur.fetchall()}
+
+def update_many(cur, res, mask, updates):
+    """Apply (id, values) updates that all set the columns in mask.
+
+    Each chunk of Config.BATCH_INSERT_CHUNK rows becomes a single
+    ``UPDATE ... SET col = CASE pk WHEN .. THEN .. END ... WHERE pk IN (...)``.
+    """
+    width = len(res.columns_for(mask))
+    for start in range(0, len(updates), Config.BATCH_INSERT_CHUNK):
+        chunk = updates[start:start + Config.BATCH_INSERT_CHUNK]
+        args = []
+        for position in range(width):
+            for item_id, values in chunk:
+                args += [item_id, values[position]]
+        args += [item_id for item_id, _ in chunk]
+        cur.execute(res.case_update_sql(mask, len(chunk)), tuple(args))
+
+def batch_mode():
+    """Read ?mode= for batch endpoints; returns None if it is invalid."""
+    mode = request.args.get('mode', 'atomic')
+    return mode if mode in ('atomic', 'best_effort') else None
 
 
 @app.route('/')
@@ -172,376 +329,641 @@ def home():
     })
 
 
-
-@app.route('/api/products', methods=['GET'])
+@app.route('/metrics')
+def metrics_endpoint():
+    """Request counters, latency histograms and pool gauges in Prometheus text format."""
+    stats = pool.stats()
+    extra = [
+        ('db_pool_connections', 'gauge', 'Open pooled connections.', stats['size']),
+        ('db_pool_in_use', 'gauge', 'Connections checked out.', stats['in_use']),
+        ('db_pool_checkouts_total', 'counter', 'Connections handed out since start.', stats['checkouts']),
+        ('db_pool_timeouts_total', 'counter', 'Checkouts that timed out waiting.', stats['timeouts']),
+        ('db_pool_wait_seconds_total', 'counter', 'Time spent waiting for a connection.',
+         stats['wait_seconds_total']),
+    ]
+    tokens = jwt.stats()
+    extra += [
+        ('jwt_cache_hits_total', 'counter', 'Requests whose token was verified from the cache.', tokens['hits']),
+        ('jwt_cache_misses_total', 'counter', 'Requests whose token needed a full decode.', tokens['misses']),
+        ('jwt_revoked_tokens', 'gauge', 'Revoked tokens not yet expired.', jwt.revoked_count()),
+    ]
+    bus = event_bus.stats()
+    extra += [
+        ('events_subscribers', 'gauge', 'Open /api/events streams.', bus['subscribers']),
+        ('events_published_total', 'counter', 'Events published since start.', bus['published']),
+        ('events_dropped_subscribers_total', 'counter', 'Streams dropped for falling behind.', bus['dropped']),
+    ]
+    return Response(request_metrics.render(extra), mimetype='text/plain; version=0.0.4')
+
+
+@app.route('/api/events')
 @jwt_required(optional=True)
-def get_products():
-    """Get all products."""
-    fmt = request.args.get('format')
-    q = request.args.get('q')
-    if q:
-        qlike = f'%{q}%'
-        rows = fetchall("SELECT * FROM product WHERE product_name LIKE %s OR category LIKE %s", (qlike, qlike))
-    else:
-        rows = fetchall('SELECT * FROM product')
-    return to_format({'products': rows}, fmt)
+def event_stream():
+    """Server-sent events for committed creates, updates, deletes and checkouts.
+
+    ?resources=products,icecream narrows the stream; the default is every
+    resource. A Last-Event-ID header resumes after that event if it is
+    still in the history, and otherwise starts with a reset event.
+    """
+    names, error = events.parse_resources(request.args.get('resources'), RESOURCES_BY_NAME)
+    if error:
+        return jsonify({"msg": error}), 400
+    try:
+        body = events.Stream(event_bus, names, request.headers.get('Last-Event-ID'),
+                             Config.EVENTS_HEARTBEAT_SECONDS)
+    except events.Full:
+        return jsonify({"msg": "too many event subscribers"}), 503
+    response = Response(body, mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
 
-@app.route('/api/products/<int:item_id>', methods=['GET'])
-@jwt_required(optional=True)
-def get_product(item_id):
-    """Get single product by ID."""
-    fmt = request.args.get('format')
-    row = fetchone("SELECT * FROM product WHERE id=%s", (item_id,))
-    if not row:
-        return jsonify({"msg": "Not Found"}), 404
-    return to_format({"product": row}, fmt)
 
-@app.route('/api/products', methods=['POST'])
+@app.route('/admin/slow-queries')
 @jwt_required()
-def create_product():
-    """Create new product."""
-    payload = request.get_json() or {}
-    errors = validate_product_payload(payload, partial=False)
-    if errors:
-        return jsonify({"errors": errors}), 400
-    cur = mysql.connection.cursor()
-    cur.execute(
-        "INSERT INTO product (product_name, category, unit, price, quantity, description) VALUES (%s,%s,%s,%s,%s,%s)",
-        (
-            payload.get("product_name"),
-            payload.get("category"),
-            payload.get("unit"),
-            payload.get("price", 0.0),
-            payload.get("quantity", 0),
-            payload.get("description", ""),
-        )
-    )
-    mysql.connection.commit()
-    new_id = cur.lastrowid
-    cur.close()
-    return jsonify({"msg": "created", "id": new_id}), 201
-
-@app.route('/api/products/<int:item_id>', methods=['PUT'])
-@jwt_required()
-def update_product(item_id):
-    """Update product."""
-    payload = request.get_json() or {}
-    if not payload:
-        return jsonify({"msg": "No payload"}), 400
-    errors = validate_product_payload(payload, partial=True)
-    if errors:
-        return jsonify({"errors": errors}), 400
-    keys = []
-    vals = []
-    allowed = ["product_name", "category", "unit", "price", "quantity", "description"]
-    for k in allowed:
-        if k in payload:
-            keys.append(f"{k}=%s")
-            vals.append(payload[k])
-    if not keys:
-        return jsonify({"msg": "Nothing to update"}), 400
-    vals.append(item_id)
-    cur = mysql.connection.cursor()
-    cur.execute(f"UPDATE product SET {', '.join(keys)} WHERE id=%s", tuple(vals))
-    mysql.connection.commit()
-    changed = cur.rowcount
-    cur.close()
-    if changed == 0:
-        return jsonify({"msg":"Not found"}), 404
-    return jsonify({"msg":"updated"}), 200
+def slow_query_log():
+    """The most recent slow statements, newest first, with their EXPLAIN plans."""
+    if get_jwt_identity() != DEMO_USER["username"]:
+        return jsonify({"msg": "Admin only"}), 403
+    return jsonify({
+        "threshold_ms": Config.SLOW_QUERY_MS,
+        "size": Config.SLOW_QUERY_LOG_SIZE,
+        "entries": slow_queries.snapshot(),
+    })
 
-@app.route("/api/products/<int:item_id>", methods=["DELETE"])
-@jwt_required()
-def delete_product(item_id):
-    """Delete product."""
-    cur = mysql.connection.cursor()
-    cur.execute("DELETE FROM product WHERE id=%s", (item_id,))
-    mysql.connection.commit()
-    rc = cur.rowcount
-    cur.close()
-    if rc == 0:
-        return jsonify({"msg": "Not found"}), 404
-    return jsonify({"msg": "deleted"}), 200
 
+def read_summary(summary):
+    """Rows of one inventory summary."""
+    with request_metrics.timer(metrics.SQL):
+        cur = get_db().cursor()
+        rows = summary.read(cur)
+        cur.close()
+    return rows
 
+def summary_total(summary, rows):
+    return {column: sum(row[column] for row in rows) for column in summary.totals}
 
 
-@app.route('/api/suppliers', methods=['GET'])
+@app.route('/api/analytics/stock-value')
 @jwt_required(optional=True)
-def get_suppliers():
-    """Get all suppliers."""
-    fmt = request.args.get('format')
-    q = request.args.get('q')
-    if q:
-        qlike = f'%{q}%'
-        rows = fetchall("SELECT * FROM supplier WHERE supplier_name LIKE %s OR address LIKE %s", (qlike, qlike))
-    else:
-        rows = fetchall('SELECT * FROM supplier')
-    return to_format({'suppliers': rows}, fmt)
+def stock_value_by_category():
+    """Product count, units and stock value per category."""
+    summary = analytics.PRODUCT_CATEGORIES
+    rows = read_summary(summary)
+    return to_format({"categories": rows, "total": summary_total(summary, rows)}, request.args.get('format'))
+
 
-@app.route('/api/suppliers/<int:item_id>', methods=['GET'])
+@app.route('/api/analytics/icecream-by-size')
 @jwt_required(optional=True)
-def get_supplier(item_id):
-    """Get single supplier by ID."""
-    fmt = request.args.get('format')
-    row = fetchone("SELECT * FROM supplier WHERE supplier_id=%s", (item_id,))
-    if not row:
-        return jsonify({"msg": "Not Found"}), 404
-    return to_format({"supplier": row}, fmt)
+def icecream_stock_by_size():
+    """Flavor count, units and stock value per icecream size."""
+    summary = analytics.ICECREAM_SIZES
+    rows = read_summary(summary)
+    return to_format({"sizes": rows, "total": summary_total(summary, rows)}, request.args.get('format'))
 
-@app.route('/api/suppliers', methods=['POST'])
-@jwt_required()
-def create_supplier():
-    """Create new supplier."""
-    payload = request.get_json() or {}
-    errors = validate_supplier_payload(payload, partial=False)
-    if errors:
-        return jsonify({"errors": errors}), 400
-    cur = mysql.connection.cursor()
-    cur.execute(
-        "INSERT INTO supplier (supplier_name, contact_number, address, contact_person, phone, email) VALUES (%s,%s,%s,%s,%s,%s)",
-        (
-            payload.get("supplier_name"),
-            payload.get("contact_number"),
-            payload.get("address"),
-            payload.get("contact_person", ""),
-            payload.get("phone", ""),
-            payload.get("email", ""),
-        )
-    )
-    mysql.connection.commit()
-    new_id = cur.lastrowid
-    cur.close()
-    return jsonify({"msg": "created", "id": new_id}), 201
 
-@app.route('/api/suppliers/<int:item_id>', methods=['PUT'])
+@app.route('/api/analytics/low-stock')
+@jwt_required(optional=True)
+def low_stock():
+    """Products and icecream with at most ?threshold= units left, fewest first."""
+    threshold = validate_int(request.args.get('threshold', Config.LOW_STOCK_THRESHOLD))
+    limit = validate_int(request.args.get('limit', Config.DEFAULT_PAGE_SIZE))
+    if threshold is None or limit is None or not 1 <= limit <= Config.MAX_PAGE_SIZE:
+        return jsonify({"msg": f"threshold must be an integer and limit between 1 and {Config.MAX_PAGE_SIZE}"}), 400
+    data = {"threshold": threshold}
+    for res in RESOURCES:
+        summary = SUMMARIES.get(res.table)
+        if summary is not None:
+            data[res.collection] = list(fetchall(summary.low_stock_sql, (threshold, limit)))
+    return to_format(data, request.args.get('format'))
+
+
+@app.route('/api/analytics/reconcile', methods=['POST'])
 @jwt_required()
-def update_supplier(item_id):
-    """Update supplier."""
-    payload = request.get_json() or {}
-    if not payload:
-        return jsonify({"msg": "No payload"}), 400
-    errors = validate_supplier_payload(payload, partial=True)
-    if errors:
-        return jsonify({"errors": errors}), 400
-    keys = []
-    vals = []
-    allowed = ["supplier_name", "contact_number", "address", "contact_person", "phone", "email"]
-    for k in allowed:
-        if k in payload:
-            keys.append(f"{k}=%s")
-            vals.append(payload[k])
-    if not keys:
-        return jsonify({"msg": "Nothing to update"}), 400
-    vals.append(item_id)
-    cur = mysql.connection.cursor()
-    cur.execute(f"UPDATE supplier SET {', '.join(keys)} WHERE supplier_id=%s", tuple(vals))
-    mysql.connection.commit()
-    changed = cur.rowcount
-    cur.close()
-    if changed == 0:
-        return jsonify({"msg":"Not found"}), 404
-    return jsonify({"msg":"updated"}), 200
-
-@app.route("/api/suppliers/<int:item_id>", methods=["DELETE"])
+def reconcile_summaries():
+    """Rebuild every inventory summary from its source table now."""
+    with request_metrics.timer(metrics.SQL):
+        for summary in SUMMARIES.values():
+            summary.reconcile(backend, get_db())
+    return jsonify({"msg": "reconciled", "summaries": [summary.table for summary in SUMMARIES.values()]}), 200
+
+
+def insert_each(conn, cur, res, rows):
+    """Insert rows one at a time, each under its own savepoint.
+
+    Returns (new_id, None) per inserted row and (None, message) per row
+    that broke a constraint; those are rolled back alone and the rest stay
+    in the open transaction.
+    """
+    backend.begin_write(conn)
+    outcomes = []
+    for row in rows:
+        cur.execute("SAVEPOINT batch_item")
+        try:
+            cur.execute(res.insert_sql, row)
+            outcomes.append((cur.lastrowid, None))
+        except backend.IntegrityError as err:
+            cur.execute("ROLLBACK TO SAVEPOINT batch_item")
+            outcomes.append((None, constraint_message(err)))
+        cur.execute("RELEASE SAVEPOINT batch_item")
+    return outcomes
+
+@app.route('/api/<resource>/batch', methods=['POST'])
 @jwt_required()
-def delete_supplier(item_id):
-    """Delete supplier."""
-    cur = mysql.connection.cursor()
-    cur.execute("DELETE FROM supplier WHERE supplier_id=%s", (item_id,))
-    mysql.connection.commit()
-    rc = cur.rowcount
-    cur.close()
-    if rc == 0:
-        return jsonify({"msg": "Not found"}), 404
-    return jsonify({"msg": "deleted"}), 200
-
-
-# ============ ICE CREAM API ============
-
-@app.route('/api/icecream', methods=['GET'])
-@jwt_required(optional=True)
-def get_icecreams():
-    """Get all ice cream items."""
-    fmt = request.args.get('format')
-    q = request.args.get('q')
-    if q:
-        qlike = f'%{q}%'
-        rows = fetchall("SELECT * FROM icecream WHERE flavor LIKE %s OR size LIKE %s", (qlike, qlike))
-    else:
-        rows = fetchall('SELECT * FROM icecream')
-    return to_format({'icecreams': rows}, fmt)
-
-@app.route('/api/icecream/<int:item_id>', methods=['GET'])
-@jwt_required(optional=True)
-def get_icecream(item_id):
-    """Get single ice cream item by ID."""
-    fmt = request.args.get('format')
-    row = fetchone("SELECT * FROM icecream WHERE icecream_id=%s", (item_id,))
-    if not row:
+def create_batch(resource):
+    """Create many rows of one resource in a single transaction.
+
+    ?mode=atomic (default) rejects the whole batch if any item is invalid
+    or breaks a constraint (409); ?mode=best_effort inserts the rest and
+    reports those items under errors.
+    """
+    res = RESOURCES_BY_NAME.get(resource)
+    if res is None:
         return jsonify({"msg": "Not Found"}), 404
-    return to_format({"icecream": row}, fmt)
-
-@app.route('/api/icecream', methods=['POST'])
-@jwt_required()
-def create_icecream():
-    """Create new ice cream item."""
-    payload = request.get_json() or {}
-    errors = validate_icecream_payload(payload, partial=False)
-    if errors:
+    mode = batch_mode()
+    if mode is None:
+        return jsonify({"msg": "mode must be atomic or best_effort"}), 400
+    payload = request.get_json()
+    if not isinstance(payload, list) or not payload:
+        return jsonify({"msg": "Expected a non-empty JSON array"}), 400
+    if len(payload) > Config.MAX_BATCH_SIZE:
+        return jsonify({"msg": f"At most {Config.MAX_BATCH_SIZE} items per batch"}), 400
+    errors = []
+    rows = []
+    positions = []
+    for index, item in enumerate(payload):
+        data, item_errors = res.clean(item, partial=False) if isinstance(item, dict) else (None, ["item must be an object"])
+        if item_errors:
+            errors.append({"index": index, "errors": item_errors})
+        else:
+            rows.append(res.row(data))
+            positions.append(index)
+    if errors and (mode == 'atomic' or not rows):
         return jsonify({"errors": errors}), 400
-    cur = mysql.connection.cursor()
-    cur.execute(
-        "INSERT INTO icecream (flavor, size, price, stock, description) VALUES (%s,%s,%s,%s,%s)",
-        (
-            payload.get("flavor"),
-            payload.get("size"),
-            payload.get("price"),
-            payload.get("stock", 0),
-            payload.get("description", ""),
-        )
-    )
-    mysql.connection.commit()
-    new_id = cur.lastrowid
-    cur.close()
-    return jsonify({"msg": "created", "id": new_id}), 201
-
-@app.route('/api/icecream/<int:item_id>', methods=['PUT'])
+    conn = get_db()
+    cur = conn.cursor()
+    with request_metrics.timer(metrics.SQL):
+        try:
+            try:
+                ids = backend.insert_many(cur, res, rows, Config.BATCH_INSERT_CHUNK)
+            except backend.IntegrityError:
+                if mode == 'atomic':
+                    raise
+                # Some row breaks a constraint (a duplicate email, say); find
+                # which, keep the rest.
+                conn.rollback()
+                outcomes = insert_each(conn, cur, res, rows)
+                errors = sorted(errors + [{"index": index, "errors": [message]}
+                                          for index, (_, message) in zip(positions, outcomes) if message],
+                                key=lambda error: error["index"])
+                kept = [i for i, (new_id, _) in enumerate(outcomes) if new_id is not None]
+                ids = [outcomes[i][0] for i in kept]
+                rows = [rows[i] for i in kept]
+                positions = [positions[i] for i in kept]
+                if not rows:
+                    conn.rollback()
+                    return jsonify({"errors": errors}), 409
+            summary = SUMMARIES.get(res.table)
+            if summary is not None:
+                summary.apply(backend, cur, added=[dict(zip(res.columns, row)) for row in rows])
+            conn.commit()
+        except backend.Error:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+    table_changed(res)
+    announce(res, 'created', ids=ids)
+    created = [{"index": index, "id": new_id} for index, new_id in zip(positions, ids)]
+    return jsonify({"msg": "created", "created": created, "errors": errors}), 201
+
+
+@app.route('/api/<resource>/batch', methods=['PATCH'])
 @jwt_required()
-def update_icecream(item_id):
-    """Update ice cream item."""
-    payload = request.get_json() or {}
-    if not payload:
-        return jsonify({"msg": "No payload"}), 400
-    errors = validate_icecream_payload(payload, partial=True)
-    if errors:
+def update_batch(resource):
+    """Update many rows of one resource in a single transaction.
+
+    Expects a JSON array of {"id": .., "fields": {..}}. Updates that set the
+    same columns are grouped into one statement per chunk. Ids that do not
+    exist are reported under not_found, like the 404 of a single PUT.
+    """
+    res = RESOURCES_BY_NAME.get(resource)
+    if res is None:
+        return jsonify({"msg": "Not Found"}), 404
+    mode = batch_mode()
+    if mode is None:
+        return jsonify({"msg": "mode must be atomic or best_effort"}), 400
+    payload = request.get_json()
+    if not isinstance(payload, list) or not payload:
+        return jsonify({"msg": "Expected a non-empty JSON array"}), 400
+    if len(payload) > Config.MAX_BATCH_SIZE:
+        return jsonify({"msg": f"At most {Config.MAX_BATCH_SIZE} items per batch"}), 400
+    errors = []
+    valid = []
+    seen = set()
+    for index, item in enumerate(payload):
+        item_id = validate_int(item.get("id")) if isinstance(item, dict) else None
+        fields = item.get("fields") if isinstance(item, dict) else None
+        if item_id is None or not isinstance(fields, dict):
+            item_errors = ["item must be an object with an integer id and a fields object"]
+        elif item_id in seen:
+            item_errors = ["duplicate id"]
+        else:
+            fields, item_errors = res.clean(fields, partial=True)
+            if not item_errors and not fields:
+                item_errors = ["Nothing to update"]
+        if item_errors:
+            errors.append({"index": index, "id": item_id, "errors": item_errors})
+        else:
+            seen.add(item_id)
+            valid.append((item_id, fields))
+    if errors and (mode == 'atomic' or not valid):
         return jsonify({"errors": errors}), 400
-    keys = []
-    vals = []
-    allowed = ["flavor", "size", "price", "stock", "description"]
-    for k in allowed:
-        if k in payload:
-            keys.append(f"{k}=%s")
-            vals.append(payload[k])
-    if not keys:
-        return jsonify({"msg": "Nothing to update"}), 400
-    vals.append(item_id)
-    cur = mysql.connection.cursor()
-    cur.execute(f"UPDATE icecream SET {', '.join(keys)} WHERE icecream_id=%s", tuple(vals))
-    mysql.connection.commit()
-    changed = cur.rowcount
-    cur.close()
-    if changed == 0:
-        return jsonify({"msg":"Not found"}), 404
-    return jsonify({"msg":"updated"}), 200
-
-@app.route("/api/icecream/<int:item_id>", methods=["DELETE"])
+    cur = get_db().cursor()
+    with request_metrics.timer(metrics.SQL):
+        try:
+            summary = SUMMARIES.get(res.table)
+            ids = [item_id for item_id, _ in valid]
+            # Summaries need the old values of the rows being changed.
+            existing = lock_rows(cur, res, ids) if summary else lock_existing_ids(cur, res, ids)
+            groups = {}
+            for item_id, fields in valid:
+                if item_id in existing:
+                    mask = res.field_mask(fields)
+                    values = tuple(fields[col] for col in res.columns_for(mask))
+                    groups.setdefault(mask, []).append((item_id, values))
+            for mask, updates in groups.items():
+                update_many(cur, res, mask, updates)
+            if summary is not None:
+                changed = [(existing[item_id], fields) for item_id, fields in valid if item_id in existing]
+                summary.apply(backend, cur, removed=[old for old, _ in changed],
+                              added=[{**old, **fields} for old, fields in changed])
+            get_db().commit()
+        except backend.Error:
+            get_db().rollback()
+            raise
+        finally:
+            cur.close()
+    updated = [item_id for item_id, _ in valid if item_id in existing]
+    not_found = [item_id for item_id, _ in valid if item_id not in existing]
+    if updated:
+        table_changed(res)
+        announce(res, 'updated', ids=updated)
+    status = 200 if updated else 404
+    return jsonify({"msg": "updated", "updated": updated, "not_found": not_found, "errors": errors}), status
+
+
+@app.route('/api/<resource>/batch', methods=['DELETE'])
 @jwt_required()
-def delete_icecream(item_id):
-    """Delete ice cream item."""
-    cur = mysql.connection.cursor()
-    cur.execute("DELETE FROM icecream WHERE icecream_id=%s", (item_id,))
-    mysql.connection.commit()
-    rc = cur.rowcount
-    cur.close()
-    if rc == 0:
-        return jsonify({"msg": "Not found"}), 404
-    return jsonify({"msg": "deleted"}), 200
-
-
-
-@app.route('/api/students', methods=['GET'])
-@jwt_required(optional=True)
-def get_students():
-    """Get all students."""
-    fmt = request.args.get('format')
-    q = request.args.get('q')
-    if q:
-        qlike = f'%{q}%'
-        rows = fetchall("SELECT * FROM students WHERE student_name LIKE %s OR email LIKE %s", (qlike, qlike))
-    else:
-        rows = fetchall('SELECT * FROM students')
-    return to_format({'students': rows}, fmt)
+def delete_batch(resource):
+    """Delete many rows of one resource with a single WHERE pk IN (...).
 
-
-@app.route('/api/students/<int:item_id>', methods=['GET'])
-@jwt_required(optional=True)
-def get_student(item_id):
-    """Get single student by ID."""
-    fmt = request.args.get('format')
-    row = fetchone("SELECT * FROM students WHERE student_id=%s", (item_id,))
-    if not row:
+    Expects {"ids": [..]}. Ids that do not exist are reported under not_found.
+    """
+    res = RESOURCES_BY_NAME.get(resource)
+    if res is None:
         return jsonify({"msg": "Not Found"}), 404
-    return to_format({"student": row}, fmt)
-
-
-@app.route('/api/students', methods=['POST'])
-@jwt_required()
-def create_student():
-    """Create new student."""
-    payload = request.get_json() or {}
-    errors = validate_student_payload(payload, partial=False)
-    if errors:
-        return jsonify({"errors": errors}), 400
-    cur = mysql.connection.cursor()
-    cur.execute(
-        "INSERT INTO students (student_name, email, major, gpa, enrollment_date) VALUES (%s,%s,%s,%s,%s)",
-        (
-            payload.get("student_name"),
-            payload.get("email"),
-            payload.get("major", ""),
-            payload.get("gpa", 0.0),
-            payload.get("enrollment_date", None),
-        )
-    )
-    mysql.connection.commit()
-    new_id = cur.lastrowid
-    cur.close()
-    return jsonify({"msg": "created", "id": new_id}), 201
-
-
-@app.route('/api/students/<int:item_id>', methods=['PUT'])
+    payload = request.get_json()
+    raw_ids = payload.get("ids") if isinstance(payload, dict) else None
+    if not isinstance(raw_ids, list) or not raw_ids:
+        return jsonify({"msg": "Expected {\"ids\": [...]} with at least one id"}), 400
+    if len(raw_ids) > Config.MAX_BATCH_SIZE:
+        return jsonify({"msg": f"At most {Config.MAX_BATCH_SIZE} items per batch"}), 400
+    ids = [validate_int(item_id) for item_id in raw_ids]
+    if None in ids:
+        return jsonify({"msg": "ids must be integers"}), 400
+    ids = list(dict.fromkeys(ids))
+    cur = get_db().cursor()
+    with request_metrics.timer(metrics.SQL):
+        try:
+            summary = SUMMARIES.get(res.table)
+            existing = lock_rows(cur, res, ids) if summary else lock_existing_ids(cur, res, ids)
+            if existing:
+                cur.execute(res.delete_in_sql(len(existing)), tuple(existing))
+                TOMBSTONES.record(cur, res.table, list(existing))
+                if summary is not None:
+                    summary.apply(backend, cur, removed=existing.values())
+            get_db().commit()
+        except backend.Error:
+            get_db().rollback()
+            raise
+        finally:
+            cur.close()
+    deleted = [item_id for item_id in ids if item_id in existing]
+    not_found = [item_id for item_id in ids if item_id not in existing]
+    if deleted:
+        table_changed(res)
+        announce(res, 'deleted', ids=deleted)
+    status = 200 if deleted else 404
+    return jsonify({"msg": "deleted", "deleted": deleted, "not_found": not_found}), status
+
+
+STOCKED = {res.name: res for res in RESOURCES if res.stock is not None}
+STOCKED_BY_TABLE = {res.table: res for res in STOCKED.values()}
+
+
+@app.route('/api/checkout', methods=['POST'])
 @jwt_required()
-def update_student(item_id):
-    """Update student."""
-    payload = request.get_json() or {}
-    if not payload:
-        return jsonify({"msg": "No payload"}), 400
-    errors = validate_student_payload(payload, partial=True)
+def checkout():
+    """Sell a cart of product and icecream lines in one transaction.
+
+    Expects {"lines": [{"resource": "products", "id": .., "quantity": ..}]}.
+    Each line is one conditional ``stock = stock - n WHERE stock >= n``
+    UPDATE, so concurrent sales of the same item never oversell or lose a
+    decrement, and there is no read-modify-write round trip. Lines for the
+    same item are merged. Rows are updated in (table, id) order, so two
+    carts always lock shared rows in the same order and cannot deadlock.
+    ?mode=atomic (default) sells nothing unless every line can be filled;
+    ?mode=best_effort sells the lines that can.
+    """
+    mode = batch_mode()
+    if mode is None:
+        return jsonify({"msg": "mode must be atomic or best_effort"}), 400
+    payload = request.get_json()
+    lines = payload.get("lines") if isinstance(payload, dict) else None
+    if not isinstance(lines, list) or not lines:
+        return jsonify({"msg": "Expected {\"lines\": [...]} with at least one line"}), 400
+    if len(lines) > Config.MAX_CHECKOUT_LINES:
+        return jsonify({"msg": f"At most {Config.MAX_CHECKOUT_LINES} lines per checkout"}), 400
+    errors = []
+    keys = []
+    wanted = {}
+    for index, line in enumerate(lines):
+        if not isinstance(line, dict):
+            errors.append({"index": index, "errors": ["line must be an object"]})
+            continue
+        line_errors = []
+        res = STOCKED.get(line.get("resource"))
+        if res is None:
+            line_errors.append(f"resource must be one of: {', '.join(STOCKED)}")
+        item_id = validate_int(line.get("id"))
+        if item_id is None:
+            line_errors.append("id must be an integer")
+        count = line.get("quantity")
+        if type(count) is not int or not 1 <= count <= COUNT_MAX:
+            line_errors.append(f"quantity must be an integer from 1 to {COUNT_MAX}")
+        if line_errors:
+            errors.append({"index": index, "errors": line_errors})
+            continue
+        key = (res.table, item_id)
+        if wanted.get(key, 0) + count > COUNT_MAX:
+            errors.append({"index": index, "errors": [f"total quantity for this item exceeds {COUNT_MAX}"]})
+            continue
+        keys.append(key)
+        wanted[key] = wanted.get(key, 0) + count
     if errors:
         return jsonify({"errors": errors}), 400
-    keys = []
-    vals = []
-    allowed = ["student_name", "email", "major", "gpa", "enrollment_date"]
-    for k in allowed:
-        if k in payload:
-            keys.append(f"{k}=%s")
-            vals.append(payload[k])
-    if not keys:
-        return jsonify({"msg": "Nothing to update"}), 400
-    vals.append(item_id)
-    cur = mysql.connection.cursor()
-    cur.execute(f"UPDATE students SET {', '.join(keys)} WHERE student_id=%s", tuple(vals))
-    mysql.connection.commit()
-    changed = cur.rowcount
-    cur.close()
-    if changed == 0:
-        return jsonify({"msg":"Not found"}), 404
-    return jsonify({"msg":"updated"}), 200
-
 
-@app.route("/api/students/<int:item_id>", methods=["DELETE"])
-@jwt_required()
-def delete_student(item_id):
-    """Delete student."""
-    cur = mysql.connection.cursor()
-    cur.execute("DELETE FROM students WHERE student_id=%s", (item_id,))
-    mysql.connection.commit()
-    rc = cur.rowcount
-    cur.close()
-    if rc == 0:
-        return jsonify({"msg": "Not found"}), 404
-    return jsonify({"msg": "deleted"}), 200
+    outcome = {}
+    remaining = {}
+    conn = get_db()
+    cur = conn.cursor()
+    with request_metrics.timer(metrics.SQL):
+        try:
+            backend.begin_write(conn)
+            for key in sorted(wanted):
+                res = STOCKED_BY_TABLE[key[0]]
+                count = wanted[key]
+                cur.execute(res.decrement_sql, (count, key[1], count))
+                if cur.rowcount:
+                    outcome[key] = {"status": "ok"}
+                    continue
+                cur.execute(res.select_sql, (key[1],))
+                row = cur.fetchone()
+                if row is None:
+                    outcome[key] = {"status": "not_found"}
+                else:
+                    outcome[key] = {"status": "insufficient_stock", "available": row[res.stock]}
+            failed = any(result["status"] != "ok" for result in outcome.values())
+            committed = not (failed and mode == 'atomic')
+            sold_tables = sorted({key[0] for key, result in outcome.items() if result["status"] == "ok"})
+            if not committed:
+                conn.rollback()
+            else:
+                for table in sold_tables:
+                    res = STOCKED_BY_TABLE[table]
+                    ids = [key[1] for key, result in outcome.items() if key[0] == table and result["status"] == "ok"]
+                    cur.execute(res.select_in_sql(len(ids)), tuple(ids))
+                    rows = cur.fetchall()
+                    for row in rows:
+                        remaining[(table, row[res.pk])] = row[res.stock]
+                    summary = SUMMARIES.get(table)
+                    if summary is not None:
+                        summary.apply(backend, cur,
+                                      removed=[{**row, res.stock: row[res.stock] + wanted[(table, row[res.pk])]}
+                                               for row in rows],
+                                      added=rows)
+                conn.commit()
+        except backend.Error:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+    if committed:
+        for table in sold_tables:
+            table_changed(STOCKED_BY_TABLE[table])
+            announce(STOCKED_BY_TABLE[table], 'stock',
+                     items=[{"id": key[1], "remaining": value} for key, value in sorted(remaining.items())
+                            if key[0] == table])
+    results = []
+    for index, key in enumerate(keys):
+        result = {"index": index, "resource": STOCKED_BY_TABLE[key[0]].name, "id": key[1], **outcome[key]}
+        if key in remaining:
+            result["remaining"] = remaining[key]
+        results.append(result)
+    if failed and mode == 'atomic':
+        return jsonify({"msg": "insufficient stock", "committed": False, "lines": results}), 409
+    sold = sum(1 for result in results if result["status"] == "ok")
+    return jsonify({"msg": "checked out", "committed": True, "lines": results}), 200 if sold else 409
+
+
+def register_resource(res):
+    """Add the list/get/create/update/delete routes for one registry entry."""
+    summary = SUMMARIES.get(res.table)
+
+    def list_items():
+        """List rows: keyset pages, relevance search on ?q=, or a stream.
+
+        Filters and ?sort= are pushed into the WHERE/ORDER BY; ?q= combined
+        with either is matched with LIKE and paged like a plain list.
+        """
+        fmt = request.args.get('format')
+        limit, after, error = parse_page_args(request.args)
+        if not error:
+            fields, filters, sort, after, error = res.parse_list_args(request.args, after)
+        if error:
+            return jsonify({"msg": error}), 400
+        q = request.args.get('q')
+        if wants_stream(fmt):
+            return stream_list(res, q, limit, after, fmt, fields, filters, sort)
+        if q and not filters and sort is None:
+            rows = search_rows(res, q, limit, fields)
+            return to_format({res.collection: rows, 'next_cursor': None}, fmt)
+        rows, next_cursor = fetch_page(res, limit, after, fields, q, filters, sort)
+        return to_format({res.collection: rows, 'next_cursor': next_cursor}, fmt)
+
+    def get_item(item_id):
+        """Get single row by ID."""
+        fmt = request.args.get('format')
+        fields, error = res.parse_fields(request.args.get('fields'))
+        if error:
+            return jsonify({"msg": error}), 400
+        row = fetchone(res.project(res.select_sql, fields), (item_id,))
+        if not row:
+            return jsonify({"msg": "Not Found"}), 404
+        return to_format({res.item: row}, fmt)
+
+    def create_item():
+        """Create new row."""
+        payload = request.get_json() or {}
+        if not isinstance(payload, dict):
+            return jsonify({"msg": "Expected a JSON object"}), 400
+        data, errors = res.clean(payload, partial=False)
+        if errors:
+            return jsonify({"errors": errors}), 400
+        cur = get_db().cursor()
+        with request_metrics.timer(metrics.SQL):
+            cur.execute(res.insert_sql, res.row(data))
+            if summary is not None:
+                summary.apply(backend, cur, added=[data])
+            get_db().commit()
+        new_id = cur.lastrowid
+        table_changed(res)
+        cur.close()
+        announce(res, 'created', ids=[new_id])
+        return jsonify({"msg": "created", "id": new_id}), 201
+
+    def update_item(item_id):
+        """Update row."""
+        payload = request.get_json() or {}
+        if not payload:
+            return jsonify({"msg": "No payload"}), 400
+        if not isinstance(payload, dict):
+            return jsonify({"msg": "Expected a JSON object"}), 400
+        data, errors = res.clean(payload, partial=True)
+        if errors:
+            return jsonify({"errors": errors}), 400
+        query, args = res.update_query(data, item_id)
+        if query is None:
+            return jsonify({"msg": "Nothing to update"}), 400
+        cur = get_db().cursor()
+        with request_metrics.timer(metrics.SQL):
+            old = lock_rows(cur, res, [item_id]).get(item_id) if summary else None
+            cur.execute(query, args)
+            if old is not None:
+                summary.apply(backend, cur, [old], [{**old, **data}])
+            get_db().commit()
+        table_changed(res)
+        changed = cur.rowcount
+        cur.close()
+        if changed == 0:
+            return jsonify({"msg": "Not found"}), 404
+        announce(res, 'updated', ids=[item_id])
+        return jsonify({"msg": "updated"}), 200
+
+    def delete_item(item_id):
+        """Delete row."""
+        cur = get_db().cursor()
+        with request_metrics.timer(metrics.SQL):
+            old = lock_rows(cur, res, [item_id]).get(item_id) if summary else None
+            cur.execute(res.delete_sql, (item_id,))
+            rc = cur.rowcount
+            if rc:
+                TOMBSTONES.record(cur, res.table, [item_id])
+            if old is not None:
+                summary.apply(backend, cur, removed=[old])
+            get_db().commit()
+        table_changed(res)
+        cur.close()
+        if rc == 0:
+            return jsonify({"msg": "Not found"}), 404
+        announce(res, 'deleted', ids=[item_id])
+        return jsonify({"msg": "deleted"}), 200
+
+    def list_changes():
+        """Rows created or updated, and ids deleted, since the ?since= token.
+
+        Without ?since= the feed starts with every row. Each response carries
+        next_since for the following poll; more is true while a page filled up.
+        """
+        fmt = request.args.get('format')
+        limit, error = parse_limit(request.args)
+        if not error:
+            fields, error = res.parse_fields(request.args.get('fields'))
+        since = None
+        raw_since = request.args.get('since')
+        if not error and raw_since:
+            decoded = changes.decode_since(raw_since, backend)
+            if decoded is None:
+                error = "invalid since token"
+            else:
+                since, since_generation = decoded
+        if error:
+            return jsonify({"msg": error}), 400
+        if fields is not None:
+            fields |= 1 << res.readable.index('updated_at')
+        retention = Config.TOMBSTONE_RETENTION_DAYS * 86400
+        cur = get_db().cursor()
+        with request_metrics.timer(metrics.SQL):
+            try:
+                horizon = backend.horizon(cur, Config.CHANGES_LAG_SECONDS)
+                generation = changes.generation(cur, res.table)
+                if since is not None and since_generation != generation:
+                    return jsonify({"msg": f"{res.name} were reloaded since this token; sync again without it"}), 410
+                if since is not None and changes.expired(since, horizon, retention):
+                    return jsonify({"msg": "since token has expired; sync again without it"}), 410
+                TOMBSTONES.prune_if_stale(backend, get_db(), horizon, retention)
+                rows, deleted, since, more = changes.read(backend, cur, res, since, horizon, limit, fields)
+            finally:
+                cur.close()
+        return to_format({res.collection: rows, 'deleted': deleted,
+                          'next_since': changes.encode_since(since, generation), 'more': more}, fmt)
+
+    def export_items():
+        """Stream every matching row as CSV, NDJSON or columnar, optionally gzipped.
+
+        ?fields=, the filters, ?sort= and ?q= (as LIKE) apply as on lists.
+        Rows come off the streaming cursor as tuples and go through the
+        encoder a chunk at a time, so memory stays flat for any table size.
+        """
+        export_format = exporters.FORMATS.get(request.args.get('format', 'csv').lower())
+        if export_format is None:
+            return jsonify({"msg": f"format must be one of: {', '.join(exporters.FORMATS)}"}), 400
+        fields, filters, sort, _, error = res.parse_list_args(request.args, None)
+        if error:
+            return jsonify({"msg": error}), 400
+        if fields is None:
+            fields = (1 << len(res.readable)) - 1
+        columns = [col for bit, col in enumerate(res.readable) if fields >> bit & 1]
+        query, args = res.list_query(request.args.get('q'), None, None, filters, sort)
+        chunks = stream_rows(res.project(query, fields), args, Config.EXPORT_CHUNK_SIZE, tuples=True)
+        body = export_format.encode(columns, chunks)
+        filename = f"{res.name}.{export_format.extension}"
+        mimetype = export_format.mimetype
+        if request.args.get('gzip', '').lower() in ('1', 'true', 'yes'):
+            body = exporters.gzip_chunks(body, Config.EXPORT_GZIP_LEVEL)
+            filename += '.gz'
+            mimetype = 'application/gzip'
+        return Response(stream_with_context(body), mimetype=mimetype,
+                        headers={'Content-Disposition': f'attachment; filename="{filename}"'})
+
+    cached = response_cache.cached(res.table)
+    base = f"/api/{res.name}"
+    app.add_url_rule(base, f"list_{res.name}",
+                     jwt_required(optional=True)(cached(list_items)), methods=['GET'])
+    app.add_url_rule(f"{base}/changes", f"changes_{res.name}",
+                     jwt_required(optional=True)(list_changes), methods=['GET'])
+    app.add_url_rule(f"{base}/export", f"export_{res.name}",
+                     jwt_required(optional=True)(export_items), methods=['GET'])
+    app.add_url_rule(f"{base}/<int:item_id>", f"get_{res.name}",
+                     jwt_required(optional=True)(cached(get_item)), methods=['GET'])
+    app.add_url_rule(base, f"create_{res.name}", jwt_required()(create_item), methods=['POST'])
+    app.add_url_rule(f"{base}/<int:item_id>", f"update_{res.name}", jwt_required()(update_item), methods=['PUT'])
+    app.add_url_rule(f"{base}/<int:item_id>", f"delete_{res.name}", jwt_required()(delete_item), methods=['DELETE'])
+
+
+for _res in RESOURCES:
+    register_resource(_res)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,183 @@
+"""Per-route request metrics in the Prometheus text format.
+
+Every request thread records into its own ThreadStats, so the hot path is a
+few dict lookups and integer increments with no lock. Only a thread's first
+request takes the registry lock, to register its stats. A scrape sums all
+threads. Stats of threads that have exited are folded into one retired
+total, so the registry does not grow with every short-lived server thread.
+
+Besides total latency, a request's time is split into phases: JWT
+verification, SQL execution and response serialization. main.py adds to the
+current request's phase totals, and they are recorded when the request ends.
+"""
+import bisect
+import threading
+import time
+
+# Histogram bucket upper bounds in seconds; +Inf is implicit.
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+JWT = 0
+SQL = 1
+SERIALIZE = 2
+PHASES = ('jwt', 'sql', 'serialize')
+
+perf_counter = time.perf_counter
+
+
+class ThreadStats:
+    """Counters written by one thread only."""
+
+    __slots__ = ('thread', 'requests', 'latency', 'phase_latency', 'phases', 'started')
+
+    def __init__(self, thread):
+        self.thread = thread
+        self.requests = {}          # (route, method, status) -> count
+        self.latency = {}           # (route, method) -> [bucket counts..., sum]
+        self.phase_latency = {}     # (route, method, phase) -> [bucket counts..., sum]
+        self.phases = [0.0] * len(PHASES)
+        self.started = None
+
+
+def observe(histograms, key, seconds):
+    hist = histograms.get(key)
+    if hist is None:
+        hist = histograms[key] = [0] * (len(BUCKETS) + 1) + [0.0]
+    hist[bisect.bisect_left(BUCKETS, seconds)] += 1
+    hist[-1] += seconds
+
+
+def merge(into, histograms):
+    for key, hist in list(histograms.items()):
+        total = into.get(key)
+        if total is None:
+            into[key] = list(hist)
+        else:
+            for i, value in enumerate(hist):
+                total[i] += value
+
+
+class Registry:
+    """Per-thread request statistics and their Prometheus rendering."""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._threads = []
+        self._retired = ThreadStats(None)
+
+    def stats(self):
+        """This thread's ThreadStats, registering it on first use."""
+        try:
+            return self._local.stats
+        except AttributeError:
+            stats = self._local.stats = ThreadStats(threading.current_thread())
+            with self._lock:
+                self._threads.append(stats)
+            return stats
+
+    def start(self):
+        """Mark the start of a request on this thread."""
+        stats = self.stats()
+        stats.started = perf_counter()
+        phases = stats.phases
+        for i in range(len(phases)):
+            phases[i] = 0.0
+
+    def add(self, phase, seconds):
+        """Add seconds to one phase of the current request."""
+        self.stats().phases[phase] += seconds
+
+    def timer(self, phase):
+        """Context manager adding the time spent in its block to phase."""
+        return PhaseTimer(self, phase)
+
+    def finish(self, route, method, status):
+        """Record the current request's count, latency and phase times."""
+        stats = self.stats()
+        if stats.started is None:
+            return
+        elapsed = perf_counter() - stats.started
+        stats.started = None
+        key = (route, method, status)
+        stats.requests[key] = stats.requests.get(key, 0) + 1
+        observe(stats.latency, (route, method), elapsed)
+        for phase, seconds in enumerate(stats.phases):
+            if seconds:
+                observe(stats.phase_latency, (route, method, PHASES[phase]), seconds)
+
+    def snapshot(self):
+        """Totals across all threads as (requests, latency, phase_latency)."""
+        with self._lock:
+            alive = []
+            for stats in self._threads:
+                if stats.thread.is_alive():
+                    alive.append(stats)
+                else:
+                    # A finished thread writes nothing more; keep its totals only.
+                    self._fold(self._retired, stats)
+            self._threads = alive
+            total = ThreadStats(None)
+            self._fold(total, self._retired)
+            for stats in alive:
+                self._fold(total, stats)
+        return total.requests, total.latency, total.phase_latency
+
+    @staticmethod
+    def _fold(into, stats):
+        for key, count in list(stats.requests.items()):
+            into.requests[key] = into.requests.get(key, 0) + count
+        merge(into.latency, stats.latency)
+        merge(into.phase_latency, stats.phase_latency)
+
+    def render(self, extra=()):
+        """Prometheus text exposition of every metric, plus (name, type, help, value) extras."""
+        requests, latency, phase_latency = self.snapshot()
+        lines = ['# HELP http_requests_total Requests handled, by route, method and status.',
+                 '# TYPE http_requests_total counter']
+        for (route, method, status), count in sorted(requests.items()):
+            lines.append(f'http_requests_total{labels(route=route, method=method, status=status)} {count}')
+        lines += ['# HELP http_request_duration_seconds Request latency, by route and method.',
+                  '# TYPE http_request_duration_seconds histogram']
+        for (route, method), hist in sorted(latency.items()):
+            histogram_lines(lines, 'http_request_duration_seconds', {'route': route, 'method': method}, hist)
+        lines += ['# HELP http_request_phase_seconds Time spent per request in JWT checks, SQL and serialization.',
+                  '# TYPE http_request_phase_seconds histogram']
+        for (route, method, phase), hist in sorted(phase_latency.items()):
+            histogram_lines(lines, 'http_request_phase_seconds',
+                            {'route': route, 'method': method, 'phase': phase}, hist)
+        for name, kind, help_text, value in extra:
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}', f'{name} {value}']
+        return '\n'.join(lines) + '\n'
+
+
+class PhaseTimer:
+    __slots__ = ('registry', 'phase', 'started')
+
+    def __init__(self, registry, phase):
+        self.registry = registry
+        self.phase = phase
+
+    def __enter__(self):
+        self.started = perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.registry.add(self.phase, perf_counter() - self.started)
+
+
+def escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def labels(**pairs):
+    return '{' + ','.join(f'{name}="{escape(value)}"' for name, value in pairs.items()) + '}'
+
+
+def histogram_lines(lines, name, pairs, hist):
+    cumulative = 0
+    for bound, count in zip(BUCKETS + ('+Inf',), hist):
+        cumulative += count
+        lines.append(f'{name}_bucket{labels(**pairs, le=bound)} {cumulative}')
+    lines.append(f'{name}_sum{labels(**pairs)} {hist[-1]}')
+    lines.append(f'{name}_count{labels(**pairs)} {cumulative}')
@@ -0,0 +1,72 @@
+"""Keyset pagination: opaque cursors and ?limit=/?cursor= parsing."""
+import base64
+import binascii
+import json
+
+from config import Config
+from validators import validate_int
+
+
+def encode_cursor(key):
+    """Encode the position after a page's last row as an opaque cursor.
+
+    key is the last primary key, or a [sort, value, pk] list for lists
+    ordered by ?sort=; values JSON can't hold (Decimal, dates) go as strings.
+    """
+    raw = json.dumps(key, default=str, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_key(token):
+    """Decode the JSON value inside an opaque token, or None if it is not one."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        return json.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+    except (ValueError, binascii.Error, UnicodeError):
+        return None
+
+
+def decode_cursor(token):
+    """Decode an opaque cursor back to its key, or None if invalid."""
+    key = decode_key(token)
+    if isinstance(key, list) and len(key) == 3 and isinstance(key[0], str):
+        key = (key[0], key[1], key[2])
+        last_id = key[2]
+    else:
+        last_id = key
+    if not isinstance(last_id, int) or isinstance(last_id, bool):
+        return None
+    return key
+
+
+def parse_limit(args):
+    """Read ?limit=, returning (limit, error).
+
+    limit falls back to Config.DEFAULT_PAGE_SIZE and is capped at
+    Config.MAX_PAGE_SIZE.
+    """
+    raw_limit = args.get('limit')
+    if raw_limit is None:
+        return Config.DEFAULT_PAGE_SIZE, None
+    limit = validate_int(raw_limit)
+    if limit is None or limit < 1:
+        return None, "limit must be a positive integer"
+    return min(limit, Config.MAX_PAGE_SIZE), None
+
+
+def parse_page_args(args):
+    """Read ?limit= and ?cursor= from a request's query args.
+
+    Returns (limit, after, error), after being a decoded cursor key; limit is
+    read as by parse_limit.
+    """
+    limit, error = parse_limit(args)
+    if error:
+        return None, None, error
+    after = None
+    token = args.get('cursor')
+    if token:
+        after = decode_cursor(token)
+        if after is None:
+            return None, None, "invalid cursor"
+    return limit, after, None
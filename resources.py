@@ -0,0 +1,328 @@
+"""Declarative resource registry with precompiled SQL.
+
+Each Resource describes one CRUD table: its URL name, primary key, writable
+columns, the columns ?q= searches, the payload schema and the JSON keys
+its responses use. All SQL the handlers run is built here once, when the
+registry is created. UPDATE statements are compiled for every subset of the
+writable columns and looked up by a field-set bitmask; statements with
+variable-length IN lists are compiled on first use and cached per length.
+Reads can be narrowed with ?fields=; the projection is keyed by a bitmask
+over the readable columns in the same way. List statements are compiled per
+shape (search, filters, sort, cursor, limit) on first use, so every filter
+value stays a bound parameter. Shapes and projections come from the query
+string, so both are kept in LRU caches of STATEMENT_CACHE_SIZE entries.
+"""
+import datetime
+import functools
+import math
+
+from paging import encode_cursor
+from validators import ICECREAM, PRODUCT, STUDENT, SUPPLIER
+
+
+FILTER_OPERATORS = (("", "="), ("_min", ">="), ("_max", "<="), ("_gt", ">"), ("_lt", "<"))
+FTS_CANDIDATES = 5000
+STATEMENT_CACHE_SIZE = 1024
+
+
+def placeholders(count):
+    return ', '.join(['%s'] * count)
+
+
+def number(value):
+    """Parse a numeric filter value, rejecting nan and infinities."""
+    value = float(value)
+    if not math.isfinite(value):
+        raise ValueError(value)
+    return value
+
+
+def iso_date(value):
+    """Normalize a YYYY-MM-DD filter value, raising ValueError if it is not one."""
+    return datetime.date.fromisoformat(value).isoformat()
+
+
+class Resource:
+    """One table exposed under /api/<name> and the SQL that serves it."""
+
+    def __init__(self, name, table, pk, schema, search, collection, item, filterable=None, stock=None):
+        self.name = name
+        self.table = table
+        self.pk = pk
+        self.schema = schema
+        self.columns = columns = schema.columns
+        self.search = tuple(search)
+        self.clean = schema.clean
+        self.row = schema.row
+        self.collection = collection
+        self.item = item
+        self.readable = (pk,) + self.columns + ("created_at", "updated_at")
+        self.all_fields = (1 << len(self.readable)) - 1
+        self.stock = stock
+        self.filterable = dict(filterable or {})
+        self.sortable = {pk: int, **self.filterable}
+        self.filter_params = {
+            col + suffix: (convert, f"{col} {op} %s")
+            for col, convert in self.filterable.items()
+            for suffix, op in FILTER_OPERATORS
+        }
+        self._in_cache = {}
+        self._list_statement = functools.lru_cache(maxsize=STATEMENT_CACHE_SIZE)(self._compile_list)
+        self._projection = functools.lru_cache(maxsize=STATEMENT_CACHE_SIZE)(self._compile_projection)
+
+        self.select_sql = f"SELECT * FROM {table} WHERE {pk}=%s"
+        self.insert_sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders(len(columns))})"
+        self.delete_sql = f"DELETE FROM {table} WHERE {pk}=%s"
+        self.update_sql = [None] + [
+            f"UPDATE {table} SET {', '.join(f'{col}=%s' for col in self.columns_for(mask))} WHERE {pk}=%s"
+            for mask in range(1, 1 << len(columns))
+        ]
+
+        match = f"MATCH({', '.join(search)}) AGAINST (%s IN BOOLEAN MODE)"
+        self.like_clause = "(" + " OR ".join(f"{col} LIKE %s" for col in search) + ")"
+        self.fulltext_search_sql = f"SELECT * FROM {table} WHERE {match} ORDER BY {match} DESC, {pk} LIMIT %s"
+        self.like_search_sql = f"SELECT * FROM {table} WHERE {self.like_clause} ORDER BY {pk} LIMIT %s"
+        # Only the first FTS_CANDIDATES matches are ranked: scoring every
+        # row a common term matches costs far more than the lookup itself.
+        # Project it with all_fields at least, or hit and score come back too.
+        self.fts_search_sql = (f"SELECT * FROM {table} JOIN (SELECT hit, score FROM "
+                               f"(SELECT rowid AS hit, rank AS score FROM {table}_search "
+                               f"WHERE {table}_search MATCH %s LIMIT {FTS_CANDIDATES}) "
+                               f"ORDER BY score LIMIT %s) ON {pk} = hit ORDER BY score, {pk}")
+        if stock is not None:
+            # Checks and takes stock in one statement, so concurrent sales
+            # can neither oversell nor overwrite each other.
+            self.decrement_sql = f"UPDATE {table} SET {stock} = {stock} - %s WHERE {pk}=%s AND {stock} >= %s"
+
+        # Rows changed up to a horizon, after nothing, after every row at a
+        # timestamp, or after a (timestamp, pk) position; all served by the
+        # (updated_at, pk) index.
+        changed = f"SELECT * FROM {table} WHERE {{}}updated_at <= %s ORDER BY updated_at, {pk} LIMIT %s"
+        self.changes_sql = {
+            None: changed.format(""),
+            False: changed.format("updated_at > %s AND "),
+            True: changed.format(f"(updated_at > %s OR (updated_at = %s AND {pk} > %s)) AND "),
+        }
+
+        for like in (False, True):
+            for after in (False, True):
+                for limit in (False, True):
+                    self._list_statement(like, (), None, after, limit)
+
+    def _compile_list(self, like, clauses, sort, after, limit):
+        pk = self.pk
+        where = list(clauses)
+        if like:
+            where.insert(0, self.like_clause)
+        if sort is None:
+            if after:
+                where.append(f"{pk} > %s")
+            order = pk
+        else:
+            # NULLs sort first ascending and last descending in MySQL and
+            # SQLite alike; the seek predicate follows that order.
+            col, desc = sort
+            cmp = "<" if desc else ">"
+            if after == "value":
+                seek = f"{col} {cmp} %s OR ({col} = %s AND {pk} {cmp} %s)"
+                where.append(f"({seek} OR {col} IS NULL)" if desc else f"({seek})")
+            elif after == "null":
+                seek = f"{col} IS NULL AND {pk} {cmp} %s"
+                where.append(f"({seek})" if desc else f"({seek} OR {col} IS NOT NULL)")
+            order = f"{col} DESC, {pk} DESC" if desc else f"{col}, {pk}"
+        query = f"SELECT * FROM {self.table}"
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        query += f" ORDER BY {order}"
+        if limit:
+            query += " LIMIT %s"
+        return query
+
+    def list_query(self, q=None, after=None, limit=None, filters=(), sort=None):
+        """Return the keyset list statement and its args.
+
+        Seeks past the cursor instead of using OFFSET: ``pk > after`` by
+        default, or past (value, pk) when sorted, so every page is an index
+        range scan no matter how deep the client pages. filters are the
+        (clause, value) pairs from parse_filters.
+        """
+        args = []
+        if q:
+            args += [f'%{q}%'] * len(self.search)
+        args += [value for _, value in filters]
+        if sort is None:
+            after_kind = after is not None
+            if after_kind:
+                args.append(after)
+        elif after is None:
+            after_kind = None
+        else:
+            value, last_id = after
+            after_kind = "null" if value is None else "value"
+            args += [last_id] if value is None else [value, value, last_id]
+        if limit is not None:
+            args.append(limit)
+        shape = (bool(q), tuple(clause for clause, _ in filters), sort, after_kind, limit is not None)
+        return self._list_statement(*shape), tuple(args)
+
+    def changes_query(self, after, horizon, limit):
+        """Return the statement and args for rows changed after a position, oldest first.
+
+        after is None to start from the beginning, (timestamp, None) once
+        every row up to timestamp has been seen, or (timestamp, pk) partway
+        through the rows sharing a timestamp.
+        """
+        if after is None:
+            return self.changes_sql[None], (horizon, limit)
+        timestamp, last_id = after
+        if last_id is None:
+            return self.changes_sql[False], (timestamp, horizon, limit)
+        return self.changes_sql[True], (timestamp, timestamp, last_id, horizon, limit)
+
+    def parse_list_args(self, args, after):
+        """Read ?fields=, the filter params and ?sort= for a list request.
+
+        Filters are ``col`` (equals), ``col_min``/``col_max`` (inclusive) and
+        ``col_gt``/``col_lt`` on the filterable columns; ?sort=col or
+        ?sort=-col orders by one sortable column. after is the decoded
+        ?cursor=, checked against the sort it was issued for.
+        Returns (fields, filters, sort, after, error).
+        """
+        fields, error = self.parse_fields(args.get('fields'))
+        if error:
+            return None, (), None, None, error
+        filters = []
+        for name, (convert, clause) in self.filter_params.items():
+            raw = args.get(name)
+            if raw is None:
+                continue
+            try:
+                filters.append((clause, convert(raw)))
+            except (TypeError, ValueError):
+                return None, (), None, None, f"invalid value for {name}"
+        sort = None
+        raw_sort = args.get('sort')
+        if raw_sort and raw_sort != self.pk:
+            desc = raw_sort.startswith('-')
+            col = raw_sort[1:] if desc else raw_sort
+            if col not in self.sortable:
+                return None, (), None, None, f"cannot sort by {col}"
+            sort = (col, desc)
+            if fields is not None:
+                fields |= 1 << self.readable.index(col)
+        if after is not None:
+            if sort is None:
+                if isinstance(after, tuple):
+                    return None, (), None, None, "cursor does not match sort"
+            else:
+                if not isinstance(after, tuple) or after[0] != raw_sort:
+                    return None, (), None, None, "cursor does not match sort"
+                value = after[1]
+                try:
+                    value = None if value is None else self.sortable[sort[0]](value)
+                except (TypeError, ValueError):
+                    return None, (), None, None, "invalid cursor"
+                after = (value, after[2])
+        return fields, tuple(filters), sort, after, None
+
+    def next_cursor(self, row, sort=None):
+        """Cursor pointing just past row in a list ordered by sort."""
+        if sort is None:
+            return encode_cursor(row[self.pk])
+        col, desc = sort
+        return encode_cursor([('-' if desc else '') + col, row[col], row[self.pk]])
+
+    def parse_fields(self, raw):
+        """Parse ?fields= into a readable-column bitmask.
+
+        Returns (mask, error); mask is None when every column is wanted. The
+        primary key is always included so cursors and lookups keep working.
+        """
+        if not raw:
+            return None, None
+        mask = 1
+        for name in raw.split(','):
+            name = name.strip()
+            if not name:
+                continue
+            if name not in self.readable:
+                return None, f"unknown field: {name}"
+            mask |= 1 << self.readable.index(name)
+        return mask, None
+
+    def project(self, sql, mask):
+        """Return sql with its ``SELECT *`` narrowed to the columns in mask."""
+        if mask is None:
+            return sql
+        return self._projection(sql, mask)
+
+    def _compile_projection(self, sql, mask):
+        columns = ', '.join(col for bit, col in enumerate(self.readable) if mask >> bit & 1)
+        return sql.replace("SELECT * ", f"SELECT {columns} ", 1)
+
+    def columns_for(self, mask):
+        return [col for bit, col in enumerate(self.columns) if mask >> bit & 1]
+
+    def field_mask(self, fields):
+        """Bitmask of the writable columns present in fields."""
+        mask = 0
+        for bit, col in enumerate(self.columns):
+            if col in fields:
+                mask |= 1 << bit
+        return mask
+
+    def update_query(self, fields, item_id):
+        """Return the precompiled UPDATE for fields and its args, or (None, ()) if nothing is writable."""
+        mask = self.field_mask(fields)
+        if not mask:
+            return None, ()
+        values = [fields[col] for col in self.columns_for(mask)]
+        values.append(item_id)
+        return self.update_sql[mask], tuple(values)
+
+    def _in_statement(self, kind, count, build):
+        key = (kind, count)
+        sql = self._in_cache.get(key)
+        if sql is None:
+            sql = self._in_cache[key] = build(placeholders(count))
+        return sql
+
+    def select_in_sql(self, count):
+        return self._in_statement('select', count,
+                                  lambda ph: f"SELECT * FROM {self.table} WHERE {self.pk} IN ({ph})")
+
+    def ids_in_sql(self, count):
+        return self._in_statement('ids', count,
+                                  lambda ph: f"SELECT {self.pk} FROM {self.table} WHERE {self.pk} IN ({ph})")
+
+    def lock_in_sql(self, count):
+        return self._in_statement('lock', count, lambda ph: self.ids_in_sql(count) + " FOR UPDATE")
+
+    def lock_rows_sql(self, count):
+        return self._in_statement('lock_rows', count, lambda ph: self.select_in_sql(count) + " FOR UPDATE")
+
+    def delete_in_sql(self, count):
+        return self._in_statement('delete', count,
+                                  lambda ph: f"DELETE FROM {self.table} WHERE {self.pk} IN ({ph})")
+
+    def case_update_sql(self, mask, count):
+        """UPDATE setting the mask's columns for count rows with CASE pk WHEN .. THEN .. END."""
+        def build(ph):
+            whens = " ".join(["WHEN %s THEN %s"] * count)
+            sets = ", ".join(f"{col} = CASE {self.pk} {whens} END" for col in self.columns_for(mask))
+            return f"UPDATE {self.table} SET {sets} WHERE {self.pk} IN ({ph})"
+        return self._in_statement(('case', mask), count, build)
+
+
+RESOURCES = [
+    Resource("products", "product", "id", PRODUCT, ("product_name", "category"), "products", "product",
+             {"category": str, "unit": str, "price": number, "quantity": int}, stock="quantity"),
+    Resource("suppliers", "supplier", "id", SUPPLIER, ("supplier_name", "address"), "suppliers", "supplier",
+             {"supplier_name": str, "email": str}),
+    Resource("icecream", "icecream", "id", ICECREAM, ("flavor", "size"), "icecreams", "icecream",
+             {"flavor": str, "size": str, "price": number, "stock": int}, stock="stock"),
+    Resource("students", "students", "student_id", STUDENT, ("student_name", "email"), "students", "student",
+             {"major": str, "email": str, "gpa": number, "enrollment_date": iso_date}),
+]
+
+RESOURCES_BY_NAME = {res.name: res for res in RESOURCES}
@@ -0,0 +1,100 @@
+"""Write-invalidated response cache with ETag / If-None-Match support.
+
+Every table has a version number that write handlers bump after they commit.
+Cached GET bodies remember the version they were built from, so any write to
+a table invalidates all of its cached reads at once without a scan.
+
+Versions live in this process only. A write made through another worker, a
+script or a direct SQL client is not seen here; reads cached before it keep
+being served until their RESPONSE_CACHE_TTL runs out. Keep the TTL as short
+as the staleness you can accept when running more than one process.
+"""
+import functools
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from flask import Response, request
+
+
+def not_modified(etag):
+    """Build an empty 304 response carrying etag."""
+    response = Response(status=304)
+    response.set_etag(etag)
+    return response
+
+
+class ResponseCache:
+    """Bounded LRU of serialized GET responses keyed by (table, path, args)."""
+
+    def __init__(self, max_entries, ttl, max_body):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_body = max_body
+        self._versions = {}
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def version(self, table):
+        return self._versions.get(table, 0)
+
+    def bump(self, table):
+        """Invalidate every cached read of table held by this process."""
+        with self._lock:
+            self._versions[table] = self._versions.get(table, 0) + 1
+
+    def get(self, key, version):
+        """Return the cached (body, content_type, etag) for key, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] != version or entry[1] < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[2:]
+
+    def put(self, key, version, body, content_type, etag):
+        with self._lock:
+            self._entries[key] = (version, time.monotonic() + self.ttl, body, content_type, etag)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def cached(self, table):
+        """Decorate a GET view to serve 304s and repeated reads from memory.
+
+        The ETag is a digest of the body, so it stays valid across worker
+        processes and restarts. A matching If-None-Match is answered without
+        running the view while the cached entry for the request is alive.
+        """
+        def decorator(view):
+            @functools.wraps(view)
+            def wrapper(*args, **kwargs):
+                key = (table, request.path, tuple(sorted(request.args.items(multi=True))))
+                version = self.version(table)
+                hit = self.get(key, version)
+                if hit is not None:
+                    body, content_type, etag = hit
+                    if etag in request.if_none_match:
+                        return not_modified(etag)
+                    response = Response(body, content_type=content_type)
+                    response.set_etag(etag)
+                    return response
+
+                rv = view(*args, **kwargs)
+                response = rv if isinstance(rv, Response) else None
+                if response is None or response.status_code != 200 or response.is_streamed:
+                    return rv
+                body = response.get_data()
+                etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+                if len(body) <= self.max_body:
+                    self.put(key, version, body, response.content_type, etag)
+                if etag in request.if_none_match:
+                    return not_modified(etag)
+                response.set_etag(etag)
+                return response
+            return wrapper
+        return decorator
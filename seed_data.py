@@ -0,0 +1,251 @@
+#!/usr/bin/env python
+"""Fill the API's tables with a large synthetic data set for scale testing.
+
+Rows are generated from --seed: sari-sari store products, suppliers, ice
+cream and students with realistic names, prices, stock levels and dates.
+Generation works in blocks of BLOCK rows, each drawn from its own random
+stream keyed by (seed, table, block), so the same seed and row count always
+produce the same tables, with ids 1..rows, however many workers run.
+
+Worker processes generate blocks in parallel while this process loads them
+through bulk_import's Importer: multi-row INSERTs (or LOAD DATA with
+--method load-data on MySQL) committed chunk by chunk with a checkpoint, so
+an interrupted run repeated with the same arguments resumes where it stopped.
+Secondary indexes are dropped for the load and rebuilt after it
+(--keep-indexes to maintain them row by row), and the inventory summaries
+are rebuilt at the end. Clients of GET /api/<resource>/changes are then
+told to sync the reseeded tables again from scratch.
+
+Usage:
+    python seed_data.py --rows 1000000
+    python seed_data.py --rows 10000000 --tables products,students --workers 8 --method load-data
+    DB_BACKEND=sqlite SQLITE_PATH=scale.db python seed_data.py --rows 100000
+
+Seeding replaces the contents of the tables it fills. --init first creates
+the database and schema with init_db.py; SQLite databases are created on
+first use anyway.
+"""
+import argparse
+import collections
+import datetime
+import itertools
+import multiprocessing
+import os
+import random
+import sys
+
+from bulk_import import Checkpoint, Importer, print_progress
+from config import Config
+from resources import RESOURCES_BY_NAME
+import storage
+
+BLOCK = 10000
+MAX_ROWS = 10_000_000
+
+FIRST_NAMES = ('Juan', 'Maria', 'Jose', 'Ana', 'Pedro', 'Sofia', 'Miguel', 'Andrea', 'Mark', 'Angelica',
+               'John Paul', 'Kristine', 'Carlo', 'Patricia', 'Rafael', 'Camille', 'Paolo', 'Nicole',
+               'Gabriel', 'Bea', 'Luis', 'Jasmine', 'Ramon', 'Liza', 'Enrique', 'Trisha')
+LAST_NAMES = ('Dela Cruz', 'Santos', 'Reyes', 'Cruz', 'Bautista', 'Garcia', 'Mendoza', 'Ramos', 'Aquino',
+              'Castillo', 'Villanueva', 'Rivera', 'Flores', 'Gonzales', 'Torres', 'Navarro', 'Domingo',
+              'Salazar', 'Pascual', 'Manalo', 'Mercado', 'Soriano', 'Lim', 'Tan')
+CITIES = ('Manila', 'Quezon City', 'Pasig City', 'Makati City', 'Marikina City', 'Caloocan City',
+          'Taguig City', 'Cebu City', 'Davao City', 'Iloilo City', 'Bacolod City', 'Baguio City')
+STREETS = ('Rizal', 'Mabini', 'Bonifacio', 'Luna', 'Aguinaldo', 'Del Pilar', 'Burgos', 'Quezon', 'Magsaysay')
+
+# (category, unit, base price, item names); the categories match the sample data.
+CATALOG = (
+    ('Food', 'can', 28.0, ('Canned Sardines', 'Corned Beef', 'Tuna Flakes', 'Vienna Sausage', 'Meat Loaf')),
+    ('Food', 'pack', 16.0, ('Instant Noodles', 'Pancit Canton', 'Cup Noodles', 'Spaghetti Pasta')),
+    ('Food', 'piece', 6.0, ('Pandesal', 'Bread Loaf', 'Ensaymada', 'Egg')),
+    ('Drinks', 'bottle', 22.0, ('Cola', 'Lemon Soda', 'Iced Tea', 'Mineral Water', 'Orange Juice')),
+    ('Drinks', 'can', 40.0, ('Energy Drink', 'Beer', 'Lemon Soda', 'Cola')),
+    ('Drinks', 'sachet', 8.0, ('3-in-1 Coffee', 'Powdered Juice', 'Chocolate Drink', 'Milk Powder')),
+    ('Snacks', 'pack', 18.0, ('Potato Chips', 'Prawn Crackers', 'Cheese Curls', 'Biscuits', 'Peanuts',
+                              'Chocolate Wafer', 'Corn Chips')),
+    ('Snacks', 'piece', 3.0, ('Candy', 'Lollipop', 'Chewing Gum', 'Polvoron')),
+    ('Toiletries', 'sachet', 9.0, ('Shampoo', 'Conditioner', 'Laundry Detergent', 'Fabric Softener',
+                                   'Dishwashing Liquid', 'Toothpaste')),
+    ('Toiletries', 'piece', 24.0, ('Bath Soap', 'Toothbrush', 'Razor', 'Sanitary Pads')),
+    ('Goods', 'kg', 52.0, ('Rice', 'Sugar', 'Salt', 'Flour', 'Mongo Beans')),
+    ('Goods', 'bottle', 30.0, ('Cooking Oil', 'Soy Sauce', 'Vinegar', 'Fish Sauce', 'Banana Ketchup')),
+    ('Goods', 'piece', 12.0, ('Candle', 'Matches', 'Battery', 'Plastic Bag')),
+)
+VARIANTS = (('', 1.0), ('Small', 0.6), ('Large', 1.7), ('Family Size', 2.8), ('Value Pack', 4.5))
+BRANDS = ('Juan\'s', 'Golden', 'Sampaguita', 'Bayani', 'Masagana', 'Tindahan', 'Pinoy', 'Island', 'Sunrise')
+
+ICECREAM_BRANDS = ('Selecta', 'Magnolia', 'Nestle', 'Arce Dairy', 'Carabao')
+ICECREAM_FLAVORS = ('Ube', 'Mango Graham', 'Cookies & Cream', 'Rocky Road', 'Double Dutch', 'Cheese',
+                    'Super Thick Chocolate', 'Vanilla', 'Buko Pandan', 'Strawberry', 'Coffee Crumble',
+                    'Avocado', 'Queso Real', 'Dulce de Leche', 'Halo-Halo')
+ICECREAM_SIZES = (('1.3L', 160.0), ('750ml', 90.0), ('100ml Cup', 25.0), ('Cone', 30.0), ('80ml Bar', 65.0))
+
+SUPPLIER_KINDS = ('Trading', 'Wholesale', 'Distributors', 'Enterprises', 'General Merchandise', 'Supply Co.')
+MAJORS = ('Computer Science', 'Information Technology', 'Mathematics', 'Physics', 'Business Administration',
+          'Accountancy', 'Nursing', 'Civil Engineering', 'Psychology', 'Education')
+
+
+def price(value):
+    return f'{max(value, 1.0):.2f}'
+
+
+def stock(rng, mean):
+    """Skewed stock levels with some items sold out."""
+    return 0 if rng.random() < 0.05 else min(int(rng.expovariate(1 / mean)), 9999)
+
+
+def person(rng):
+    return f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}'
+
+
+def mobile(rng):
+    return f'09{rng.randrange(10 ** 9):09d}'
+
+
+def product_row(rng, i):
+    category, unit, base, names = rng.choice(CATALOG)
+    variant, scale = rng.choice(VARIANTS)
+    name = ' '.join(part for part in (rng.choice(BRANDS), rng.choice(names), variant) if part)
+    description = '' if rng.random() < 0.5 else f'{category} item sold per {unit}'
+    return (name, category, unit, price(base * scale * rng.uniform(0.8, 1.3)), stock(rng, 80), description)
+
+
+def supplier_row(rng, i):
+    name = f'{rng.choice(LAST_NAMES)} {rng.choice(SUPPLIER_KINDS)}'
+    contact = person(rng)
+    address = f'{rng.randint(1, 999)} {rng.choice(STREETS)} St., {rng.choice(CITIES)}'
+    slug = ''.join(char for char in name.lower() if char.isalnum())
+    return (name, mobile(rng), address, contact, mobile(rng), f'{slug}{i}@example.com')
+
+
+def icecream_row(rng, i):
+    size, base = rng.choice(ICECREAM_SIZES)
+    flavor = rng.choice(ICECREAM_FLAVORS)
+    return (f'{rng.choice(ICECREAM_BRANDS)} {flavor}', size, price(base * rng.uniform(0.9, 1.2)),
+            stock(rng, 25), f'{flavor} ice cream, {size}')
+
+
+def student_row(rng, i):
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    # The row number keeps students.email unique.
+    email = f"{first.replace(' ', '').lower()}.{last.replace(' ', '').lower()}{i}@student.example.edu"
+    gpa = min(max(rng.gauss(2.9, 0.5), 1.0), 4.0)
+    enrolled = datetime.date(2015, 6, 1) + datetime.timedelta(days=rng.randrange(3650))
+    return (f'{first} {last}', email, rng.choice(MAJORS), f'{gpa:.2f}', enrolled.isoformat())
+
+
+GENERATORS = {
+    'product': product_row,
+    'supplier': supplier_row,
+    'icecream': icecream_row,
+    'students': student_row,
+}
+
+
+def generate_block(table, seed, index, start, stop, block=BLOCK):
+    """Rows start..stop-1 of table, which lie in block number index, as tuples in column order.
+
+    The block's random stream is drawn from its first row, so a block cut
+    short by a resume point yields the same rows as the full block.
+    """
+    rng = random.Random(f'{seed}:{table}:{index}')
+    row = GENERATORS[table]
+    first = index * block
+    rows = [row(rng, i + 1) for i in range(first, stop)]
+    return rows[start - first:]
+
+
+def produce(table, seed, rows, start=0, workers=1, block=BLOCK):
+    """Yield table's rows start..rows-1 a block at a time, generated by workers processes."""
+    ranges = [(index, max(index * block, start), min((index + 1) * block, rows))
+              for index in range(start // block, -(-rows // block))]
+    if workers <= 1:
+        for index, first, stop in ranges:
+            yield generate_block(table, seed, index, first, stop, block)
+        return
+    with multiprocessing.Pool(workers) as pool:
+        # At most two blocks per worker wait in memory for the loader.
+        pending = collections.deque()
+        for index, first, stop in ranges:
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().get()
+            pending.append(pool.apply_async(generate_block, (table, seed, index, first, stop, block)))
+        while pending:
+            yield pending.popleft().get()
+
+
+class Seeder(Importer):
+    """An Importer for generated rows, which are valid by construction."""
+
+    def row(self, record):
+        return record, None
+
+
+def seed_table(backend, conn, res, rows, seed, workers=1, chunk_size=5000, method='insert',
+               defer_indexes=True, restart=False, report=None):
+    """Replace res's table with rows generated rows; returns the rows loaded by this call."""
+    checkpoint = Checkpoint(f'seed:{res.table}:{seed}:{rows}', res.table)
+    if restart:
+        cur = conn.cursor()
+        checkpoint.delete(cur)
+        conn.commit()
+        cur.close()
+
+    def records():
+        # The importer skips positions up to the checkpoint; placeholders
+        # keep them aligned without generating those rows again.
+        yield from itertools.repeat(None, checkpoint.position)
+        for block in produce(res.table, seed, rows, checkpoint.position, workers):
+            yield from block
+
+    seeder = Seeder(backend, conn, res, chunk_size, method, report=report)
+    return seeder.run(records(), checkpoint, truncate=True, defer_indexes=defer_indexes)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1000, help=f'rows per table (1 to {MAX_ROWS:,})')
+    parser.add_argument('--seed', type=int, default=1, help='random seed; the same seed gives the same data')
+    parser.add_argument('--tables', default=','.join(RESOURCES_BY_NAME),
+                        help='comma-separated resources to fill (default: all)')
+    parser.add_argument('--workers', type=int, default=max(1, (os.cpu_count() or 2) - 1),
+                        help='generator processes (default: CPUs - 1)')
+    parser.add_argument('--chunk-size', type=int, default=5000, help='rows per transaction')
+    parser.add_argument('--method', choices=('insert', 'load-data'), default='insert')
+    parser.add_argument('--keep-indexes', action='store_true', help='do not drop secondary indexes while loading')
+    parser.add_argument('--init', action='store_true', help='create the database with init_db.py first')
+    parser.add_argument('--restart', action='store_true', help='discard saved checkpoints and start over')
+    parser.add_argument('--quiet', action='store_true', help='print only the final summaries')
+    opts = parser.parse_args(argv)
+
+    if not 1 <= opts.rows <= MAX_ROWS:
+        parser.error(f'--rows must be between 1 and {MAX_ROWS:,}')
+    if opts.chunk_size < 1 or opts.workers < 1:
+        parser.error('--chunk-size and --workers must be positive')
+    names = [name.strip() for name in opts.tables.split(',') if name.strip()]
+    unknown = [name for name in names if name not in RESOURCES_BY_NAME]
+    if unknown or not names:
+        parser.error(f"--tables must name resources from: {', '.join(RESOURCES_BY_NAME)}")
+    if opts.init:
+        import init_db
+        if init_db.main():
+            return 1
+    backend = storage.create_backend(Config)
+    if opts.method == 'load-data' and backend.load_data is None:
+        parser.error(f'--method load-data needs DB_BACKEND=mysql, not {backend.name}')
+
+    conn = backend.connect(local_infile=1) if opts.method == 'load-data' else backend.connect()
+    try:
+        for name in names:
+            res = RESOURCES_BY_NAME[name]
+            print(f'seeding {opts.rows:,} {res.table} rows (seed {opts.seed})', file=sys.stderr)
+            seed_table(backend, conn, res, opts.rows, opts.seed, opts.workers, opts.chunk_size, opts.method,
+                       not opts.keep_indexes, opts.restart or opts.init, print_progress if not opts.quiet else None)
+            if opts.quiet:
+                print(f'seeded {opts.rows:,} rows into {res.table}', file=sys.stderr)
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
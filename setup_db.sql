@@ -11,7 +11,13 @@ CREATE TABLE IF NOT EXISTS product (
     price DECIMAL(10, 2) DEFAULT 0.00,
     quantity INT DEFAULT 0,
     description TEXT,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    KEY idx_product_updated_at (updated_at, id),
+    KEY idx_product_category_price (category, price),
+    KEY idx_product_price (price),
+    KEY idx_product_quantity (quantity),
+    FULLTEXT KEY ft_product_search (product_name, category) WITH PARSER ngram
 );
 
 -- Fix 2: Correct supplier table structure
@@ -23,7 +29,11 @@ CREATE TABLE IF NOT EXISTS supplier (
     contact_person VARCHAR(255),
     phone VARCHAR(20),
     email VARCHAR(255),
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    KEY idx_supplier_updated_at (updated_at, id),
+    KEY idx_supplier_email (email),
+    FULLTEXT KEY ft_supplier_search (supplier_name, address) WITH PARSER ngram
 );
 
 -- Fix 3: Correct icecream table structure
@@ -34,7 +44,83 @@ CREATE TABLE IF NOT EXISTS icecream (
     price DECIMAL(10, 2) NOT NULL,
     stock INT NOT NULL DEFAULT 0,
     description TEXT,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    KEY idx_icecream_updated_at (updated_at, id),
+    KEY idx_icecream_size_price (size, price),
+    KEY idx_icecream_price (price),
+    KEY idx_icecream_stock (stock),
+    FULLTEXT KEY ft_icecream_search (flavor, size) WITH PARSER ngram
+);
+
+-- Students table used by /api/students
+CREATE TABLE IF NOT EXISTS students (
+    student_id INT AUTO_INCREMENT PRIMARY KEY,
+    student_name VARCHAR(255) NOT NULL,
+    email VARCHAR(255) NOT NULL,
+    major VARCHAR(255),
+    gpa DECIMAL(3, 2) DEFAULT 0.00,
+    enrollment_date DATE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    KEY idx_students_updated_at (updated_at, student_id),
+    UNIQUE KEY uq_students_email (email),
+    KEY idx_students_major_gpa (major, gpa),
+    FULLTEXT KEY ft_students_search (student_name, email) WITH PARSER ngram
+);
+
+-- Per-group inventory totals kept by the write handlers (analytics.py).
+-- stock_value sums price (under 10^8) * quantity (under 2^31) over up to
+-- 2^31 rows, so it needs 27 integer digits.
+CREATE TABLE IF NOT EXISTS product_category_summary (
+    category VARCHAR(50) PRIMARY KEY,
+    products INT NOT NULL DEFAULT 0,
+    units BIGINT NOT NULL DEFAULT 0,
+    stock_value DECIMAL(30, 2) NOT NULL DEFAULT 0.00
+);
+
+CREATE TABLE IF NOT EXISTS icecream_size_summary (
+    size VARCHAR(50) PRIMARY KEY,
+    flavors INT NOT NULL DEFAULT 0,
+    units BIGINT NOT NULL DEFAULT 0,
+    stock_value DECIMAL(30, 2) NOT NULL DEFAULT 0.00
+);
+
+-- Databases created when stock_value was DECIMAL(16, 2)
+ALTER TABLE product_category_summary MODIFY stock_value DECIMAL(30, 2) NOT NULL DEFAULT 0.00;
+ALTER TABLE icecream_size_summary MODIFY stock_value DECIMAL(30, 2) NOT NULL DEFAULT 0.00;
+
+-- Deleted row ids for GET /api/<resource>/changes (changes.py)
+CREATE TABLE IF NOT EXISTS tombstones (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    table_name VARCHAR(64) NOT NULL,
+    row_id INT NOT NULL,
+    deleted_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6),
+    KEY idx_tombstones_table_deleted_at (table_name, deleted_at, id),
+    KEY idx_tombstones_deleted_at (deleted_at)
+);
+
+-- Bumped when a table's rows are replaced wholesale; refuses older /changes tokens
+CREATE TABLE IF NOT EXISTS sync_generations (
+    table_name VARCHAR(64) PRIMARY KEY,
+    generation INT NOT NULL DEFAULT 0
+);
+
+-- Revoked access tokens by jti, until their exp (POST /logout, jwt_cache.py)
+CREATE TABLE IF NOT EXISTS revoked_tokens (
+    jti VARCHAR(64) PRIMARY KEY,
+    expires_at BIGINT,
+    KEY idx_revoked_tokens_expires_at (expires_at)
+);
+
+-- Progress of bulk_import.py runs, committed with each chunk
+CREATE TABLE IF NOT EXISTS import_checkpoints (
+    name VARCHAR(255) PRIMARY KEY,
+    table_name VARCHAR(64) NOT NULL,
+    position BIGINT NOT NULL DEFAULT 0,
+    rows_loaded BIGINT NOT NULL DEFAULT 0,
+    deferred_indexes TEXT,
+    updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6)
 );
 
 -- Clear existing data
@@ -108,6 +194,23 @@ INSERT INTO icecream (flavor, size, price, stock, description) VALUES
 ('Selecta Magnum Almond', '80ml Bar', 70.00, 20, 'Magnum with almonds'),
 ('Selecta Magnum Infinity Chocolate', '80ml Bar', 75.00, 18, 'Infinite chocolate layers');
 
+-- Rebuild the inventory summaries from the rows above
+DELETE FROM product_category_summary;
+INSERT INTO product_category_summary (category, products, units, stock_value)
+SELECT category, COUNT(*), COALESCE(SUM(quantity), 0), COALESCE(SUM(quantity * price), 0)
+FROM product GROUP BY category;
+DELETE FROM icecream_size_summary;
+INSERT INTO icecream_size_summary (size, flavors, units, stock_value)
+SELECT size, COUNT(*), COALESCE(SUM(stock), 0), COALESCE(SUM(stock * price), 0)
+FROM icecream GROUP BY size;
+
+-- The tables above were reloaded: start a new sync generation for each, so
+-- /changes clients sync from scratch, and drop the old delete markers
+INSERT INTO sync_generations (table_name, generation)
+VALUES ('product', 1), ('supplier', 1), ('icecream', 1), ('students', 1)
+ON DUPLICATE KEY UPDATE generation = generation + 1;
+TRUNCATE TABLE tombstones;
+
 -- Verify the data
 SELECT 'Database setup completed!' as message;
 SELECT 'Products:' as table_name, COUNT(*) as count FROM product
@@ -0,0 +1,272 @@
+-- SQLite version of setup_db.sql for DB_BACKEND=sqlite.
+-- Same tables, columns, indexes and sample rows. storage.SQLiteBackend runs
+-- the statements above the sample-data marker on every start (they are all
+-- IF NOT EXISTS) and the sample rows once, when the product table is new.
+-- SQLite has no FULLTEXT indexes, so ?q= searches use the in-process index
+-- instead. It has no ON UPDATE CURRENT_TIMESTAMP either; triggers bump
+-- updated_at.
+
+CREATE TABLE IF NOT EXISTS product (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    product_name VARCHAR(255) NOT NULL,
+    category VARCHAR(50) NOT NULL,
+    unit VARCHAR(20) NOT NULL,
+    price DECIMAL(10, 2) DEFAULT 0.00,
+    quantity INT DEFAULT 0,
+    description TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP NOT NULL DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now'))
+);
+CREATE INDEX IF NOT EXISTS idx_product_updated_at ON product (updated_at, id);
+CREATE INDEX IF NOT EXISTS idx_product_category_price ON product (category, price);
+CREATE INDEX IF NOT EXISTS idx_product_price ON product (price);
+CREATE INDEX IF NOT EXISTS idx_product_quantity ON product (quantity);
+CREATE TRIGGER IF NOT EXISTS product_updated_at AFTER UPDATE ON product
+FOR EACH ROW WHEN NEW.updated_at IS OLD.updated_at
+BEGIN
+    UPDATE product SET updated_at = strftime('%Y-%m-%d %H:%M:%f', 'now') WHERE id = NEW.id;
+END;
+
+CREATE TABLE IF NOT EXISTS supplier (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    supplier_name VARCHAR(255) NOT NULL,
+    contact_number VARCHAR(20) NOT NULL,
+    address TEXT NOT NULL,
+    contact_person VARCHAR(255),
+    phone VARCHAR(20),
+    email VARCHAR(255),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP NOT NULL DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now'))
+);
+CREATE INDEX IF NOT EXISTS idx_supplier_updated_at ON supplier (updated_at, id);
+CREATE INDEX IF NOT EXISTS idx_supplier_email ON supplier (email);
+CREATE TRIGGER IF NOT EXISTS supplier_updated_at AFTER UPDATE ON supplier
+FOR EACH ROW WHEN NEW.updated_at IS OLD.updated_at
+BEGIN
+    UPDATE supplier SET updated_at = strftime('%Y-%m-%d %H:%M:%f', 'now') WHERE id = NEW.id;
+END;
+
+CREATE TABLE IF NOT EXISTS icecream (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    flavor VARCHAR(255) NOT NULL,
+    size VARCHAR(50) NOT NULL,
+    price DECIMAL(10, 2) NOT NULL,
+    stock INT NOT NULL DEFAULT 0,
+    description TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP NOT NULL DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now'))
+);
+CREATE INDEX IF NOT EXISTS idx_icecream_updated_at ON icecream (updated_at, id);
+CREATE INDEX IF NOT EXISTS idx_icecream_size_price ON icecream (size, price);
+CREATE INDEX IF NOT EXISTS idx_icecream_price ON icecream (price);
+CREATE INDEX IF NOT EXISTS idx_icecream_stock ON icecream (stock);
+CREATE TRIGGER IF NOT EXISTS icecream_updated_at AFTER UPDATE ON icecream
+FOR EACH ROW WHEN NEW.updated_at IS OLD.updated_at
+BEGIN
+    UPDATE icecream SET updated_at = strftime('%Y-%m-%d %H:%M:%f', 'now') WHERE id = NEW.id;
+END;
+
+CREATE TABLE IF NOT EXISTS students (
+    student_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    student_name VARCHAR(255) NOT NULL,
+    email VARCHAR(255) NOT NULL,
+    major VARCHAR(255),
+    gpa DECIMAL(3, 2) DEFAULT 0.00,
+    enrollment_date DATE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP NOT NULL DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now'))
+);
+CREATE INDEX IF NOT EXISTS idx_students_updated_at ON students (updated_at, student_id);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_students_email ON students (email);
+CREATE INDEX IF NOT EXISTS idx_students_major_gpa ON students (major, gpa);
+CREATE TRIGGER IF NOT EXISTS students_updated_at AFTER UPDATE ON students
+FOR EACH ROW WHEN NEW.updated_at IS OLD.updated_at
+BEGIN
+    UPDATE students SET updated_at = strftime('%Y-%m-%d %H:%M:%f', 'now') WHERE student_id = NEW.student_id;
+END;
+
+-- Substring search for ?q= (main.py search_rows): one FTS5 trigram index per
+-- table over its search columns, kept in step by triggers. It stands in for
+-- the FULLTEXT ngram indexes of setup_db.sql.
+CREATE VIRTUAL TABLE IF NOT EXISTS product_search USING fts5(
+    product_name, category, content='product', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS product_search_insert AFTER INSERT ON product
+BEGIN
+    INSERT INTO product_search (rowid, product_name, category) VALUES (NEW.id, NEW.product_name, NEW.category);
+END;
+CREATE TRIGGER IF NOT EXISTS product_search_delete AFTER DELETE ON product
+BEGIN
+    INSERT INTO product_search (product_search, rowid, product_name, category) VALUES ('delete', OLD.id, OLD.product_name, OLD.category);
+END;
+CREATE TRIGGER IF NOT EXISTS product_search_update AFTER UPDATE OF product_name, category ON product
+BEGIN
+    INSERT INTO product_search (product_search, rowid, product_name, category) VALUES ('delete', OLD.id, OLD.product_name, OLD.category);
+    INSERT INTO product_search (rowid, product_name, category) VALUES (NEW.id, NEW.product_name, NEW.category);
+END;
+CREATE VIRTUAL TABLE IF NOT EXISTS supplier_search USING fts5(
+    supplier_name, address, content='supplier', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS supplier_search_insert AFTER INSERT ON supplier
+BEGIN
+    INSERT INTO supplier_search (rowid, supplier_name, address) VALUES (NEW.id, NEW.supplier_name, NEW.address);
+END;
+CREATE TRIGGER IF NOT EXISTS supplier_search_delete AFTER DELETE ON supplier
+BEGIN
+    INSERT INTO supplier_search (supplier_search, rowid, supplier_name, address) VALUES ('delete', OLD.id, OLD.supplier_name, OLD.address);
+END;
+CREATE TRIGGER IF NOT EXISTS supplier_search_update AFTER UPDATE OF supplier_name, address ON supplier
+BEGIN
+    INSERT INTO supplier_search (supplier_search, rowid, supplier_name, address) VALUES ('delete', OLD.id, OLD.supplier_name, OLD.address);
+    INSERT INTO supplier_search (rowid, supplier_name, address) VALUES (NEW.id, NEW.supplier_name, NEW.address);
+END;
+CREATE VIRTUAL TABLE IF NOT EXISTS icecream_search USING fts5(
+    flavor, size, content='icecream', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS icecream_search_insert AFTER INSERT ON icecream
+BEGIN
+    INSERT INTO icecream_search (rowid, flavor, size) VALUES (NEW.id, NEW.flavor, NEW.size);
+END;
+CREATE TRIGGER IF NOT EXISTS icecream_search_delete AFTER DELETE ON icecream
+BEGIN
+    INSERT INTO icecream_search (icecream_search, rowid, flavor, size) VALUES ('delete', OLD.id, OLD.flavor, OLD.size);
+END;
+CREATE TRIGGER IF NOT EXISTS icecream_search_update AFTER UPDATE OF flavor, size ON icecream
+BEGIN
+    INSERT INTO icecream_search (icecream_search, rowid, flavor, size) VALUES ('delete', OLD.id, OLD.flavor, OLD.size);
+    INSERT INTO icecream_search (rowid, flavor, size) VALUES (NEW.id, NEW.flavor, NEW.size);
+END;
+CREATE VIRTUAL TABLE IF NOT EXISTS students_search USING fts5(
+    student_name, email, content='students', content_rowid='student_id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS students_search_insert AFTER INSERT ON students
+BEGIN
+    INSERT INTO students_search (rowid, student_name, email) VALUES (NEW.student_id, NEW.student_name, NEW.email);
+END;
+CREATE TRIGGER IF NOT EXISTS students_search_delete AFTER DELETE ON students
+BEGIN
+    INSERT INTO students_search (students_search, rowid, student_name, email) VALUES ('delete', OLD.student_id, OLD.student_name, OLD.email);
+END;
+CREATE TRIGGER IF NOT EXISTS students_search_update AFTER UPDATE OF student_name, email ON students
+BEGIN
+    INSERT INTO students_search (students_search, rowid, student_name, email) VALUES ('delete', OLD.student_id, OLD.student_name, OLD.email);
+    INSERT INTO students_search (rowid, student_name, email) VALUES (NEW.student_id, NEW.student_name, NEW.email);
+END;
+
+-- Per-group inventory totals kept by the write handlers (analytics.py)
+CREATE TABLE IF NOT EXISTS product_category_summary (
+    category VARCHAR(50) PRIMARY KEY,
+    products INT NOT NULL DEFAULT 0,
+    units BIGINT NOT NULL DEFAULT 0,
+    stock_value DECIMAL(30, 2) NOT NULL DEFAULT 0.00
+);
+
+CREATE TABLE IF NOT EXISTS icecream_size_summary (
+    size VARCHAR(50) PRIMARY KEY,
+    flavors INT NOT NULL DEFAULT 0,
+    units BIGINT NOT NULL DEFAULT 0,
+    stock_value DECIMAL(30, 2) NOT NULL DEFAULT 0.00
+);
+
+-- Deleted row ids for GET /api/<resource>/changes (changes.py)
+CREATE TABLE IF NOT EXISTS tombstones (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    table_name VARCHAR(64) NOT NULL,
+    row_id INT NOT NULL,
+    deleted_at TIMESTAMP NOT NULL DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now'))
+);
+CREATE INDEX IF NOT EXISTS idx_tombstones_table_deleted_at ON tombstones (table_name, deleted_at, id);
+CREATE INDEX IF NOT EXISTS idx_tombstones_deleted_at ON tombstones (deleted_at);
+
+-- Bumped when a table's rows are replaced wholesale; refuses older /changes tokens
+CREATE TABLE IF NOT EXISTS sync_generations (
+    table_name VARCHAR(64) PRIMARY KEY,
+    generation INT NOT NULL DEFAULT 0
+);
+
+-- Revoked access tokens by jti, until their exp (POST /logout, jwt_cache.py)
+CREATE TABLE IF NOT EXISTS revoked_tokens (
+    jti VARCHAR(64) PRIMARY KEY,
+    expires_at BIGINT
+);
+CREATE INDEX IF NOT EXISTS idx_revoked_tokens_expires_at ON revoked_tokens (expires_at);
+
+-- Progress of bulk_import.py runs, committed with each chunk
+CREATE TABLE IF NOT EXISTS import_checkpoints (
+    name VARCHAR(255) PRIMARY KEY,
+    table_name VARCHAR(64) NOT NULL,
+    position BIGINT NOT NULL DEFAULT 0,
+    rows_loaded BIGINT NOT NULL DEFAULT 0,
+    deferred_indexes TEXT,
+    updated_at TIMESTAMP NOT NULL DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now'))
+);
+
+-- Sample data
+-- Loaded only when the database is first created.
+
+-- Insert product data (matches your INSERT statement)
+INSERT INTO product (product_name, category, unit, price, quantity) VALUES
+('Sachet Shampoo', 'Toiletries', 'sachet', 10.00, 100),
+('Laundry Detergent', 'Toiletries', 'sachet', 15.00, 80),
+('Bath Soap', 'Toiletries', 'piece', 20.00, 150),
+('Toothpaste Sachet', 'Toiletries', 'sachet', 8.00, 120),
+('Instant Noodles', 'Food', 'pack', 12.00, 200),
+('Canned Sardines', 'Food', 'can', 25.00, 100),
+('Canned Tuna', 'Food', 'can', 35.00, 80),
+('Hotdog Pack', 'Food', 'pack', 50.00, 60),
+('Bread Loaf', 'Food', 'piece', 40.00, 50),
+('Bottled Water 500ml', 'Drinks', 'bottle', 15.00, 300),
+('Soft Drink 1L', 'Drinks', 'bottle', 55.00, 150),
+('Energy Drink', 'Drinks', 'can', 45.00, 100),
+('Instant Coffee Sachet', 'Drinks', 'sachet', 10.00, 250),
+('Sugar 1kg', 'Goods', 'bag', 60.00, 80),
+('Rice 1kg', 'Goods', 'kg', 50.00, 200),
+('Cooking Oil 500ml', 'Goods', 'bottle', 70.00, 90),
+('Corned Beef Can', 'Food', 'can', 45.00, 70),
+('Biscuits Small Pack', 'Snacks', 'pack', 25.00, 120),
+('Potato Chips', 'Snacks', 'pack', 30.00, 100),
+('Chocolate Bar', 'Snacks', 'piece', 35.00, 150);
+
+-- Insert supplier data (fixed column names)
+INSERT INTO supplier (supplier_name, contact_number, address, contact_person, phone, email) VALUES
+('ABC Distributors', '09123456789', 'Quezon City', 'Juan Dela Cruz', '09123456789', 'abc@distributors.com'),
+('FreshFoods Supply Co.', '09987654321', 'Makati City', 'Maria Santos', '09987654321', 'freshfoods@supply.com'),
+('Daily Essentials Trading', '09223334455', 'Pasig City', 'Pedro Reyes', '09223334455', 'daily@essentials.com'),
+('Beverage Masters Inc.', '09112223344', 'Taguig City', 'Ana Torres', '09112223344', 'beverage@masters.com'),
+('Snacks Unlimited', '09334445566', 'Caloocan City', 'Luis Gomez', '09334445566', 'snacks@unlimited.com'),
+('GoodGoods Wholesale', '09175553322', 'Manila', 'Sofia Cruz', '09175553322', 'goodgoods@wholesale.com'),
+('FastFood Products', '09556667788', 'Pasay City', 'Carlos Lim', '09556667788', 'fastfood@products.com'),
+('TopChoice Retail Supply', '09443332211', 'Valenzuela City', 'Elena Tan', '09443332211', 'topchoice@retail.com'),
+('Household Basics', '09221110099', 'Marikina City', 'Miguel Rivera', '09221110099', 'household@basics.com'),
+('MegaDrinks Distributor', '09776655443', 'Mandaluyong City', 'Isabel Wong', '09776655443', 'megadrinks@distributor.com');
+
+-- Insert icecream data (added size column)
+INSERT INTO icecream (flavor, size, price, stock, description) VALUES
+('Selecta Super Thick Chocolate', '1.3L', 160.00, 12, 'Rich chocolate ice cream'),
+('Selecta Very Strawberry', '1.3L', 160.00, 10, 'Fresh strawberry flavor'),
+('Selecta Cookies & Cream', '1.3L', 165.00, 8, 'Cookies and cream delight'),
+('Selecta Rocky Road', '1.3L', 170.00, 7, 'Chocolate with nuts and marshmallows'),
+('Selecta Double Dutch', '1.3L', 165.00, 9, 'Double chocolate goodness'),
+('Selecta Ube Keso', '1.3L', 165.00, 11, 'Ube and cheese combination'),
+('Selecta Mango Graham', '1.3L', 175.00, 6, 'Mango with graham crackers'),
+('Selecta Choco Mallow', '750ml', 85.00, 15, 'Chocolate with marshmallows'),
+('Selecta Cookies & Cream', '750ml', 90.00, 14, 'Smaller cookies and cream'),
+('Selecta Coffee Crumble', '750ml', 90.00, 12, 'Coffee flavor with crumbles'),
+('Selecta Vanilla', '100ml Cup', 25.00, 35, 'Classic vanilla'),
+('Selecta Chocolate', '100ml Cup', 25.00, 30, 'Classic chocolate'),
+('Selecta Ube', '100ml Cup', 25.00, 28, 'Purple yam flavor'),
+('Selecta Keso', '100ml Cup', 25.00, 25, 'Cheese flavor'),
+('Selecta Cornetto Chocolate', 'Cone', 30.00, 40, 'Chocolate cone'),
+('Selecta Cornetto Cookies & Cream', 'Cone', 30.00, 38, 'Cookies and cream cone'),
+('Selecta Cornetto Black & White', 'Cone', 35.00, 32, 'Black and white chocolate cone'),
+('Selecta Magnum Classic', '80ml Bar', 65.00, 22, 'Classic Magnum bar'),
+('Selecta Magnum Almond', '80ml Bar', 70.00, 20, 'Magnum with almonds'),
+('Selecta Magnum Infinity Chocolate', '80ml Bar', 75.00, 18, 'Infinite chocolate layers');
+
+-- Build the inventory summaries from the rows above
+INSERT INTO product_category_summary (category, products, units, stock_value)
+SELECT category, COUNT(*), COALESCE(SUM(quantity), 0), COALESCE(SUM(quantity * price), 0)
+FROM product GROUP BY category;
+INSERT INTO icecream_size_summary (size, flavors, units, stock_value)
+SELECT size, COUNT(*), COALESCE(SUM(stock), 0), COALESCE(SUM(stock * price), 0)
+FROM icecream GROUP BY size;
@@ -0,0 +1,145 @@
+"""Slow-query log with one EXPLAIN plan per query shape.
+
+The storage backend calls ``SlowQueryLog.observe`` after every statement with
+its duration. Statements at or above the threshold are logged and kept in a
+ring buffer of the last ``size`` entries. The first time a query shape turns
+up slow, its plan is captured with the backend's EXPLAIN on a dedicated
+connection, so the caller's transaction and any unbuffered cursor are left
+alone.
+
+Shapes are the statement text with whitespace collapsed and placeholder
+lists folded, so ``IN (%s, %s)`` and ``IN (%s, %s, %s)`` share a plan.
+"""
+import collections
+import datetime
+import logging
+import re
+import threading
+
+logger = logging.getLogger(__name__)
+
+PLACEHOLDER_LIST = re.compile(r'%s(?:\s*,\s*%s)+')
+WHEN_LIST = re.compile(r'(WHEN %s THEN %s)(?: WHEN %s THEN %s)+')
+WHITESPACE = re.compile(r'\s+')
+MAX_PARAMS = 20
+PENDING = object()
+
+
+def normalize(query):
+    """The shape of query: one line, with repeated placeholders folded to '...'."""
+    shape = WHITESPACE.sub(' ', query).strip()
+    shape = WHEN_LIST.sub(r'\1 ...', shape)
+    return PLACEHOLDER_LIST.sub('%s, ...', shape)
+
+
+def json_value(value):
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return str(value)
+
+
+class Explainer:
+    """Runs EXPLAIN on its own lazily opened connection, one call at a time."""
+
+    def __init__(self, connect, prefix):
+        self.connect = connect
+        self.prefix = prefix
+        self.conn = None
+        self.lock = threading.Lock()
+
+    def __call__(self, query, args):
+        with self.lock:
+            try:
+                if self.conn is None:
+                    self.conn = self.connect()
+                cur = self.conn.cursor()
+                try:
+                    cur.execute(self.prefix + query, args)
+                    return [{key: json_value(value) for key, value in row.items()} for row in cur.fetchall()]
+                finally:
+                    cur.close()
+                    self.conn.rollback()
+            except Exception:
+                self.close()
+                raise
+
+    def close(self):
+        conn, self.conn = self.conn, None
+        if conn is not None:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+
+class SlowQueryLog:
+    """Ring buffer of statements slower than threshold seconds."""
+
+    def __init__(self, threshold, size, explain, redact=False, context=None):
+        self.threshold = threshold
+        self.redact = redact
+        self.explain = explain
+        self.context = context
+        self.entries = collections.deque(maxlen=size)
+        self.plans = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def observe(self, query, args, rows, seconds, many=False):
+        """Statement hook: record query if it took at least threshold seconds."""
+        if seconds < self.threshold or getattr(self._local, 'explaining', False):
+            # The EXPLAIN statements themselves are not logged.
+            return
+        shape = normalize(query)
+        if many:
+            args = list(args)
+            batch_rows = len(args)
+            args = args[0] if args else ()
+        else:
+            batch_rows = None
+            args = () if args is None else args
+        entry = {
+            'query': shape,
+            'params': self._params(args),
+            'rows': rows,
+            'duration_ms': round(seconds * 1000, 3),
+            'at': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='milliseconds'),
+        }
+        if batch_rows is not None:
+            entry['batch_rows'] = batch_rows
+        if self.context is not None:
+            entry['context'] = self.context()
+        self.entries.append(entry)
+        logger.warning('slow query %.1fms rows=%s %s params=%s', seconds * 1000, rows, shape, entry['params'])
+        self._capture_plan(shape, query, args)
+
+    def _params(self, args):
+        params = list(args)[:MAX_PARAMS]
+        if self.redact:
+            return ['?'] * len(params)
+        return [json_value(value) for value in params]
+
+    def _capture_plan(self, shape, query, args):
+        with self._lock:
+            if shape in self.plans:
+                return
+            self.plans[shape] = PENDING
+        self._local.explaining = True
+        try:
+            plan = self.explain(query, tuple(args))
+        except Exception as err:
+            plan = {'error': str(err)}
+        finally:
+            self._local.explaining = False
+        self.plans[shape] = plan
+
+    def snapshot(self):
+        """The kept entries, newest first, each with its shape's plan."""
+        entries = list(self.entries)
+        entries.reverse()
+        plans = dict(self.plans)
+        out = []
+        for entry in entries:
+            plan = plans.get(entry['query'])
+            out.append(dict(entry, plan=None if plan is PENDING else plan))
+        return out
@@ -0,0 +1,492 @@
+"""Storage backends behind the Flask app's connection pool.
+
+A backend knows how to open a connection and covers the few places where
+MySQL and SQLite differ: streaming cursors, row locks, multi-row inserts,
+bulk loads and index rebuilds, FULLTEXT support and the driver's exception
+classes. main.py picks one with
+Config.DB_BACKEND:
+
+- ``mysql``: MySQLdb (mysqlclient), imported only when selected.
+- ``sqlite``: the standard-library sqlite3 module on a file (WAL mode) or
+  ``:memory:``, created from setup_sqlite.sql on first use. Connections are
+  wrapped to accept the ``%s`` placeholders and return the dict rows the rest
+  of the code expects; sqlite3's statement cache keeps them prepared.
+
+Cursors from either backend call ``backend.statement_hook(query, args, rows,
+seconds, many)`` after each statement when a hook is set; main.py uses it for
+the slow-query log.
+"""
+import datetime
+import functools
+import os
+import re
+import sqlite3
+import tempfile
+import time
+import uuid
+from decimal import Decimal
+from pathlib import Path
+
+SQLITE_SCHEMA_PATH = Path(__file__).with_name('setup_sqlite.sql')
+SAMPLE_DATA_MARKER = '-- Sample data'
+ER_FT_MATCHING_KEY_NOT_FOUND = 1191
+perf_counter = time.perf_counter
+
+# Validated payloads carry Decimal and date values, which MySQL drivers bind
+# natively; store them in SQLite as text and let column affinity apply.
+sqlite3.register_adapter(Decimal, str)
+sqlite3.register_adapter(datetime.date, datetime.date.isoformat)
+
+# Read them back by declared column type as MySQLdb would: every DECIMAL
+# column here has scale 2, so '10' comes back as Decimal('10.00'), and
+# TIMESTAMP and DATE columns as datetime and date.
+CENT = Decimal('0.01')
+sqlite3.register_converter('DECIMAL', lambda raw: Decimal(raw.decode()).quantize(CENT))
+sqlite3.register_converter('TIMESTAMP', lambda raw: datetime.datetime.fromisoformat(raw.decode()))
+sqlite3.register_converter('DATE', lambda raw: datetime.date.fromisoformat(raw.decode()))
+
+
+TSV_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r', '\0': '\\0'})
+
+
+def tsv_field(value):
+    """One value in LOAD DATA's default escaped, tab-separated format."""
+    if value is None:
+        return '\\N'
+    return str(value).translate(TSV_ESCAPES)
+
+
+def dict_row(cursor, row):
+    return {col[0]: value for col, value in zip(cursor.description, row)}
+
+
+@functools.lru_cache(maxsize=1024)
+def qmark(query):
+    """Rewrite a %s-placeholder statement for sqlite3."""
+    return query.replace('%s', '?')
+
+
+def sqlite_connect(path, schema=None):
+    """Open a sqlite3 connection returning dict rows.
+
+    File databases run in WAL mode so readers never block the writer.
+    schema, if given, is executed as a script.
+    """
+    memory = path == ':memory:' or 'vfs=memdb' in path
+    conn = sqlite3.connect(path, check_same_thread=False, uri=path.startswith('file:'),
+                           cached_statements=512, detect_types=sqlite3.PARSE_DECLTYPES)
+    conn.row_factory = dict_row
+    conn.execute('PRAGMA busy_timeout = 5000')
+    if not memory:
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+    if schema:
+        conn.executescript(schema)
+    return conn
+
+
+def ensure_schema(conn):
+    """Create any missing tables from setup_sqlite.sql.
+
+    The sample rows below SAMPLE_DATA_MARKER are loaded only into a new
+    database.
+    """
+    tables = {row['name'] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    schema, _, sample = SQLITE_SCHEMA_PATH.read_text().partition(SAMPLE_DATA_MARKER)
+    conn.executescript(schema if 'product' in tables else schema + sample)
+    # Search indexes added to an existing database start empty; fill them
+    # from their tables once. Triggers keep them current from then on.
+    for fts in re.findall(r'CREATE VIRTUAL TABLE IF NOT EXISTS (\w+)', schema):
+        if 'product' in tables and fts not in tables:
+            conn.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
+    conn.commit()
+
+
+class SQLiteCursor:
+    """The MySQLdb cursor surface main.py uses, over a sqlite3 cursor."""
+
+    def __init__(self, cursor, backend):
+        self._cursor = cursor
+        self._backend = backend
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def execute(self, query, args=()):
+        hook = self._backend.statement_hook
+        if hook is None:
+            self._cursor.execute(qmark(query), args)
+        else:
+            start = perf_counter()
+            self._cursor.execute(qmark(query), args)
+            hook(query, args, self._cursor.rowcount, perf_counter() - start)
+        return self._cursor.rowcount
+
+    def executemany(self, query, rows):
+        hook = self._backend.statement_hook
+        if hook is None:
+            self._cursor.executemany(qmark(query), rows)
+        else:
+            rows = list(rows)
+            start = perf_counter()
+            self._cursor.executemany(qmark(query), rows)
+            hook(query, rows, self._cursor.rowcount, perf_counter() - start, True)
+        return self._cursor.rowcount
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def fetchmany(self, size):
+        return self._cursor.fetchmany(size)
+
+    def close(self):
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    """The MySQLdb connection surface ConnectionPool and main.py use."""
+
+    def __init__(self, conn, backend):
+        self._conn = conn
+        self._backend = backend
+
+    def cursor(self, tuples=False):
+        cursor = self._conn.cursor()
+        if tuples:
+            cursor.row_factory = None
+        return SQLiteCursor(cursor, self._backend)
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def ping(self):
+        self._conn.execute('SELECT 1').fetchone()
+
+    def close(self):
+        self._conn.close()
+
+    def begin_immediate(self):
+        """Take SQLite's write lock now, for read-then-write transactions."""
+        if not self._conn.in_transaction:
+            self._conn.execute('BEGIN IMMEDIATE')
+
+
+def hooked_cursor(base, backend):
+    """Subclass a MySQLdb cursor class to report statements to backend.statement_hook."""
+
+    class HookedCursor(base):
+        _in_many = False
+
+        def execute(self, query, args=None):
+            hook = backend.statement_hook
+            if hook is None or self._in_many:
+                return super().execute(query, args)
+            start = perf_counter()
+            result = super().execute(query, args)
+            hook(query, args, self.rowcount, perf_counter() - start)
+            return result
+
+        def executemany(self, query, args):
+            hook = backend.statement_hook
+            if hook is None:
+                return super().executemany(query, args)
+            # executemany falls back to execute() per row for statements it
+            # cannot batch; report the call once.
+            args = list(args)
+            self._in_many = True
+            start = perf_counter()
+            try:
+                result = super().executemany(query, args)
+            finally:
+                self._in_many = False
+            hook(query, args, self.rowcount, perf_counter() - start, True)
+            return result
+
+    HookedCursor.__name__ = 'Hooked' + base.__name__
+    return HookedCursor
+
+
+class MySQLBackend:
+    name = 'mysql'
+    explain_prefix = 'EXPLAIN '
+    statement_hook = None
+
+    def __init__(self, config):
+        import MySQLdb
+        from MySQLdb.cursors import DictCursor, SSCursor, SSDictCursor
+
+        self.Error = MySQLdb.MySQLError
+        self.IntegrityError = MySQLdb.IntegrityError
+        self.OperationalError = MySQLdb.OperationalError
+        self._stream_cursor = hooked_cursor(SSDictCursor, self)
+        self._stream_tuple_cursor = hooked_cursor(SSCursor, self)
+        self.connect = functools.partial(
+            MySQLdb.connect,
+            host=config.MYSQL_HOST,
+            port=config.MYSQL_PORT,
+            user=config.MYSQL_USER,
+            password=config.MYSQL_PASSWORD,
+            database=config.MYSQL_DB,
+            cursorclass=hooked_cursor(DictCursor, self),
+            charset='utf8mb4',
+        )
+
+    def stream_cursor(self, conn, tuples=False):
+        """An unbuffered server-side cursor, so big reads don't sit in memory.
+
+        tuples=True returns rows as plain tuples, skipping a dict per row.
+        """
+        return conn.cursor(self._stream_tuple_cursor if tuples else self._stream_cursor)
+
+    def missing_fulltext(self, err):
+        return err.args[0] == ER_FT_MATCHING_KEY_NOT_FOUND
+
+    # FULLTEXT ... WITH PARSER ngram, at the default ngram_token_size.
+    search_min_length = 2
+
+    def search_query(self, res, term, limit):
+        """(sql, args) for up to limit matching rows of res, most relevant first.
+
+        term is searched as a boolean-mode phrase, which the ngram parser
+        matches like a substring.
+        """
+        phrase = '"' + term.replace('"', ' ') + '"'
+        return res.fulltext_search_sql, (phrase, phrase, limit)
+
+    share_lock = ' LOCK IN SHARE MODE'
+
+    def begin_write(self, conn):
+        """InnoDB takes row locks as statements run; nothing to do up front."""
+
+    def lock_ids(self, conn, cur, res, ids):
+        cur.execute(res.lock_in_sql(len(ids)), tuple(ids))
+
+    def lock_rows(self, conn, cur, res, ids):
+        cur.execute(res.lock_rows_sql(len(ids)), tuple(ids))
+
+    def upsert_add_sql(self, table, key, columns):
+        """INSERT a row, or add its columns onto the existing row with the same key."""
+        adds = ", ".join(f"{col} = {col} + VALUES({col})" for col in columns)
+        return (f"INSERT INTO {table} ({key}, {', '.join(columns)}) "
+                f"VALUES (%s, {', '.join(['%s'] * len(columns))}) ON DUPLICATE KEY UPDATE {adds}")
+
+    def insert_many(self, cur, res, rows, chunk_size):
+        """Insert rows with executemany and return the new ids in input order.
+
+        max_stmt_length is lifted so MySQLdb sends each chunk as exactly one
+        multi-row INSERT; lastrowid is then the first id of the chunk. With
+        innodb_autoinc_lock_mode 0 or 1 a multi-row INSERT takes its ids in
+        one run, spaced auto_increment_increment apart. Mode 2 (interleaved)
+        makes no such promise, so there rows go in one at a time.
+        """
+        cur.execute("SELECT @@auto_increment_increment AS step, @@innodb_autoinc_lock_mode AS mode")
+        settings = cur.fetchone()
+        step = int(settings['step'])
+        ids = []
+        if int(settings['mode']) == 2:
+            for row in rows:
+                cur.execute(res.insert_sql, row)
+                ids.append(cur.lastrowid)
+            return ids
+        cur.max_stmt_length = 1 << 30
+        for start in range(0, len(rows), chunk_size):
+            chunk = rows[start:start + chunk_size]
+            cur.executemany(res.insert_sql, chunk)
+            ids.extend(range(cur.lastrowid, cur.lastrowid + step * len(chunk), step))
+        return ids
+
+    def insert_rows(self, cur, query, rows):
+        """Run an INSERT for every row as multi-row statements."""
+        cur.max_stmt_length = 1 << 30
+        cur.executemany(query, rows)
+
+    def load_data(self, cur, table, columns, rows):
+        """Load rows through LOAD DATA LOCAL INFILE from a temporary TSV file.
+
+        The connection must have been opened with local_infile=1.
+        """
+        with tempfile.NamedTemporaryFile('w', encoding='utf-8', newline='\n', suffix='.tsv',
+                                         delete=False) as fp:
+            for row in rows:
+                fp.write('\t'.join(map(tsv_field, row)) + '\n')
+        try:
+            cur.execute(f"LOAD DATA LOCAL INFILE %s INTO TABLE {table} CHARACTER SET utf8mb4 "
+                        f"FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' LINES TERMINATED BY '\\n' "
+                        f"({', '.join(columns)})", (fp.name,))
+        finally:
+            os.unlink(fp.name)
+
+    def deferrable_indexes(self, cur, table):
+        """(name, definition) of table's non-unique secondary indexes, from SHOW CREATE TABLE."""
+        cur.execute(f"SHOW CREATE TABLE {table}")
+        indexes = []
+        for line in cur.fetchone()['Create Table'].splitlines():
+            line = line.strip().rstrip(',')
+            if line.startswith(('KEY ', 'FULLTEXT KEY ')):
+                indexes.append((line.split('`')[1], line))
+        return indexes
+
+    def drop_indexes(self, cur, table, indexes):
+        if indexes:
+            cur.execute(f"ALTER TABLE {table} " + ", ".join(f"DROP INDEX `{name}`" for name, _ in indexes))
+
+    def create_indexes(self, cur, table, indexes):
+        """Rebuild indexes; InnoDB adds one FULLTEXT index per ALTER."""
+        plain = [definition for _, definition in indexes if not definition.startswith('FULLTEXT')]
+        if plain:
+            cur.execute(f"ALTER TABLE {table} " + ", ".join(f"ADD {definition}" for definition in plain))
+        for _, definition in indexes:
+            if definition.startswith('FULLTEXT'):
+                cur.execute(f"ALTER TABLE {table} ADD {definition}")
+
+    def truncate(self, cur, table):
+        cur.execute(f"TRUNCATE TABLE {table}")
+
+    def horizon(self, cur, seconds):
+        """The database clock seconds ago, formatted like timestamp()."""
+        cur.execute("SELECT CURRENT_TIMESTAMP(6) - INTERVAL %s MICROSECOND AS horizon",
+                    (round(seconds * 1000000),))
+        return self.timestamp(cur.fetchone()['horizon'])
+
+    def timestamp(self, value):
+        """A TIMESTAMP(6) value as text that orders like the column."""
+        return value.strftime('%Y-%m-%d %H:%M:%S.%f')
+
+
+class SQLiteBackend:
+    name = 'sqlite'
+    explain_prefix = 'EXPLAIN QUERY PLAN '
+    statement_hook = None
+    Error = sqlite3.Error
+    IntegrityError = sqlite3.IntegrityError
+    OperationalError = sqlite3.OperationalError
+
+    def __init__(self, config):
+        path = config.SQLITE_PATH
+        self._keeper = None
+        if path == ':memory:':
+            # A named memdb database lets every pooled connection see the same
+            # data; it lives as long as one connection stays open. Unlike
+            # shared-cache mode, memdb takes ordinary database locks, so
+            # writers wait out busy_timeout instead of failing with
+            # "database table is locked".
+            path = f'file:/sari-sari-{uuid.uuid4().hex}?vfs=memdb'
+        self.path = path
+        conn = sqlite_connect(path)
+        ensure_schema(conn)
+        if 'vfs=memdb' in path:
+            self._keeper = conn
+        else:
+            conn.close()
+
+    def connect(self):
+        return SQLiteConnection(sqlite_connect(self.path), self)
+
+    def stream_cursor(self, conn, tuples=False):
+        # sqlite3 cursors already step through results lazily.
+        return conn.cursor(tuples)
+
+    def missing_fulltext(self, err):
+        return isinstance(err, sqlite3.OperationalError) and 'no such table' in str(err)
+
+    # FTS5's trigram tokenizer can't match fewer than three characters.
+    search_min_length = 3
+
+    def search_query(self, res, term, limit):
+        """(sql, args) for up to limit matching rows of res, best bm25 rank first.
+
+        The table's <table>_search FTS5 trigram index (setup_sqlite.sql)
+        matches term as a case-insensitive substring of any search column.
+        """
+        phrase = '"' + term.replace('"', '""') + '"'
+        return res.fts_search_sql, (phrase, limit)
+
+    # BEGIN IMMEDIATE already holds the only write lock.
+    share_lock = ''
+
+    def begin_write(self, conn):
+        conn.begin_immediate()
+
+    def lock_ids(self, conn, cur, res, ids):
+        conn.begin_immediate()
+        cur.execute(res.ids_in_sql(len(ids)), tuple(ids))
+
+    def lock_rows(self, conn, cur, res, ids):
+        conn.begin_immediate()
+        cur.execute(res.select_in_sql(len(ids)), tuple(ids))
+
+    def upsert_add_sql(self, table, key, columns):
+        adds = ", ".join(f"{col} = {col} + excluded.{col}" for col in columns)
+        return (f"INSERT INTO {table} ({key}, {', '.join(columns)}) "
+                f"VALUES (%s, {', '.join(['%s'] * len(columns))}) ON CONFLICT ({key}) DO UPDATE SET {adds}")
+
+    def insert_many(self, cur, res, rows, chunk_size):
+        """Insert rows one prepared statement at a time and return their ids.
+
+        sqlite3 doesn't report ids for executemany; in-process single-row
+        inserts on a cached statement are cheap.
+        """
+        ids = []
+        for row in rows:
+            cur.execute(res.insert_sql, row)
+            ids.append(cur.lastrowid)
+        return ids
+
+    def insert_rows(self, cur, query, rows):
+        cur.executemany(query, rows)
+
+    load_data = None
+
+    def deferrable_indexes(self, cur, table):
+        cur.execute("SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = %s "
+                    "AND sql IS NOT NULL AND sql NOT LIKE 'CREATE UNIQUE%' ORDER BY name", (table,))
+        return [(row['name'], row['sql']) for row in cur.fetchall()]
+
+    def drop_indexes(self, cur, table, indexes):
+        for name, _ in indexes:
+            cur.execute(f"DROP INDEX {name}")
+
+    def create_indexes(self, cur, table, indexes):
+        for _, definition in indexes:
+            cur.execute(definition)
+
+    def truncate(self, cur, table):
+        cur.execute(f"DELETE FROM {table}")
+        cur.execute("DELETE FROM sqlite_sequence WHERE name = %s", (table,))
+
+    def horizon(self, cur, seconds):
+        cur.execute("SELECT strftime('%Y-%m-%d %H:%M:%f', 'now', %s) AS horizon", (f'-{seconds:.3f} seconds',))
+        return cur.fetchone()['horizon']
+
+    def timestamp(self, value):
+        """Timestamps are stored as millisecond text, which already orders correctly."""
+        if isinstance(value, str):
+            return value
+        return value.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
+
+
+BACKENDS = {'mysql': MySQLBackend, 'sqlite': SQLiteBackend}
+
+
+def create_backend(config):
+    """Build the backend named by config.DB_BACKEND."""
+    try:
+        backend = BACKENDS[config.DB_BACKEND]
+    except KeyError:
+        raise ValueError(f"unknown DB_BACKEND {config.DB_BACKEND!r}; expected one of {sorted(BACKENDS)}")
+    return backend(config)
@@ -0,0 +1,24 @@
+"""
+Run the suite against the embedded SQLite backend unless DB_BACKEND is set,
+and share the Flask client and login fixtures.
+"""
+import os
+
+import pytest
+
+os.environ.setdefault('DB_BACKEND', 'sqlite')
+os.environ.setdefault('SQLITE_PATH', ':memory:')
+
+
+@pytest.fixture
+def client():
+    """A test client for main.py's app."""
+    from main import app
+    return app.test_client()
+
+
+@pytest.fixture
+def auth_headers(client):
+    """Authorization headers carrying a fresh admin token."""
+    token = client.post('/login', json={'username': 'admin', 'password': 'admin'}).get_json()['access_token']
+    return {'Authorization': f'Bearer {token}'}
@@ -0,0 +1,100 @@
+"""
+Tests for the inventory summaries behind /api/analytics.
+"""
+import sys
+from decimal import Decimal
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from analytics import PRODUCT_CATEGORIES, ICECREAM_SIZES
+
+
+def scanned(client, summary):
+    """The same aggregates computed from a full read of the source table."""
+    from main import app, fetchall
+    with app.test_request_context():
+        rows = fetchall(summary.aggregate_sql)
+    return {row[summary.group]: (row[summary.count_column], row['units'],
+                                 Decimal(str(row['stock_value'])).quantize(Decimal('0.01')))
+            for row in rows}
+
+
+def served(client, path, key, summary):
+    body = client.get(path).get_json()
+    return {row[summary.group]: (row[summary.count_column], row['units'], Decimal(row['stock_value']))
+            for row in body[key]}
+
+
+def test_deltas_move_units_between_groups():
+    old = {'category': 'Food', 'quantity': 4, 'price': Decimal('2.50')}
+    new = dict(old, category='Snacks', quantity=5)
+    assert PRODUCT_CATEGORIES.deltas([old], [new]) == [
+        ('Food', -1, -4, Decimal('-10.00')), ('Snacks', 1, 5, Decimal('12.50'))]
+    assert PRODUCT_CATEGORIES.deltas([old], [old]) == []
+
+
+def test_summaries_follow_writes(client, auth_headers):
+    path = '/api/analytics/stock-value'
+    assert served(client, path, 'categories', PRODUCT_CATEGORIES) == scanned(client, PRODUCT_CATEGORIES)
+
+    response = client.post('/api/products', headers=auth_headers, json={
+        'product_name': 'Vinegar', 'category': 'Condiments', 'unit': 'bottle', 'price': '18.50', 'quantity': 3})
+    new_id = response.get_json()['id']
+    assert served(client, path, 'categories', PRODUCT_CATEGORIES)['Condiments'] == (1, 3, Decimal('55.50'))
+
+    client.put(f'/api/products/{new_id}', headers=auth_headers, json={'category': 'Food', 'quantity': 4})
+    batch = client.post('/api/products/batch', headers=auth_headers, json=[
+        {'product_name': f'Salt {i}', 'category': 'Condiments', 'unit': 'pack', 'price': 5, 'quantity': 2}
+        for i in range(3)])
+    ids = [entry['id'] for entry in batch.get_json()['created']]
+    client.patch('/api/products/batch', headers=auth_headers,
+                 json=[{'id': ids[0], 'fields': {'price': 6}}, {'id': ids[1], 'fields': {'category': 'Goods'}}])
+    client.delete('/api/products/batch', headers=auth_headers, json={'ids': [ids[2]]})
+    client.delete(f'/api/products/{new_id}', headers=auth_headers)
+
+    assert served(client, path, 'categories', PRODUCT_CATEGORIES) == scanned(client, PRODUCT_CATEGORIES)
+
+
+def test_icecream_by_size_and_reconcile(client, auth_headers):
+    from main import app, get_db
+    with app.test_request_context():
+        # A write behind the API's back is only picked up by reconciliation.
+        cur = get_db().cursor()
+        cur.execute("UPDATE icecream SET stock = stock + 100 WHERE size = %s", ('Cone',))
+        get_db().commit()
+    path = '/api/analytics/icecream-by-size'
+    # Reads serve the summary as it is; they never rebuild it.
+    assert served(client, path, 'sizes', ICECREAM_SIZES) != scanned(client, ICECREAM_SIZES)
+    assert client.post('/api/analytics/reconcile').status_code == 401
+    assert client.post('/api/analytics/reconcile', headers=auth_headers).status_code == 200
+    sizes = served(client, path, 'sizes', ICECREAM_SIZES)
+    assert sizes == scanned(client, ICECREAM_SIZES)
+    assert sizes['Cone'][0] == 3
+
+
+def test_low_stock_lists_fewest_first(client):
+    body = client.get('/api/analytics/low-stock?threshold=8&limit=2').get_json()
+    assert body['threshold'] == 8
+    assert [row['stock'] for row in body['icecreams']] == [6, 7]
+    assert all(row['quantity'] <= 8 for row in body['products'])
+    assert client.get('/api/analytics/low-stock?limit=0').status_code == 400
+
+
+def test_cli_reconciles_every_summary(tmp_path, monkeypatch):
+    import analytics
+    import storage
+    from config import Config
+
+    monkeypatch.setattr(Config, 'SQLITE_PATH', str(tmp_path / 'cron.db'))
+    backend = storage.create_backend(Config)
+    conn = backend.connect()
+    cur = conn.cursor()
+    cur.execute("DELETE FROM product_category_summary")
+    cur.execute("UPDATE icecream_size_summary SET units = 0")
+    conn.commit()
+    assert analytics.main([]) == 0
+    assert PRODUCT_CATEGORIES.read(cur) and all(row['units'] for row in ICECREAM_SIZES.read(cur))
+    cur.close()
+    conn.close()
@@ -0,0 +1,210 @@
+"""
+Tests for the asyncio serving path, run against the SQLite stand-in database.
+"""
+import asyncio
+import datetime
+import sys
+from pathlib import Path
+
+import jwt
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import async_app
+from async_db import AsyncSQLiteDatabase
+from storage import SAMPLE_DATA_MARKER, SQLITE_SCHEMA_PATH
+
+
+# The real tables and triggers, without the sample rows.
+SCHEMA = SQLITE_SCHEMA_PATH.read_text().partition(SAMPLE_DATA_MARKER)[0]
+
+PRODUCT = {'product_name': 'Canned Tuna', 'category': 'Food', 'unit': 'can', 'price': 35.0, 'quantity': 80}
+
+
+def run(scenario):
+    """Run an async scenario against a fresh in-memory database."""
+    async def main():
+        async_app.db = AsyncSQLiteDatabase(':memory:', schema=SCHEMA)
+        async with async_app.app.test_app() as test_app:
+            client = test_app.test_client()
+            response = await client.post('/login', json={'username': 'admin', 'password': 'admin'})
+            token = (await response.get_json())['access_token']
+            return await scenario(client, {'Authorization': f'Bearer {token}'})
+    return asyncio.run(main())
+
+
+def test_crud_round_trip():
+    """Create, read, update and delete a product."""
+    async def scenario(client, headers):
+        response = await client.post('/api/products', json=PRODUCT, headers=headers)
+        assert response.status_code == 201
+        new_id = (await response.get_json())['id']
+        response = await client.get(f'/api/products/{new_id}')
+        assert (await response.get_json())['product']['product_name'] == 'Canned Tuna'
+        response = await client.put(f'/api/products/{new_id}', json={'quantity': 5}, headers=headers)
+        assert response.status_code == 200
+        response = await client.delete(f'/api/products/{new_id}', headers=headers)
+        assert response.status_code == 200
+        response = await client.get(f'/api/products/{new_id}')
+        assert response.status_code == 404
+    run(scenario)
+
+
+def test_list_pagination_search_and_xml():
+    """List supports ?limit=/?cursor=, ?q= and ?format=xml like main.py."""
+    async def scenario(client, headers):
+        for name in ('Tuna', 'Sardines', 'Tuna Flakes'):
+            await client.post('/api/products', json=dict(PRODUCT, product_name=name), headers=headers)
+        first = await (await client.get('/api/products?limit=2')).get_json()
+        assert len(first['products']) == 2
+        second = await (await client.get(f"/api/products?limit=2&cursor={first['next_cursor']}")).get_json()
+        assert [p['product_name'] for p in second['products']] == ['Tuna Flakes']
+        assert second['next_cursor'] is None
+        found = await (await client.get('/api/products?q=tuna')).get_json()
+        assert [p['product_name'] for p in found['products']] == ['Tuna', 'Tuna Flakes']
+        found = await (await client.get('/api/products?q=Sa&fields=product_name')).get_json()
+        assert [p['product_name'] for p in found['products']] == ['Sardines']
+        response = await client.get('/api/products?format=xml')
+        assert response.content_type == 'application/xml'
+        assert b'<products><item>' in await response.get_data()
+    run(scenario)
+
+
+
+def test_sparse_fieldsets():
+    """?fields= narrows list and item responses; the primary key is always kept."""
+    async def scenario(client, headers):
+        response = await client.post('/api/products', json=PRODUCT, headers=headers)
+        new_id = (await response.get_json())['id']
+        listed = await (await client.get('/api/products?fields=product_name,price')).get_json()
+        assert listed['products'] == [{'id': new_id, 'product_name': 'Canned Tuna', 'price': '35.00'}]
+        item = await (await client.get(f'/api/products/{new_id}?fields=quantity')).get_json()
+        assert item['product'] == {'id': new_id, 'quantity': 80}
+        response = await client.get('/api/products?fields=password')
+        assert response.status_code == 400
+    run(scenario)
+
+
+def test_filters_and_sorted_cursor_pages():
+    """Filters narrow the list and ?sort= pages by (value, id) through cursors."""
+    async def scenario(client, headers):
+        stock = [('Tuna', 'Food', 35.0), ('Sardines', 'Food', 25.0), ('Soap', 'Toiletries', 20.0),
+                 ('Bread', 'Food', 40.0), ('Corned Beef', 'Food', 35.0)]
+        for name, category, price in stock:
+            item = dict(PRODUCT, product_name=name, category=category, price=price)
+            await client.post('/api/products', json=item, headers=headers)
+        base = '/api/products?category=Food&price_max=35&sort=-price&limit=2&fields=product_name'
+        url = base
+        names = []
+        while url:
+            page = await (await client.get(url)).get_json()
+            names += [p['product_name'] for p in page['products']]
+            assert all(set(p) == {'id', 'product_name', 'price'} for p in page['products'])
+            url = page['next_cursor'] and f"{base}&cursor={page['next_cursor']}"
+        assert names == ['Corned Beef', 'Tuna', 'Sardines']
+        for query in ('price_min=cheap', 'sort=description', 'sort=price&cursor=Mg'):
+            response = await client.get(f'/api/products?{query}')
+            assert response.status_code == 400
+    run(scenario)
+
+@pytest.mark.parametrize('headers, status', [
+    ({}, 401),
+    ({'Authorization': 'Bearer not-a-token'}, 422),
+])
+def test_writes_require_valid_token(headers, status):
+    """Missing or malformed tokens are rejected like flask_jwt_extended does."""
+    async def scenario(client, _):
+        response = await client.post('/api/products', json=PRODUCT, headers=headers)
+        assert response.status_code == status
+    run(scenario)
+
+
+def test_validation_errors():
+    """Payload validation is shared with main.py."""
+    async def scenario(client, headers):
+        response = await client.post('/api/products', json={'product_name': 'x'}, headers=headers)
+        assert response.status_code == 400
+        assert 'category is required' in (await response.get_json())['errors']
+    run(scenario)
+
+
+def test_writes_keep_summaries_in_step():
+    """Creates, updates and deletes fold into product_category_summary in the same transaction."""
+    async def summary():
+        return {row['category']: (row['products'], row['units'], str(row['stock_value']))
+                for row in await async_app.db.fetchall("SELECT * FROM product_category_summary WHERE products > 0")}
+
+    async def scenario(client, headers):
+        first = (await (await client.post('/api/products', json=PRODUCT, headers=headers)).get_json())['id']
+        await client.post('/api/products', json=dict(PRODUCT, quantity=2, price='10.50'), headers=headers)
+        assert await summary() == {'Food': (2, 82, '2821.00')}
+        await client.put(f'/api/products/{first}', json={'category': 'Canned', 'quantity': 10}, headers=headers)
+        assert await summary() == {'Canned': (1, 10, '350.00'), 'Food': (1, 2, '21.00')}
+        await client.delete(f'/api/products/{first}', headers=headers)
+        assert await summary() == {'Food': (1, 2, '21.00')}
+        response = await client.delete(f'/api/products/{first}', headers=headers)
+        assert response.status_code == 404
+        assert await summary() == {'Food': (1, 2, '21.00')}
+    run(scenario)
+
+
+def test_deletes_leave_tombstones():
+    """A delete records its tombstone in the same transaction, as main.py does."""
+    async def tombstones():
+        return [(row['table_name'], row['row_id']) for row in
+                await async_app.db.fetchall("SELECT table_name, row_id FROM tombstones ORDER BY id")]
+
+    async def scenario(client, headers):
+        first = (await (await client.post('/api/products', json=PRODUCT, headers=headers)).get_json())['id']
+        await client.put(f'/api/products/{first}', json={'quantity': 1}, headers=headers)
+        assert await tombstones() == []
+        assert (await client.delete(f'/api/products/{first}', headers=headers)).status_code == 200
+        assert (await client.delete(f'/api/products/{first}', headers=headers)).status_code == 404
+        assert await tombstones() == [('product', first)]
+    run(scenario)
+
+
+def test_unsupported_options_are_rejected():
+    """Batch writes and streamed lists answer 400 rather than a 404 or plain JSON."""
+    async def scenario(client, headers):
+        for method in ('post', 'patch', 'delete'):
+            response = await getattr(client, method)('/api/products/batch', json=[PRODUCT], headers=headers)
+            assert response.status_code == 400
+            assert 'batch writes' in (await response.get_json())['msg']
+        for query in ('format=ndjson', 'stream=1'):
+            response = await client.get(f'/api/products?{query}')
+            assert response.status_code == 400
+    run(scenario)
+
+
+def test_token_lifetime_follows_config(monkeypatch):
+    """Access tokens expire after JWT_ACCESS_TOKEN_EXPIRES, as main.py's do."""
+    monkeypatch.setitem(async_app.app.config, 'JWT_ACCESS_TOKEN_EXPIRES', datetime.timedelta(hours=2))
+    claims = jwt.decode(async_app.create_access_token('admin'), options={'verify_signature': False})
+    assert claims['exp'] - claims['iat'] == 7200
+
+
+def test_duplicate_email_is_a_conflict():
+    """A UNIQUE violation answers 409, as in main.py."""
+    async def scenario(client, headers):
+        student = {'student_name': 'Dup', 'email': 'dup@example.com'}
+        assert (await client.post('/api/students', json=student, headers=headers)).status_code == 201
+        assert (await client.post('/api/students', json=student, headers=headers)).status_code == 409
+    run(scenario)
+
+
+def test_logout_revokes_the_token():
+    """Revocations are read from revoked_tokens, so they hold for tokens main.py revoked too."""
+    async def scenario(client, headers):
+        assert (await client.post('/logout', headers=headers)).status_code == 200
+        response = await client.post('/api/products', json=PRODUCT, headers=headers)
+        assert response.status_code == 401
+        token = async_app.create_access_token('admin')
+        claims = jwt.decode(token, options={'verify_signature': False})
+        await async_app.db.execute("INSERT INTO revoked_tokens (jti, expires_at) VALUES (%s, %s)",
+                                   (claims['jti'], claims['exp']))
+        response = await client.post('/api/products', json=PRODUCT, headers={'Authorization': f'Bearer {token}'})
+        assert response.status_code == 401
+    run(scenario)
@@ -0,0 +1,108 @@
+"""
+Tests for bulk_import.py and init_db.py's statement splitter.
+"""
+import io
+import json
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import bulk_import
+from bulk_import import Checkpoint, ImportFailed, Importer
+from init_db import iter_statements
+from resources import RESOURCES_BY_NAME
+from storage import SQLiteBackend
+
+ROOT = Path(__file__).parent.parent
+
+
+@pytest.fixture
+def db(tmp_path):
+    backend = SQLiteBackend(SimpleNamespace(SQLITE_PATH=str(tmp_path / 'import.db')))
+    conn = backend.connect()
+    yield backend, conn
+    conn.close()
+
+
+def scalar(conn, query, args=()):
+    cur = conn.cursor()
+    cur.execute(query, args)
+    row = cur.fetchone()
+    cur.close()
+    return next(iter(row.values()))
+
+
+def test_sample_db_sections_load_with_their_ids(db):
+    backend, conn = db
+    res = RESOURCES_BY_NAME['icecream']
+    records = bulk_import.read_records(ROOT / 'sample_db.json', 'json', ['icecream', 'icecreams'])
+    importer = Importer(backend, conn, res, chunk_size=6, keep_ids=True)
+    loaded = importer.run(records, Checkpoint('sample', res.table), truncate=True, defer_indexes=True)
+    expected = json.loads((ROOT / 'sample_db.json').read_text())['icecream']
+    assert loaded == len(expected) == scalar(conn, "SELECT COUNT(*) AS n FROM icecream")
+    assert scalar(conn, "SELECT flavor FROM icecream WHERE id = %s", (expected[-1]['icecream_id'],)) == \
+        expected[-1]['flavor']
+    assert {name for name, _ in backend.deferrable_indexes(conn.cursor(), 'icecream')} >= {'idx_icecream_stock'}
+    assert scalar(conn, "SELECT COUNT(*) AS n FROM import_checkpoints") == 0
+    assert scalar(conn, "SELECT SUM(flavors) AS n FROM icecream_size_summary") == len(expected)
+
+
+def test_interrupted_import_resumes_after_last_chunk(db, tmp_path):
+    backend, conn = db
+    res = RESOURCES_BY_NAME['products']
+    path = tmp_path / 'products.csv'
+    lines = ['product_name,category,unit,price,quantity'] + [f'Item {i},Bulk,pc,{i}.50,{i}' for i in range(10)]
+    lines[8] = 'Broken,Bulk,pc,not-a-price,1'
+    path.write_text('\n'.join(lines) + '\n')
+    before = scalar(conn, "SELECT COUNT(*) AS n FROM product")
+
+    with pytest.raises(ImportFailed):
+        Importer(backend, conn, res, chunk_size=3).run(bulk_import.read_csv(path), Checkpoint('csv', 'product'))
+    assert scalar(conn, "SELECT COUNT(*) AS n FROM product") == before + 6
+    assert scalar(conn, "SELECT position FROM import_checkpoints WHERE name = 'csv'") == 6
+
+    lines[8] = 'Fixed,Bulk,pc,7.50,7'
+    path.write_text('\n'.join(lines) + '\n')
+    loaded = Importer(backend, conn, res, chunk_size=3).run(bulk_import.read_csv(path), Checkpoint('csv', 'product'))
+    assert loaded == 4
+    assert scalar(conn, "SELECT COUNT(*) AS n FROM product WHERE category = 'Bulk'") == 10
+
+
+def test_max_errors_skips_invalid_records(db, tmp_path):
+    backend, conn = db
+    path = tmp_path / 'students.ndjson'
+    path.write_text('{"student_name": "Ana", "email": "ana@example.com", "gpa": 3.5}\n\n'
+                    '{"student_name": "", "email": "x@example.com"}\n'
+                    '{"student_name": "Ben", "email": "ben@example.com", "enrollment_date": "2024-06-01"}\n')
+    importer = Importer(backend, conn, RESOURCES_BY_NAME['students'], max_errors=1)
+    assert importer.run(bulk_import.read_ndjson(path), Checkpoint('nd', 'students')) == 2
+    assert [position for position, _ in importer.errors] == [2]
+
+
+def test_json_stream_across_small_reads():
+    text = '{"other": [1, 2, {"a": [3]}], "n": 12345, "products": [{"x": "a,]"}, {"x": 1.25}]}'
+    stream = bulk_import.JSONStream(io.StringIO(text), read_size=4)
+    stream.expect('{')
+    assert stream.value() == 'other'
+    stream.expect(':')
+    assert list(stream.array()) == [1, 2, {"a": [3]}]
+    stream.expect(',')
+    assert stream.value() == 'n'
+    stream.expect(':')
+    assert stream.value() == 12345
+
+
+def test_statement_splitter_respects_quotes_and_comments():
+    script = io.StringIO("-- setup; not a statement\nCREATE TABLE t (a TEXT); # trailing; comment\n"
+                         "INSERT INTO t VALUES ('x;y'), ('it''s'), ('back\\\\'); /* a; b */ SELECT 1;\nSELECT 2")
+    assert list(iter_statements(script)) == [
+        "CREATE TABLE t (a TEXT)",
+        "INSERT INTO t VALUES ('x;y'), ('it''s'), ('back\\\\')",
+        "/* a; b */ SELECT 1",
+        "SELECT 2",
+    ]
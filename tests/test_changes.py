@@ -0,0 +1,112 @@
+"""
+Tests for the delta sync feed, GET /api/<resource>/changes.
+"""
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from changes import encode_since
+
+
+@pytest.fixture(autouse=True)
+def short_lag(monkeypatch):
+    from main import Config
+    # A few milliseconds of lag, waited out by settle(), instead of seconds.
+    monkeypatch.setattr(Config, 'CHANGES_LAG_SECONDS', 0.005)
+
+
+def settle():
+    time.sleep(0.02)
+
+
+def sync(client, since=None, limit=None):
+    """Poll until more is false; return (row ids, deleted ids, next since)."""
+    ids, deleted = [], []
+    while True:
+        args = {key: value for key, value in (('since', since), ('limit', limit)) if value is not None}
+        body = client.get('/api/suppliers/changes', query_string=args).get_json()
+        ids += [row['id'] for row in body['suppliers']]
+        deleted += body['deleted']
+        since = body['next_since']
+        if not body['more']:
+            return ids, deleted, since
+
+
+def new_supplier(client, auth_headers, name):
+    response = client.post('/api/suppliers', headers=auth_headers, json={
+        'supplier_name': name, 'contact_number': '0917', 'address': 'Cebu'})
+    return response.get_json()['id']
+
+
+def test_changes_return_only_what_changed(client, auth_headers):
+    settle()
+    everything, _, since = sync(client)
+    assert len(everything) == len(set(everything)) > 0
+    assert sync(client, since)[:2] == ([], [])
+
+    created = new_supplier(client, auth_headers, 'Delta One')
+    client.put(f'/api/suppliers/{everything[0]}', headers=auth_headers, json={'address': 'Davao'})
+    client.delete(f'/api/suppliers/{everything[1]}', headers=auth_headers)
+    settle()
+    ids, deleted, since = sync(client, since)
+    assert sorted(ids) == sorted([created, everything[0]])
+    assert deleted == [everything[1]]
+    assert sync(client, since)[:2] == ([], [])
+
+
+def test_small_pages_see_every_change_once(client, auth_headers):
+    settle()
+    _, _, since = sync(client)
+    created = [new_supplier(client, auth_headers, f'Paged {i}') for i in range(7)]
+    client.delete('/api/suppliers/batch', headers=auth_headers, json={'ids': created[:3]})
+    settle()
+    ids, deleted, _ = sync(client, since, limit=2)
+    assert ids == created[3:]
+    assert sorted(deleted) == created[:3]
+
+
+def test_changes_stop_at_the_lag_horizon(client, auth_headers, monkeypatch):
+    from main import Config
+    settle()
+    _, _, since = sync(client)
+    monkeypatch.setattr(Config, 'CHANGES_LAG_SECONDS', 60)
+    created = new_supplier(client, auth_headers, 'Not Yet')
+    ids, _, held = sync(client, since)
+    assert ids == []
+    monkeypatch.setattr(Config, 'CHANGES_LAG_SECONDS', 0.005)
+    settle()
+    assert created in sync(client, held)[0]
+
+
+def test_bad_and_expired_tokens(client):
+    assert client.get('/api/suppliers/changes?since=nope').status_code == 400
+    old = encode_since((('2000-01-01 00:00:00.000', None), ('2000-01-01 00:00:00.000', None)), 0)
+    assert client.get('/api/suppliers/changes', query_string={'since': old}).status_code == 410
+
+
+def test_reset_refuses_tokens_from_before_a_reload(client, auth_headers):
+    import changes
+    from main import app, backend, get_db
+    from paging import decode_key, encode_cursor
+
+    settle()
+    since = sync(client)[2]
+    # Tokens from before generations existed carry four fields.
+    legacy = encode_cursor(decode_key(since)[:4])
+    assert client.get('/api/suppliers/changes', query_string={'since': legacy}).status_code == 200
+    with app.test_request_context():
+        cur = get_db().cursor()
+        backend.begin_write(get_db())
+        changes.reset(backend, cur, 'supplier')
+        get_db().commit()
+        cur.close()
+    for token in (since, legacy):
+        assert client.get('/api/suppliers/changes', query_string={'since': token}).status_code == 410
+    ids, deleted, since = sync(client)
+    assert ids and deleted == []
+    assert client.get('/api/suppliers/changes', query_string={'since': since}).status_code == 200
@@ -0,0 +1,109 @@
+"""
+Tests for POST /api/checkout.
+"""
+import sys
+import threading
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+def new_product(client, auth_headers, quantity):
+    response = client.post('/api/products', headers=auth_headers, json={
+        'product_name': 'Checkout Test', 'category': 'Test', 'unit': 'pc', 'price': 10, 'quantity': quantity})
+    return response.get_json()['id']
+
+
+def stock(client, resource, item_id, column):
+    return client.get(f'/api/{resource}/{item_id}').get_json()[
+        'product' if resource == 'products' else 'icecream'][column]
+
+
+def test_checkout_decrements_and_merges_lines(client, auth_headers):
+    product = new_product(client, auth_headers, 5)
+    response = client.post('/api/checkout', headers=auth_headers, json={'lines': [
+        {'resource': 'products', 'id': product, 'quantity': 2},
+        {'resource': 'icecream', 'id': 1, 'quantity': 1},
+        {'resource': 'products', 'id': product, 'quantity': 1},
+    ]})
+    assert response.status_code == 200
+    lines = response.get_json()['lines']
+    assert [line['status'] for line in lines] == ['ok', 'ok', 'ok']
+    assert lines[0]['remaining'] == 2 == lines[2]['remaining']
+    assert stock(client, 'products', product, 'quantity') == 2
+
+
+def test_atomic_checkout_sells_nothing_on_shortage(client, auth_headers):
+    product = new_product(client, auth_headers, 1)
+    before = stock(client, 'icecream', 2, 'stock')
+    response = client.post('/api/checkout', headers=auth_headers, json={'lines': [
+        {'resource': 'icecream', 'id': 2, 'quantity': 1},
+        {'resource': 'products', 'id': product, 'quantity': 3},
+        {'resource': 'products', 'id': 999999, 'quantity': 1},
+    ]})
+    assert response.status_code == 409
+    body = response.get_json()
+    assert body['committed'] is False
+    assert [line['status'] for line in body['lines']] == ['ok', 'insufficient_stock', 'not_found']
+    assert body['lines'][1]['available'] == 1
+    assert stock(client, 'icecream', 2, 'stock') == before
+    assert stock(client, 'products', product, 'quantity') == 1
+
+
+def test_best_effort_checkout_sells_what_it_can(client, auth_headers):
+    product = new_product(client, auth_headers, 1)
+    response = client.post('/api/checkout?mode=best_effort', headers=auth_headers, json={'lines': [
+        {'resource': 'products', 'id': product, 'quantity': 1},
+        {'resource': 'products', 'id': product + 1000000, 'quantity': 1},
+    ]})
+    assert response.status_code == 200
+    assert [line['status'] for line in response.get_json()['lines']] == ['ok', 'not_found']
+    assert stock(client, 'products', product, 'quantity') == 0
+
+
+def test_checkout_validates_lines(client, auth_headers):
+    response = client.post('/api/checkout', headers=auth_headers, json={'lines': [
+        {'resource': 'students', 'id': 1, 'quantity': 1},
+        {'resource': 'products', 'id': 1, 'quantity': 0},
+    ]})
+    assert response.status_code == 400
+    assert [error['index'] for error in response.get_json()['errors']] == [0, 1]
+    assert client.post('/api/checkout', json={'lines': []}).status_code == 401
+
+
+def test_checkout_rejects_quantities_beyond_int(client, auth_headers):
+    product = new_product(client, auth_headers, 5)
+    response = client.post('/api/checkout', headers=auth_headers, json={'lines': [
+        {'resource': 'products', 'id': product, 'quantity': 10 ** 30}]})
+    assert response.status_code == 400
+    response = client.post('/api/checkout', headers=auth_headers, json={'lines': [
+        {'resource': 'products', 'id': product, 'quantity': 2 ** 31 - 1},
+        {'resource': 'products', 'id': product, 'quantity': 1}]})
+    assert response.status_code == 400
+    assert [error['index'] for error in response.get_json()['errors']] == [1]
+    assert stock(client, 'products', product, 'quantity') == 5
+    response = client.post('/api/products', headers=auth_headers, json={
+        'product_name': 'Too Many', 'category': 'Test', 'unit': 'pc', 'quantity': 10 ** 30})
+    assert response.get_json()['errors'] == ['quantity must be an integer']
+
+
+def test_concurrent_checkouts_never_oversell(client, auth_headers):
+    product = new_product(client, auth_headers, 30)
+    sold = []
+
+    def terminal():
+        from main import app
+        terminal_client = app.test_client()
+        for _ in range(6):
+            response = terminal_client.post('/api/checkout', headers=auth_headers, json={'lines': [
+                {'resource': 'products', 'id': product, 'quantity': 1}]})
+            sold.append(response.status_code)
+
+    threads = [threading.Thread(target=terminal) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sold.count(200) == 30 and sold.count(409) == 18
+    assert stock(client, 'products', product, 'quantity') == 0
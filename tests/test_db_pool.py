@@ -0,0 +1,99 @@
+"""
+Tests for the connection pool using fake connections, so no MySQL server is needed.
+"""
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from db_pool import ConnectionPool, PoolTimeout
+
+
+class FakeConnection:
+    """Records the calls the pool makes on a connection."""
+
+    def __init__(self):
+        self.closed = False
+        self.pings = 0
+        self.rollbacks = 0
+        self.alive = True
+
+    def ping(self):
+        self.pings += 1
+        if not self.alive:
+            raise OSError("gone away")
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = True
+
+
+def make_pool(**kwargs):
+    opened = []
+
+    def connect():
+        conn = FakeConnection()
+        opened.append(conn)
+        return conn
+
+    options = dict(min_size=1, max_size=2, timeout=0.05, max_lifetime=60, ping_interval=60)
+    options.update(kwargs)
+    return ConnectionPool(connect, **options), opened
+
+
+def test_connections_are_reused():
+    """A released connection is handed out again instead of reconnecting."""
+    pool, opened = make_pool()
+    entry = pool.acquire()
+    pool.release(entry)
+    assert pool.acquire() is entry
+    assert len(opened) == 1
+    assert entry.conn.rollbacks == 1
+
+
+def test_checkout_times_out_when_exhausted():
+    """Waiting past the timeout raises PoolTimeout and is counted."""
+    pool, _ = make_pool()
+    pool.acquire()
+    pool.acquire()
+    with pytest.raises(PoolTimeout):
+        pool.acquire()
+    stats = pool.stats()
+    assert stats['timeouts'] == 1
+    assert stats['in_use'] == 2
+    assert stats['wait_seconds_max'] >= 0.05
+
+
+def test_waiter_gets_released_connection():
+    """A blocked checkout is woken by a release from another thread."""
+    pool, _ = make_pool(max_size=1, timeout=2)
+    entry = pool.acquire()
+    threading.Timer(0.05, pool.release, args=(entry,)).start()
+    assert pool.acquire() is entry
+
+
+def test_dead_connection_is_replaced_on_checkout():
+    """A connection failing its health check is closed and replaced."""
+    pool, opened = make_pool(ping_interval=0)
+    entry = pool.acquire()
+    entry.conn.alive = False
+    pool.release(entry)
+    fresh = pool.acquire()
+    assert fresh is not entry
+    assert entry.conn.closed
+    assert len(opened) == 2
+
+
+def test_expired_connection_is_not_reused():
+    """Connections older than max_lifetime are closed on release."""
+    pool, opened = make_pool(max_lifetime=0)
+    entry = pool.acquire()
+    pool.release(entry)
+    assert entry.conn.closed
+    assert pool.stats()['size'] == 0
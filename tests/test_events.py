@@ -0,0 +1,97 @@
+"""
+Tests for the event bus behind GET /api/events.
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import events
+from events import EventBus
+
+
+def kinds(text):
+    return [line[len('event: '):] for line in text.splitlines() if line.startswith('event: ')]
+
+
+def test_subscribers_get_only_their_resources():
+    bus = EventBus()
+    stream = events.Stream(bus, ['products'], None, heartbeat=0.01)
+    assert next(stream).startswith('retry: ')
+    bus.publish('students', 'created', {'ids': [1]})
+    bus.publish('products', 'updated', {'ids': [2]})
+    text = next(stream)
+    assert kinds(text) == ['updated'] and '"ids":[2]' in text and '"resource":"products"' in text
+    assert next(stream) == events.KEEP_ALIVE
+    stream.close()
+    assert bus.stats()['subscribers'] == 0
+
+
+def test_slow_consumer_is_dropped_after_its_buffer():
+    bus = EventBus(buffer_size=3)
+    stream = events.Stream(bus, ['products'], None, heartbeat=1)
+    next(stream)
+    for item_id in range(5):
+        bus.publish('products', 'created', {'ids': [item_id]})
+    assert kinds(next(stream)) == ['created'] * 3
+    assert next(stream) == events.DROPPED
+    with pytest.raises(StopIteration):
+        next(stream)
+    stream.close()
+    assert bus.stats() == {'subscribers': 0, 'published': 5, 'dropped': 1}
+
+
+def test_last_event_id_resumes_or_resets():
+    bus = EventBus(history=3)
+    for item_id in range(4):
+        bus.publish('products', 'created', {'ids': [item_id]})
+    _, replay = bus.subscribe(['products'], f'{bus.epoch}-2', lambda: None)
+    assert ['"ids":[2]' in text for text in replay] == [True, False]
+    _, replay = bus.subscribe(['products'], f'{bus.epoch}-0', lambda: None)
+    assert kinds(''.join(replay)) == ['reset']
+    _, replay = bus.subscribe(['products'], 'stale-4', lambda: None)
+    assert kinds(''.join(replay)) == ['reset']
+
+
+def test_subscriber_limit():
+    bus = EventBus(max_subscribers=1)
+    bus.subscribe(['products'], None, lambda: None)
+    with pytest.raises(events.Full):
+        bus.subscribe(['icecream'], None, lambda: None)
+
+
+def test_async_stream_wakes_on_publish():
+    async def scenario():
+        bus = EventBus()
+        stream = events.AsyncStream(bus, ['icecream'], None, heartbeat=5)
+        await stream.__anext__()
+        waiting = asyncio.ensure_future(stream.__anext__())
+        await asyncio.sleep(0)
+        bus.publish('icecream', 'stock', {'items': [{'id': 1, 'remaining': 3}]})
+        text = await asyncio.wait_for(waiting, 1)
+        await stream.aclose()
+        return text, bus.stats()['subscribers']
+    text, subscribers = asyncio.run(scenario())
+    assert kinds(text) == ['stock'] and subscribers == 0
+
+
+def test_write_handlers_publish(client, auth_headers):
+    from main import event_bus
+    assert client.get('/api/events?resources=nope').status_code == 400
+    response = client.get('/api/events?resources=icecream', buffered=False)
+    assert response.mimetype == 'text/event-stream'
+    body = iter(response.response)
+    next(body)
+    item_id = client.post('/api/icecream', headers=auth_headers, json={
+        'flavor': 'Ube', 'size': 'Cup', 'price': 30, 'stock': 5}).get_json()['id']
+    client.post('/api/checkout', headers=auth_headers, json={'lines': [{'resource': 'icecream', 'id': item_id, 'quantity': 1}]})
+    client.put(f'/api/icecream/{item_id}', headers=auth_headers, json={'description': 'Updated'})
+    text = next(body).decode()
+    assert kinds(text) == ['created', 'stock', 'updated']
+    assert '"remaining":4' in text
+    response.close()
+    assert event_bus.stats()['subscribers'] == 0
@@ -0,0 +1,95 @@
+"""
+Tests for the verified-token cache and token revocation.
+"""
+import datetime
+import sys
+import time
+from pathlib import Path
+
+import pytest
+from flask import Flask
+from flask_jwt_extended import create_access_token, decode_token
+from jwt import ExpiredSignatureError, InvalidSignatureError
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from jwt_cache import CachingJWTManager, RevocationCache
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config['JWT_SECRET_KEY'] = 'a-test-secret-that-is-long-enough-for-hs256'
+    app.jwt_manager = CachingJWTManager(app, max_entries=2, ttl=60)
+    return app
+
+
+def test_repeat_decodes_hit_the_cache(app):
+    manager = app.jwt_manager
+    with app.app_context():
+        token = create_access_token(identity='admin')
+        first = decode_token(token)
+        second = decode_token(token)
+    assert first == second and first['sub'] == 'admin'
+    assert manager.stats()['hits'] == 1 and manager.stats()['misses'] == 1
+    second['sub'] = 'mallory'
+    with app.app_context():
+        assert decode_token(token)['sub'] == 'admin'
+
+
+def test_entries_expire_with_the_token(app):
+    with app.app_context():
+        token = create_access_token(identity='admin', expires_delta=datetime.timedelta(seconds=1))
+        decode_token(token)
+        time.sleep(1.1)
+        with pytest.raises(ExpiredSignatureError):
+            decode_token(token)
+
+
+def test_changing_the_secret_bypasses_cached_claims(app):
+    with app.app_context():
+        token = create_access_token(identity='admin')
+        decode_token(token)
+    app.config['JWT_SECRET_KEY'] = 'a-different-secret-that-is-also-long-enough'
+    with app.app_context():
+        with pytest.raises(InvalidSignatureError):
+            decode_token(token)
+
+
+def test_cache_is_bounded(app):
+    manager = app.jwt_manager
+    with app.app_context():
+        for name in ('a', 'b', 'c'):
+            decode_token(create_access_token(identity=name))
+    assert manager.stats()['size'] == 2
+
+
+def test_logout_revokes_the_token_at_once(client, auth_headers):
+    from main import app, jwt
+
+    assert client.post('/api/suppliers', json={}, headers=auth_headers).status_code == 400
+    assert client.post('/logout', headers=auth_headers).status_code == 200
+    response = client.post('/api/suppliers', json={}, headers=auth_headers)
+    assert response.status_code == 401
+    with app.app_context():
+        assert jwt.revoked_count() >= 1
+
+
+def test_revocations_outlive_the_local_cache(client, auth_headers, monkeypatch):
+    """Another process (here: a fresh cache) still finds the revocation in revoked_tokens."""
+    from main import jwt
+
+    assert client.post('/logout', headers=auth_headers).status_code == 200
+    monkeypatch.setattr(jwt, 'revocations', RevocationCache())
+    jwt._entries.clear()
+    response = client.post('/api/suppliers', json={}, headers=auth_headers)
+    assert response.status_code == 401
+
+
+def test_unrevoked_answers_expire():
+    cache = RevocationCache(ttl=0)
+    cache.put('a', False)
+    cache.put('b', True, exp=time.time() + 60)
+    assert cache.get('a') is None
+    assert cache.get('b') is True
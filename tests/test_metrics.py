@@ -0,0 +1,62 @@
+"""
+Tests for the per-thread request metrics and the /metrics endpoint.
+"""
+import sys
+import threading
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import metrics
+
+
+def test_threads_are_summed_and_retired():
+    registry = metrics.Registry()
+
+    def work():
+        for _ in range(3):
+            registry.start()
+            registry.add(metrics.SQL, 0.002)
+            registry.finish('/api/products', 'GET', 200)
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    requests, latency, phases = registry.snapshot()
+    assert requests == {('/api/products', 'GET', 200): 12}
+    assert sum(latency[('/api/products', 'GET')][:-1]) == 12
+    sql = phases[('/api/products', 'GET', 'sql')]
+    assert sql[metrics.BUCKETS.index(0.0025)] == 12
+    # Finished threads are folded into the retired totals and dropped.
+    assert registry._threads == []
+    assert registry.snapshot()[0] == requests
+
+
+def test_render_prometheus_text():
+    registry = metrics.Registry()
+    registry.start()
+    registry.finish('/x"y', 'POST', 201)
+    text = registry.render([('up', 'gauge', 'Always one.', 1)])
+    assert 'http_requests_total{route="/x\\"y",method="POST",status="201"} 1' in text
+    assert 'http_request_duration_seconds_bucket{route="/x\\"y",method="POST",le="+Inf"} 1' in text
+    assert 'http_request_duration_seconds_count{route="/x\\"y",method="POST"} 1' in text
+    assert '# TYPE up gauge\nup 1\n' in text
+    assert 'http_request_phase_seconds_bucket' not in text
+
+
+def test_metrics_endpoint_reports_routes_and_phases(client, auth_headers):
+    client.get('/api/products/1?format=xml', headers=auth_headers)
+    client.get('/no/such/page')
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    text = response.get_data(as_text=True)
+    route = 'route="/api/products/<int:item_id>",method="GET"'
+    assert f'http_requests_total{{{route},status="200"}}' in text
+    for phase in ('jwt', 'sql', 'serialize'):
+        assert f'http_request_phase_seconds_count{{{route},phase="{phase}"}}' in text
+    assert 'http_requests_total{route="unmatched",method="GET",status="404"}' in text
+    assert '# TYPE db_pool_checkouts_total counter' in text
@@ -0,0 +1,72 @@
+"""
+Tests for keyset paging through main.py's list endpoints.
+"""
+import json
+import sys
+import uuid
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+def walk(client, path, limit, **args):
+    """Follow next_cursor from the first page to the last; return every row seen."""
+    rows, cursor = [], None
+    while True:
+        query = {**args, 'limit': limit, **({'cursor': cursor} if cursor else {})}
+        body = client.get(path, query_string=query).get_json()
+        key = next(key for key in body if key != 'next_cursor')
+        assert len(body[key]) <= limit
+        rows += body[key]
+        cursor = body['next_cursor']
+        if cursor is None:
+            return rows
+
+
+@pytest.fixture
+def students(client, auth_headers):
+    """Nine students in a major of their own, three without an enrollment date, some sharing one."""
+    major = f'Paging {uuid.uuid4().hex[:8]}'
+    dates = ['2021-06-01', None, '2020-01-15', '2021-06-01', None, '2022-03-10', '2020-01-15', None, '2019-09-01']
+    for i, date in enumerate(dates):
+        payload = {'student_name': f'Pager {i}', 'email': f'{major.split()[1]}.{i}@example.com',
+                   'major': major, 'gpa': '3.00'}
+        if date:
+            payload['enrollment_date'] = date
+        assert client.post('/api/students', headers=auth_headers, json=payload).status_code == 201
+    return major
+
+
+def test_cursor_pages_cover_the_table_once(client):
+    everything = [json.loads(line)['id']
+                  for line in client.get('/api/products?format=ndjson').get_data(as_text=True).splitlines()]
+    assert [row['id'] for row in walk(client, '/api/products', 7)] == everything
+
+
+@pytest.mark.parametrize('sort', ['enrollment_date', '-enrollment_date'])
+def test_sorted_pages_with_nulls_match_a_full_sort(client, students, sort):
+    rows = walk(client, '/api/students', 2, major=students, sort=sort)
+    assert len(rows) == 9
+    # NULLs come first ascending and last descending, ties broken by id.
+    # Dates arrive as HTTP dates, which don't sort as text.
+    expected = sorted(rows, key=lambda row: (row['enrollment_date'] is not None,
+                                             parsedate_to_datetime(row['enrollment_date'] or 'Thu, 01 Jan 1970 00:00:00 GMT'),
+                                             row['student_id']), reverse=sort.startswith('-'))
+    assert [row['student_id'] for row in rows] == [row['student_id'] for row in expected]
+
+
+def test_sorted_pages_with_ties_on_price(client):
+    rows = walk(client, '/api/products', 3, sort='-price')
+    keys = [(float(row['price']), row['id']) for row in rows]
+    assert keys == sorted(keys, reverse=True)
+    assert len({row['id'] for row in rows}) == len(rows)
+
+
+def test_cursor_from_another_sort_is_rejected(client):
+    cursor = client.get('/api/products?limit=1&sort=price').get_json()['next_cursor']
+    assert client.get(f'/api/products?limit=1&cursor={cursor}').status_code == 400
+    assert client.get(f'/api/products?limit=1&sort=-price&cursor={cursor}').status_code == 400
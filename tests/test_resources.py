@@ -0,0 +1,79 @@
+"""
+Tests for the resource registry and its precompiled SQL.
+"""
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from resources import RESOURCES, RESOURCES_BY_NAME, STATEMENT_CACHE_SIZE
+
+
+def test_update_sql_is_indexed_by_field_mask():
+    res = RESOURCES_BY_NAME['icecream']
+    query, args = res.update_query({'stock': 5, 'flavor': 'Ube'}, 7)
+    assert query == "UPDATE icecream SET flavor=%s, stock=%s WHERE id=%s"
+    assert args == ('Ube', 5, 7)
+    assert res.update_sql[res.field_mask({'flavor': 1, 'stock': 1})] is query
+
+
+def test_update_query_ignores_unknown_fields():
+    res = RESOURCES_BY_NAME['products']
+    assert res.update_query({'nope': 1}, 1) == (None, ())
+
+
+def test_list_query_variants():
+    res = RESOURCES_BY_NAME['students']
+    query, args = res.list_query(after=10, limit=51)
+    assert query == "SELECT * FROM students WHERE student_id > %s ORDER BY student_id LIMIT %s"
+    assert args == (10, 51)
+    query, args = res.list_query(q='ana')
+    assert query == ("SELECT * FROM students WHERE (student_name LIKE %s OR email LIKE %s) "
+                     "ORDER BY student_id")
+    assert args == ('%ana%', '%ana%')
+
+
+def test_in_statements_are_cached_per_length():
+    res = RESOURCES_BY_NAME['suppliers']
+    assert res.delete_in_sql(3) == "DELETE FROM supplier WHERE id IN (%s, %s, %s)"
+    assert res.delete_in_sql(3) is res.delete_in_sql(3)
+    mask = res.field_mask({'email': 'x'})
+    assert res.case_update_sql(mask, 2) == (
+        "UPDATE supplier SET email = CASE id WHEN %s THEN %s WHEN %s THEN %s END "
+        "WHERE id IN (%s, %s)")
+
+
+def test_fields_projection():
+    res = RESOURCES_BY_NAME['products']
+    mask, error = res.parse_fields('price, product_name')
+    assert error is None
+    assert res.project(res.select_sql, mask) == "SELECT id, product_name, price FROM product WHERE id=%s"
+    assert res.project(res.select_sql, None) == res.select_sql
+    assert res.parse_fields('price,secret') == (None, "unknown field: secret")
+
+
+def test_statement_caches_are_bounded():
+    res = RESOURCES_BY_NAME['products']
+    for price in range(STATEMENT_CACHE_SIZE + 10):
+        res.list_query(filters=[(f"price = {price}", price)])
+        res.project(res.select_sql + f" -- {price}", 3)
+    assert res._list_statement.cache_info().currsize == STATEMENT_CACHE_SIZE
+    assert res._projection.cache_info().currsize == STATEMENT_CACHE_SIZE
+
+
+def test_sorted_list_seeks_past_value_and_id():
+    res = RESOURCES_BY_NAME['icecream']
+    fields, filters, sort, after, error = res.parse_list_args(
+        {'stock_lt': '10', 'sort': '-price'}, ('-price', '160.00', 2))
+    assert error is None
+    query, args = res.list_query(None, after, 51, filters, sort)
+    assert query == ("SELECT * FROM icecream WHERE stock < %s AND "
+                     "(price < %s OR (price = %s AND id < %s) OR price IS NULL) "
+                     "ORDER BY price DESC, id DESC LIMIT %s")
+    assert args == (10, 160.0, 160.0, 2, 51)
+    assert res.list_query(None, after, 51, filters, sort)[0] is query
+
+
+def test_registry_names_are_unique():
+    assert len(RESOURCES_BY_NAME) == len(RESOURCES)
@@ -0,0 +1,86 @@
+"""
+Tests for the write-invalidated response cache and conditional GET handling.
+Most use a throwaway Flask app so no database is needed.
+"""
+import sys
+from pathlib import Path
+
+import pytest
+from flask import Flask, jsonify
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from response_cache import ResponseCache
+
+
+@pytest.fixture
+def setup():
+    """App with one cached route that counts how often the view runs."""
+    app = Flask(__name__)
+    cache = ResponseCache(max_entries=2, ttl=60, max_body=1024)
+    calls = []
+
+    @app.route('/items')
+    @cache.cached('item')
+    def items():
+        calls.append(1)
+        return jsonify({'items': [1, 2, 3], 'calls': len(calls)})
+
+    return app.test_client(), cache, calls
+
+
+def test_repeated_reads_served_from_cache(setup):
+    """Identical requests run the view once and carry an ETag."""
+    client, _, calls = setup
+    first = client.get('/items')
+    second = client.get('/items')
+    assert first.status_code == second.status_code == 200
+    assert first.headers['ETag'] == second.headers['ETag']
+    assert first.data == second.data
+    assert len(calls) == 1
+
+
+def test_if_none_match_returns_304(setup):
+    """A matching If-None-Match gets 304 without running the view."""
+    client, _, calls = setup
+    etag = client.get('/items').headers['ETag']
+    response = client.get('/items', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+    assert len(calls) == 1
+
+
+def test_bump_invalidates(setup):
+    """A write bump forces the next read back to the view."""
+    client, cache, calls = setup
+    client.get('/items')
+    cache.bump('item')
+    response = client.get('/items')
+    assert response.get_json()['calls'] == 2
+
+
+def test_args_are_part_of_key_and_lru_is_bounded(setup):
+    """Different query strings are cached separately and old keys are evicted."""
+    client, cache, calls = setup
+    client.get('/items?format=json')
+    client.get('/items?page=2')
+    client.get('/items?page=3')
+    assert len(calls) == 3
+    client.get('/items?format=json')
+    assert len(calls) == 4
+
+
+def test_main_app_write_changes_etag(client, auth_headers):
+    """Through main.py: 304 until a write, then a fresh body under a new ETag."""
+    first = client.get('/api/products?limit=5')
+    etag = first.headers['ETag']
+    assert client.get('/api/products?limit=5', headers={'If-None-Match': etag}).status_code == 304
+    product_id = first.get_json()['products'][0]['id']
+    assert client.put(f'/api/products/{product_id}', headers=auth_headers,
+                      json={'quantity': 4321}).status_code == 200
+    after = client.get('/api/products?limit=5', headers={'If-None-Match': etag})
+    assert after.status_code == 200
+    assert after.headers['ETag'] != etag
+    assert after.get_json()['products'][0]['quantity'] == 4321
+    assert client.get(f'/api/products/{product_id}').get_json()['product']['quantity'] == 4321
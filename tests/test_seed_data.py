@@ -0,0 +1,102 @@
+"""
+Tests for seed_data.py, the synthetic data generator.
+"""
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import changes
+import seed_data
+from resources import RESOURCES
+from storage import SQLiteBackend
+
+
+@pytest.fixture
+def db(tmp_path):
+    backend = SQLiteBackend(SimpleNamespace(SQLITE_PATH=str(tmp_path / 'seed.db')))
+    conn = backend.connect()
+    yield backend, conn
+    conn.close()
+
+
+def generated(table, seed, rows, block=40, **kwargs):
+    return [row for chunk in seed_data.produce(table, seed, rows, block=block, **kwargs) for row in chunk]
+
+
+def table_rows(conn, res):
+    cur = conn.cursor()
+    cur.execute(f"SELECT {res.pk}, {', '.join(res.columns)} FROM {res.table} ORDER BY {res.pk}")
+    rows = [tuple(row.values()) for row in cur.fetchall()]
+    cur.close()
+    return rows
+
+
+@pytest.mark.parametrize('res', RESOURCES, ids=lambda res: res.name)
+def test_generated_rows_are_valid_and_deterministic(res):
+    rows = generated(res.table, 7, 100)
+    assert len(rows) == 100
+    for row in rows:
+        assert res.clean(dict(zip(res.columns, row)), partial=False)[1] == []
+    assert generated(res.table, 7, 100, workers=2) == rows
+    assert generated(res.table, 7, 100, start=55) == rows[55:]
+    assert generated(res.table, 8, 100) != rows
+
+
+def test_seed_table_replaces_rows_and_rebuilds_summaries(db):
+    backend, conn = db
+    res = next(res for res in RESOURCES if res.table == 'product')
+    assert seed_data.seed_table(backend, conn, res, 250, seed=3, chunk_size=100) == 250
+    rows = table_rows(conn, res)
+    assert [row[0] for row in rows] == list(range(1, 251))
+    names = [row[0] for row in generated('product', 3, 250, seed_data.BLOCK)]
+    assert [row[1] for row in rows] == names
+    cur = conn.cursor()
+    cur.execute("SELECT SUM(products) AS products FROM product_category_summary")
+    assert cur.fetchone()['products'] == 250
+    cur.execute("SELECT COUNT(*) AS n FROM import_checkpoints")
+    assert cur.fetchone()['n'] == 0
+    # /changes clients of the replaced table are sent back to a full sync.
+    assert changes.generation(cur, 'product') == 1
+    assert changes.generation(cur, 'supplier') == 0
+    cur.close()
+
+
+def index_names(conn, table):
+    cur = conn.cursor()
+    cur.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = %s", (table,))
+    names = sorted(row['name'] for row in cur.fetchall())
+    cur.close()
+    return names
+
+
+def test_interrupted_seed_resumes_to_the_same_table(db, monkeypatch):
+    backend, conn = db
+    res = next(res for res in RESOURCES if res.table == 'students')
+    indexes = index_names(conn, 'students')
+    seed_data.seed_table(backend, conn, res, 300, seed=5, chunk_size=50)
+    expected = table_rows(conn, res)
+
+    flush = seed_data.Seeder._flush
+    calls = []
+
+    def failing_flush(self, *args):
+        calls.append(1)
+        if len(calls) == 3:
+            raise KeyboardInterrupt
+        return flush(self, *args)
+
+    monkeypatch.setattr(seed_data.Seeder, '_flush', failing_flush)
+    with pytest.raises(KeyboardInterrupt):
+        seed_data.seed_table(backend, conn, res, 300, seed=5, chunk_size=50)
+    monkeypatch.setattr(seed_data.Seeder, '_flush', flush)
+    assert len(table_rows(conn, res)) == 100
+
+    assert seed_data.seed_table(backend, conn, res, 300, seed=5, chunk_size=50) == 200
+    assert table_rows(conn, res) == expected
+    # Indexes dropped by the interrupted run were rebuilt by the resumed one.
+    assert index_names(conn, 'students') == indexes
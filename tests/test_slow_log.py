@@ -0,0 +1,66 @@
+"""
+Tests for the slow-query log and its admin endpoint.
+"""
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import slow_log
+
+
+def test_normalize_folds_placeholder_lists():
+    assert slow_log.normalize("SELECT * FROM t\n  WHERE id IN (%s, %s, %s)") == \
+        "SELECT * FROM t WHERE id IN (%s, ...)"
+    assert slow_log.normalize("UPDATE t SET a = CASE id WHEN %s THEN %s WHEN %s THEN %s END") == \
+        "UPDATE t SET a = CASE id WHEN %s THEN %s ... END"
+
+
+def test_threshold_redaction_and_one_plan_per_shape():
+    explained = []
+
+    def explain(query, args):
+        explained.append((query, args))
+        return [{'plan': 'scan'}]
+
+    log = slow_log.SlowQueryLog(0.1, 2, explain, redact=True)
+    log.observe("SELECT 1 WHERE a = %s", ('secret',), 1, 0.05)
+    assert log.snapshot() == []
+    log.observe("SELECT * FROM t WHERE id IN (%s, %s)", (1, 2), 2, 0.2)
+    log.observe("SELECT * FROM t WHERE id IN (%s, %s, %s)", (1, 2, 3), 3, 0.3)
+    log.observe("INSERT INTO t VALUES (%s)", [('a',), ('b',)], 2, 0.4, many=True)
+    entries = log.snapshot()
+    assert [entry['rows'] for entry in entries] == [2, 3]
+    assert entries[0]['batch_rows'] == 2 and entries[0]['params'] == ['?']
+    assert entries[1]['plan'] == [{'plan': 'scan'}]
+    assert explained == [("SELECT * FROM t WHERE id IN (%s, %s)", (1, 2)), ("INSERT INTO t VALUES (%s)", ('a',))]
+
+
+def test_admin_endpoint_shows_plans(client, auth_headers):
+    import main
+
+    assert client.get('/admin/slow-queries').status_code == 401
+    threshold = main.slow_queries.threshold
+    main.slow_queries.threshold = 0
+    try:
+        client.get('/api/icecream?size=Cone&sort=price&limit=2')
+    finally:
+        main.slow_queries.threshold = threshold
+    entries = client.get('/admin/slow-queries', headers=auth_headers).get_json()['entries']
+    entry = next(e for e in entries if e['query'].startswith('SELECT * FROM icecream WHERE size = %s'))
+    assert entry['params'] == ['Cone', 3]
+    assert entry['context'] == 'GET /api/icecream?size=Cone&sort=price&limit=2'
+    assert any('idx_icecream_size_price' in step['detail'] for step in entry['plan'])
+
+
+def test_redacted_context_drops_the_query_string(client, monkeypatch):
+    import main
+
+    monkeypatch.setattr(main.slow_queries, 'threshold', 0)
+    monkeypatch.setattr(main.slow_queries, 'redact', True)
+    client.get('/api/students?email=private@example.com&limit=1')
+    monkeypatch.setattr(main.slow_queries, 'threshold', 1e9)
+    entry = next(e for e in main.slow_queries.snapshot() if e['query'].startswith('SELECT * FROM students'))
+    assert entry['context'] == 'GET /api/students'
+    assert 'private@example.com' not in str(entry)
@@ -0,0 +1,200 @@
+"""
+Tests for the storage backends, driving main.py against embedded SQLite.
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import storage
+from main import backend
+
+
+class SQLiteConfig:
+    DB_BACKEND = 'sqlite'
+    SQLITE_PATH = ':memory:'
+
+
+def test_create_backend_rejects_unknown_names():
+    class Bad(SQLiteConfig):
+        DB_BACKEND = 'oracle'
+    with pytest.raises(ValueError):
+        storage.create_backend(Bad)
+
+
+def test_sqlite_memory_database_is_shared_between_connections():
+    db = storage.create_backend(SQLiteConfig)
+    first, second = db.connect(), db.connect()
+    cur = first.cursor()
+    cur.execute("INSERT INTO supplier (supplier_name, contact_number, address) VALUES (%s, %s, %s)",
+                ('Shared', '0917', 'Cebu'))
+    first.commit()
+    new_id = cur.lastrowid
+    cur = second.cursor()
+    cur.execute("SELECT supplier_name FROM supplier WHERE id = %s", (new_id,))
+    assert cur.fetchone() == {'supplier_name': 'Shared'}
+    # Each :memory: backend gets its own database, seeded from setup_sqlite.sql.
+    other = storage.create_backend(SQLiteConfig).connect().cursor()
+    other.execute("SELECT COUNT(*) AS n FROM supplier")
+    assert other.fetchone() == {'n': 10}
+
+
+def test_sample_data_and_trigram_search(client):
+    assert backend.name == 'sqlite'
+    rows = client.get('/api/icecream?q=Magnum').get_json()['icecreams']
+    assert sorted(row['flavor'] for row in rows) == ['Selecta Magnum Almond', 'Selecta Magnum Classic',
+                                                     'Selecta Magnum Infinity Chocolate']
+    # The FTS join's own columns are projected away.
+    assert 'hit' not in rows[0] and 'score' not in rows[0]
+    # Trigrams match inside words and ignore case.
+    assert [row['flavor'] for row in client.get('/api/icecream?q=agnum almo').get_json()['icecreams']] == \
+        ['Selecta Magnum Almond']
+
+
+def test_search_index_follows_writes(client, auth_headers):
+    created = client.post('/api/suppliers', headers=auth_headers,
+                          json={'supplier_name': 'Zqxw Traders', 'contact_number': '0917', 'address': 'Iloilo'})
+    supplier_id = created.get_json()['id']
+    assert [row['id'] for row in client.get('/api/suppliers?q=zqxw').get_json()['suppliers']] == [supplier_id]
+    client.put(f'/api/suppliers/{supplier_id}', headers=auth_headers, json={'supplier_name': 'Vkjy Traders'})
+    assert client.get('/api/suppliers?q=zqxw').get_json()['suppliers'] == []
+    assert [row['id'] for row in client.get('/api/suppliers?q=vkjy').get_json()['suppliers']] == [supplier_id]
+    client.delete(f'/api/suppliers/{supplier_id}', headers=auth_headers)
+    assert client.get('/api/suppliers?q=vkjy').get_json()['suppliers'] == []
+
+
+def test_short_search_uses_like(client):
+    rows = client.get('/api/icecream?q=Ma&fields=flavor').get_json()['icecreams']
+    assert rows and all('ma' in row['flavor'].lower() for row in rows)
+    assert set(rows[0]) == {'id', 'flavor'}
+
+
+def test_existing_database_gets_search_tables(tmp_path):
+    class FileConfig(SQLiteConfig):
+        SQLITE_PATH = str(tmp_path / 'store.db')
+    conn = storage.create_backend(FileConfig).connect()
+    cur = conn.cursor()
+    for table in ('product', 'supplier', 'icecream', 'students'):
+        cur.execute(f"DROP TABLE {table}_search")
+    conn.commit()
+    conn.close()
+    cur = storage.create_backend(FileConfig).connect().cursor()
+    cur.execute("SELECT rowid FROM icecream_search WHERE icecream_search MATCH %s", ('"magnum"',))
+    assert len(cur.fetchall()) == 3
+
+
+def test_batch_round_trip(client, auth_headers):
+    items = [{'student_name': f'Batch {i}', 'email': f'batch{i}@example.com', 'gpa': '3.50'} for i in range(3)]
+    response = client.post('/api/students/batch', json=items, headers=auth_headers)
+    assert response.status_code == 201
+    ids = [entry['id'] for entry in response.get_json()['created']]
+    assert len(set(ids)) == 3
+    response = client.patch('/api/students/batch', headers=auth_headers,
+                            json=[{'id': ids[0], 'fields': {'major': 'Math'}}, {'id': 999999, 'fields': {'major': 'X'}}])
+    assert response.get_json()['updated'] == [ids[0]]
+    assert response.get_json()['not_found'] == [999999]
+    assert client.get(f'/api/students/{ids[0]}').get_json()['student']['major'] == 'Math'
+    response = client.delete('/api/students/batch', json={'ids': ids}, headers=auth_headers)
+    assert response.get_json()['deleted'] == ids
+
+
+def test_best_effort_batch_reports_constraint_violations(client, auth_headers):
+    taken = {'student_name': 'Taken', 'email': 'taken@example.com'}
+    assert client.post('/api/students', json=taken, headers=auth_headers).status_code == 201
+    items = [{'student_name': 'Fresh 1', 'email': 'fresh1@example.com'}, taken,
+             {'email': 'nameless@example.com'}, {'student_name': 'Fresh 2', 'email': 'fresh2@example.com'}]
+    response = client.post('/api/students/batch', json=items, headers=auth_headers)
+    assert response.status_code == 400
+    del items[2]
+    assert client.post('/api/students/batch', json=items, headers=auth_headers).status_code == 409
+    response = client.post('/api/students/batch?mode=best_effort', json=items, headers=auth_headers)
+    assert response.status_code == 201
+    body = response.get_json()
+    assert [entry['index'] for entry in body['created']] == [0, 2]
+    assert [entry['index'] for entry in body['errors']] == [1]
+    for entry in body['created']:
+        assert client.get(f"/api/students/{entry['id']}").status_code == 200
+    response = client.post('/api/students/batch?mode=best_effort', json=[taken], headers=auth_headers)
+    assert response.status_code == 409
+    assert response.get_json()['errors'][0]['index'] == 0
+
+
+def test_duplicate_email_is_a_conflict(client, auth_headers):
+    student = {'student_name': 'Dup', 'email': 'dup@example.com'}
+    assert client.post('/api/students', json=student, headers=auth_headers).status_code == 201
+    assert client.post('/api/students', json=student, headers=auth_headers).status_code == 409
+
+
+def test_stream_reads_every_row(client):
+    body = client.get('/api/products?format=ndjson&fields=id').get_data(as_text=True)
+    assert len(body.splitlines()) >= 20
+
+
+class FakeMySQLCursor:
+    """Hands out auto-increment ids the way MySQL does for each statement."""
+
+    def __init__(self, step, mode):
+        self.settings = {'step': step, 'mode': mode}
+        self.next_id = 11
+        self.step = step
+        self.statements = []
+
+    def execute(self, query, args=None):
+        if query.startswith('SELECT @@'):
+            return
+        self.statements.append(1)
+        self.lastrowid = self.next_id
+        self.next_id += self.step
+
+    def executemany(self, query, rows):
+        self.statements.append(len(rows))
+        self.lastrowid = self.next_id
+        self.next_id += self.step * len(rows)
+
+    def fetchone(self):
+        return self.settings
+
+
+@pytest.mark.parametrize('step', [1, 2, 5])
+def test_mysql_insert_many_steps_by_auto_increment_increment(step):
+    from resources import RESOURCES
+    cur = FakeMySQLCursor(step, mode=1)
+    ids = storage.MySQLBackend.insert_many(None, cur, RESOURCES[0], [()] * 5, 2)
+    assert cur.statements == [2, 2, 1]
+    assert ids == [11 + step * i for i in range(5)]
+
+
+def test_mysql_insert_many_goes_row_by_row_under_interleaved_locks():
+    from resources import RESOURCES
+    cur = FakeMySQLCursor(3, mode=2)
+    ids = storage.MySQLBackend.insert_many(None, cur, RESOURCES[0], [()] * 3, 100)
+    assert cur.statements == [1, 1, 1]
+    assert ids == [11, 14, 17]
+
+
+def test_batch_rejects_boolean_ids(client, auth_headers):
+    response = client.patch('/api/students/batch', headers=auth_headers,
+                            json=[{'id': True, 'fields': {'major': 'X'}}])
+    assert response.status_code == 400
+    response = client.delete('/api/students/batch', json={'ids': [True]}, headers=auth_headers)
+    assert response.status_code == 400
+
+
+def test_sqlite_rows_have_mysql_types(client, auth_headers):
+    item_id = client.post('/api/icecream', headers=auth_headers, json={
+        'flavor': 'Shape Test', 'size': 'Cone', 'price': 10, 'stock': 1}).get_json()['id']
+    item = client.get(f'/api/icecream/{item_id}').get_json()['icecream']
+    assert item['price'] == '10.00'
+    assert item['created_at'].endswith(' GMT')
+    student = client.get('/api/students?limit=1').get_json()['students'][0]
+    assert len(student['gpa'].split('.')[1]) == 2
+
+
+def test_ids_beyond_bigint_are_not_found(client, auth_headers):
+    assert client.get('/api/products/99999999999999999999999').status_code == 404
+    assert client.delete('/api/products/99999999999999999999999', headers=auth_headers).status_code in (404, 405)
+    response = client.delete('/api/products/batch', json={'ids': [2 ** 63]}, headers=auth_headers)
+    assert response.status_code == 400
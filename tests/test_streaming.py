@@ -0,0 +1,54 @@
+"""
+Tests for streamed list responses (?stream=1 and ?format=ndjson) in main.py.
+"""
+import json
+import sys
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    from main import Config
+    # A few rows per fetch, so every stream spans several chunks.
+    monkeypatch.setattr(Config, 'STREAM_CHUNK_SIZE', 3)
+
+
+def ndjson_ids(client, path):
+    return [json.loads(line)['id'] for line in client.get(path).get_data(as_text=True).splitlines()]
+
+
+def test_streamed_json_array_spans_chunks(client, small_chunks):
+    expected = ndjson_ids(client, '/api/icecream?format=ndjson')
+    response = client.get('/api/icecream?stream=1', buffered=False)
+    assert response.mimetype == 'application/json'
+    chunks = [chunk.decode() for chunk in response.response]
+    assert len(chunks) > 3
+    body = json.loads(''.join(chunks))
+    assert [row['id'] for row in body['icecreams']] == expected
+    assert len(expected) > 3
+
+
+def test_streamed_xml_spans_chunks(client, small_chunks):
+    expected = ndjson_ids(client, '/api/icecream?format=ndjson&sort=-price')
+    response = client.get('/api/icecream?stream=1&format=xml&sort=-price')
+    assert response.mimetype == 'application/xml'
+    root = ET.fromstring(response.get_data())
+    items = root.find('icecreams').findall('item')
+    assert [int(item.findtext('id')) for item in items] == expected
+    assert all(item.findtext('flavor') for item in items)
+
+
+def test_streams_apply_limit_filters_and_fields(client, small_chunks):
+    body = client.get('/api/icecream?stream=1&size=Cone&fields=flavor&limit=2').get_json()
+    assert len(body['icecreams']) == 2
+    assert all(set(row) == {'id', 'flavor'} for row in body['icecreams'])
+    assert client.get('/api/icecream?stream=1').get_json()['icecreams'] != []
+    assert client.get('/api/icecream?stream=1&price_min=x').status_code == 400
+    assert client.get('/api/icecream?stream=1&format=xml&size=Nope').get_data(as_text=True).endswith(
+        '<icecreams></icecreams></response>')
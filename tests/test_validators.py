@@ -0,0 +1,81 @@
+"""
+Tests for the payload schemas.
+"""
+import datetime
+import sys
+from decimal import Decimal
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from validators import ICECREAM, PRODUCT, STUDENT, SUPPLIER, validate_int
+
+
+def test_full_clean_coerces_and_fills_defaults():
+    data, errors = PRODUCT.clean({'product_name': 'Tuna', 'category': 'Food', 'unit': 'can',
+                                  'price': 35.5, 'quantity': '80', 'extra': 1})
+    assert errors == []
+    assert data == {'product_name': 'Tuna', 'category': 'Food', 'unit': 'can',
+                    'price': Decimal('35.5'), 'quantity': 80, 'description': ''}
+    assert PRODUCT.row(data) == ('Tuna', 'Food', 'can', Decimal('35.5'), 80, '')
+
+
+def test_missing_and_invalid_fields_are_reported():
+    data, errors = ICECREAM.clean({'flavor': ' ', 'price': 'free', 'stock': 2.5})
+    assert errors == ['flavor must be a non-empty string', 'size is required',
+                      'price must be a number', 'stock must be an integer']
+
+
+def test_partial_clean_keeps_only_sent_fields():
+    data, errors = STUDENT.clean({'gpa': '3.75', 'enrollment_date': '2024-06-01'}, partial=True)
+    assert errors == []
+    assert data == {'gpa': Decimal('3.75'), 'enrollment_date': datetime.date(2024, 6, 1)}
+    assert STUDENT.clean({'enrollment_date': 'June'}, partial=True)[1] == [
+        'enrollment_date must be a date (YYYY-MM-DD)']
+
+
+def test_rejects_bools_non_finite_and_out_of_range_numbers():
+    for bad in (True, 'NaN', float('inf'), '1e400', 123456789012, '-100000000', 99999999.999):
+        assert PRODUCT.clean({'price': bad}, partial=True)[1] == ['price must be a number']
+    assert PRODUCT.clean({'quantity': False}, partial=True)[1] == ['quantity must be an integer']
+    for bad in (2 ** 31, '-2147483649', 1e12):
+        assert PRODUCT.clean({'quantity': bad}, partial=True)[1] == ['quantity must be an integer']
+    assert PRODUCT.clean({'quantity': 2 ** 31 - 1}, partial=True)[0] == {'quantity': 2 ** 31 - 1}
+
+
+def test_validate_int():
+    assert validate_int('12') == 12
+    assert validate_int('x') is None
+    assert validate_int(None) is None
+    assert validate_int(True) is None
+    assert validate_int(False) is None
+    assert validate_int(2 ** 63 - 1) == 2 ** 63 - 1
+    assert validate_int(str(2 ** 63)) is None
+
+
+def test_decimals_are_rounded_to_cents():
+    data = PRODUCT.clean({'price': '19.995'}, partial=True)[0]
+    assert str(data['price']) == '20.00'
+    assert str(PRODUCT.clean({'price': 99999999.99}, partial=True)[0]['price']) == '99999999.99'
+    assert str(PRODUCT.clean({'price': '-0.004'}, partial=True)[0]['price']) == '0.00'
+
+
+def test_decimals_fit_their_own_column():
+    """gpa is DECIMAL(3, 2), so it stays under 10; prices go up to 10^8."""
+    assert STUDENT.clean({'gpa': '9.99'}, partial=True)[0] == {'gpa': Decimal('9.99')}
+    for bad in (150, '10', 9.995):
+        assert STUDENT.clean({'gpa': bad}, partial=True)[1] == ['gpa must be a number']
+    assert str(STUDENT.clean({'gpa': 3.456}, partial=True)[0]['gpa']) == '3.46'
+    assert PRODUCT.clean({'price': 150}, partial=True)[0] == {'price': Decimal('150.00')}
+
+
+def test_strings_fit_their_varchar():
+    assert PRODUCT.clean({'category': 'x' * 50, 'unit': 'y' * 20}, partial=True)[1] == []
+    assert PRODUCT.clean({'category': 'x' * 51, 'unit': 'y' * 21}, partial=True)[1] == [
+        'category must be at most 50 characters', 'unit must be at most 20 characters']
+    assert SUPPLIER.clean({'contact_number': '0' * 21, 'phone': '0' * 21}, partial=True)[1] == [
+        'contact_number must be at most 20 characters', 'phone must be at most 20 characters']
+    assert ICECREAM.clean({'size': 'L' * 51}, partial=True)[1] == ['size must be at most 50 characters']
+    # TEXT columns have no character limit.
+    assert SUPPLIER.clean({'address': 'a' * 1000}, partial=True)[1] == []
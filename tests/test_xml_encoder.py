@@ -0,0 +1,59 @@
+"""
+Tests for the XML encoder used by to_format.
+Output is compared byte-for-byte against dicttoxml with the options main.py used.
+"""
+import datetime
+import sys
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+from dicttoxml import dicttoxml
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import xml_encoder
+
+
+def reference(data):
+    """Encode with dicttoxml the way to_format used to."""
+    return dicttoxml(data, custom_root='response', attr_type=False)
+
+
+PRODUCT = {
+    'id': 1,
+    'product_name': 'Canned Tuna & "Sardines" <2 pcs>',
+    'category': "Kid's Food",
+    'unit': 'can',
+    'price': Decimal('35.00'),
+    'quantity': 80,
+    'description': None,
+    'created_at': datetime.datetime(2024, 1, 15, 8, 30, 0),
+}
+
+
+@pytest.mark.parametrize('data', [
+    {'products': [PRODUCT, dict(PRODUCT, id=2)], 'next_cursor': 'Mg'},
+    {'products': [], 'next_cursor': None},
+    {'product': PRODUCT},
+    {'students': [{'student_id': 1, 'gpa': 3.85, 'enrollment_date': datetime.date(2024, 1, 15)}]},
+    {'flags': [True, False, None, 1.5, 'x'], 'ok': True, 'nested': {'inner': [[1, 2], {'a': 'b'}]}},
+    {'1': 'numeric key', 'two words': 'space', 'a&b': 'invalid', 3: 'int key'},
+    ['a', 1, None],
+    'plain',
+])
+def test_matches_dicttoxml(data):
+    """Encoder output is identical to dicttoxml for the response shapes."""
+    assert xml_encoder.dumps(data) == reference(data)
+
+
+def test_encode_item_wraps_row():
+    """A single row is wrapped in an item element."""
+    assert xml_encoder.encode_item({'id': 7}) == '<item><id>7</id></item>'
+
+
+def test_unsupported_type_raises():
+    """Values dicttoxml cannot encode still raise TypeError."""
+    with pytest.raises(TypeError):
+        xml_encoder.dumps({'bad': object()})
@@ -0,0 +1,226 @@
+"""Payload validation and INSERT row builders shared by the sync and async apps.
+
+Each table's payload is described by a field-spec table: (name, kind,
+default), where default REQUIRED marks a field a create must send. Kinds
+carry their column's limits (``text(50)`` for a VARCHAR(50), ``decimal(3, 2)``
+for a DECIMAL(3, 2)), so values the database would reject are reported as
+field errors instead. A Schema pairs each field with its kind's coercer; ``clean(payload, partial)`` runs
+them over the known fields in one pass and returns (data, errors). data is
+ready to bind: Decimal for money, int for counts, datetime.date for dates,
+with defaults filled in on a full create.
+"""
+import datetime
+from decimal import ROUND_HALF_UP, Decimal
+from functools import lru_cache
+from operator import itemgetter
+
+from werkzeug.routing import IntegerConverter
+
+REQUIRED = object()
+COERCE_ERRORS = (TypeError, ValueError, ArithmeticError)
+CACHE_LIMIT = 4096
+# Largest BIGINT; bigger integers overflow the database drivers.
+INT_MAX = 2 ** 63 - 1
+# Stock counts are INT columns.
+COUNT_MAX = 2 ** 31 - 1
+# DECIMAL(10, 2), the money columns: cents, and under 10^8 in magnitude.
+CENT = Decimal("0.01")
+DECIMAL_LIMIT = Decimal(10) ** 8
+
+
+class Invalid(ValueError):
+    """A coercion failure with its own message suffix, e.g. for a string that is too long."""
+
+
+def validate_int(val):
+    """Validate if value can be converted to a 64-bit integer; JSON booleans are not integers."""
+    if isinstance(val, bool):
+        return None
+    try:
+        number = int(val)
+    except (TypeError, ValueError, OverflowError):
+        return None
+    return number if -INT_MAX - 1 <= number <= INT_MAX else None
+
+
+class IdConverter(IntegerConverter):
+    """The <int:...> URL converter capped at INT_MAX, so huge ids are a 404, not a driver overflow."""
+
+    def __init__(self, url_map, *args, **kwargs):
+        kwargs.setdefault('max', INT_MAX)
+        super().__init__(url_map, *args, **kwargs)
+
+
+def to_decimal(value, quantum=CENT, limit=DECIMAL_LIMIT):
+    """Coerce a JSON number or numeric string to a Decimal rounded to quantum.
+
+    Values are rounded half up as MySQL would; non-finite values and ones of
+    limit or more in magnitude are rejected. The defaults fit DECIMAL(10, 2).
+    """
+    if isinstance(value, bool):
+        raise TypeError(value)
+    if isinstance(value, float):
+        value = repr(value)
+    elif isinstance(value, str):
+        # float() rejects junk far faster than Decimal's signalling context.
+        value = value.strip()
+        float(value)
+    elif not isinstance(value, (int, Decimal)):
+        raise TypeError(value)
+    number = Decimal(value)
+    if not number.is_finite() or abs(number) >= limit:
+        raise ValueError(value)
+    number = number.quantize(quantum, rounding=ROUND_HALF_UP)
+    if abs(number) >= limit:
+        raise ValueError(value)
+    # Sub-cent negatives round to -0.00; store and return plain 0.00.
+    return number if number else number.copy_abs()
+
+
+def to_int(value):
+    """Coerce an integer, integral float or integer string to an int that fits an INT column."""
+    if isinstance(value, bool):
+        raise TypeError(value)
+    if isinstance(value, float):
+        if not value.is_integer():
+            raise ValueError(value)
+        value = int(value)
+    elif isinstance(value, str):
+        value = int(value.strip())
+    elif not isinstance(value, int):
+        raise TypeError(value)
+    if not -COUNT_MAX - 1 <= value <= COUNT_MAX:
+        raise ValueError(value)
+    return value
+
+
+def to_date(value):
+    """Coerce a YYYY-MM-DD string (or a date) to datetime.date; None passes through."""
+    if value is None or type(value) is datetime.date:
+        return value
+    if not isinstance(value, str):
+        raise TypeError(value)
+    return datetime.date.fromisoformat(value.strip())
+
+
+# A kind is (coercer, whether coerced values are memoized, error message
+# suffix). Prices, grades and dates repeat heavily across payloads, so those
+# are kept in a per-field LRU; typed=True keeps True, 1 and 1.0 apart.
+
+def text(max_length=None):
+    """A non-empty string, for a VARCHAR(max_length) column or, without one, TEXT."""
+    limit = max_length or float("inf")
+
+    def to_text(value):
+        if not isinstance(value, str) or not value.strip():
+            raise ValueError(value)
+        if len(value) > limit:
+            raise Invalid(f" must be at most {max_length} characters")
+        return value
+    return to_text, False, " must be a non-empty string"
+
+
+def string(max_length=None):
+    """Any string or null, for a VARCHAR(max_length) column or, without one, TEXT."""
+    limit = max_length or float("inf")
+
+    def to_string(value):
+        if value is None:
+            return value
+        if not isinstance(value, str):
+            raise TypeError(value)
+        if len(value) > limit:
+            raise Invalid(f" must be at most {max_length} characters")
+        return value
+    return to_string, False, " must be a string"
+
+
+def decimal(precision, scale):
+    """A number for a DECIMAL(precision, scale) column."""
+    quantum = Decimal(1).scaleb(-scale)
+    limit = Decimal(10) ** (precision - scale)
+
+    def to_column(value):
+        return to_decimal(value, quantum, limit)
+    return to_column, True, " must be a number"
+
+
+INT = (to_int, False, " must be an integer")
+DATE = (to_date, True, " must be a date (YYYY-MM-DD)")
+
+
+class Schema:
+    """A table's field specs and the validator built from them."""
+
+    def __init__(self, name, fields):
+        self.name = name
+        self.fields = tuple(fields)
+        self.columns = tuple(field[0] for field in self.fields)
+        # INSERT values, in column order, from the data of a full clean().
+        self.row = itemgetter(*self.columns) if len(self.columns) > 1 else (lambda data: (data[self.columns[0]],))
+        self._specs = []
+        for name, kind, default in self.fields:
+            coerce, memoized, message = kind
+            if memoized:
+                coerce = lru_cache(maxsize=CACHE_LIMIT, typed=True)(coerce)
+            self._specs.append((name, coerce, name + message, default))
+
+    def clean(self, payload, partial=False):
+        """Check and coerce the known fields of payload and return (data, errors).
+
+        A full create (partial=False) reports missing required fields and
+        fills in the defaults; a partial update keeps only the fields sent.
+        """
+        data = {}
+        errors = []
+        for name, coerce, message, default in self._specs:
+            if name in payload:
+                try:
+                    data[name] = coerce(payload[name])
+                except Invalid as err:
+                    errors.append(name + err.args[0])
+                except COERCE_ERRORS:
+                    errors.append(message)
+            elif not partial:
+                if default is REQUIRED:
+                    errors.append(name + " is required")
+                else:
+                    data[name] = default
+        if errors:
+            return {}, errors
+        return data, errors
+
+
+PRODUCT = Schema("product", (
+    ("product_name", text(255), REQUIRED),
+    ("category", text(50), REQUIRED),
+    ("unit", text(20), REQUIRED),
+    ("price", decimal(10, 2), Decimal("0.00")),
+    ("quantity", INT, 0),
+    ("description", string(), ""),
+))
+
+SUPPLIER = Schema("supplier", (
+    ("supplier_name", text(255), REQUIRED),
+    ("contact_number", text(20), REQUIRED),
+    ("address", text(), REQUIRED),
+    ("contact_person", string(255), ""),
+    ("phone", string(20), ""),
+    ("email", string(255), ""),
+))
+
+ICECREAM = Schema("icecream", (
+    ("flavor", text(255), REQUIRED),
+    ("size", text(50), REQUIRED),
+    ("price", decimal(10, 2), REQUIRED),
+    ("stock", INT, 0),
+    ("description", string(), ""),
+))
+
+STUDENT = Schema("student", (
+    ("student_name", text(255), REQUIRED),
+    ("email", text(255), REQUIRED),
+    ("major", text(255), ""),
+    ("gpa", decimal(3, 2), Decimal("0.00")),
+    ("enrollment_date", DATE, None),
+))
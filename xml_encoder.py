@@ -0,0 +1,146 @@
+"""Incremental XML encoder for API responses.
+
+Produces byte-for-byte the same output as
+``dicttoxml(data, custom_root='response', attr_type=False)`` for the shapes the
+API returns, without dicttoxml's per-value logging, name validation and string
+concatenation. Elements are appended to a list buffer and joined once.
+Streamed list responses encode their rows one at a time with ``encode_item``.
+"""
+import numbers
+from collections.abc import Iterable
+from functools import lru_cache
+from xml.dom.minidom import parseString
+
+XML_DECLARATION = '<?xml version="1.0" encoding="UTF-8" ?>'
+ITEM = 'item'
+
+
+def escape(text):
+    """Escape text content the same way dicttoxml does."""
+    return (text.replace('&', '&amp;')
+                .replace('"', '&quot;')
+                .replace("'", '&apos;')
+                .replace('<', '&lt;')
+                .replace('>', '&gt;'))
+
+
+def _is_valid_name(name):
+    """Check an element name with the same parser dicttoxml uses."""
+    try:
+        parseString('%s<%s>foo</%s>' % (XML_DECLARATION, name, name))
+        return True
+    except Exception:
+        return False
+
+
+@lru_cache(maxsize=1024, typed=True)
+def element_name(key):
+    """Return (tag, attrstring) for a dict key.
+
+    Mirrors dicttoxml.make_valid_xml_name: numeric keys get an ``n`` prefix,
+    spaces become underscores and anything else invalid is moved into a
+    ``name`` attribute on a ``<key>`` element. Results are cached per key, so
+    the XML parser only runs once for each distinct column name.
+    """
+    if isinstance(key, str):
+        key = escape(key)
+    if _is_valid_name(key):
+        return str(key), ''
+    if str(key).isdigit():
+        return 'n%s' % key, ''
+    try:
+        return 'n%s' % float(str(key)), ''
+    except ValueError:
+        pass
+    if _is_valid_name(key.replace(' ', '_')):
+        return key.replace(' ', '_'), ''
+    return 'key', ' name="%s"' % key
+
+
+def _write_dict(obj, out):
+    """Append the children of a dict to ``out``."""
+    for key, val in obj.items():
+        tag, attrs = element_name(key)
+        if type(val) is bool:
+            out.append('<%s%s>%s</%s>' % (tag, attrs, 'true' if val else 'false', tag))
+        elif type(val) is str:
+            out.append('<%s%s>%s</%s>' % (tag, attrs, escape(val), tag))
+        elif isinstance(val, numbers.Number):
+            out.append('<%s%s>%s</%s>' % (tag, attrs, val, tag))
+        elif hasattr(val, 'isoformat'):
+            out.append('<%s%s>%s</%s>' % (tag, attrs, escape(val.isoformat()), tag))
+        elif isinstance(val, dict):
+            out.append('<%s%s>' % (tag, attrs))
+            _write_dict(val, out)
+            out.append('</%s>' % tag)
+        elif isinstance(val, Iterable):
+            out.append('<%s%s>' % (tag, attrs))
+            _write_list(val, out)
+            out.append('</%s>' % tag)
+        elif val is None:
+            out.append('<%s%s></%s>' % (tag, attrs, tag))
+        else:
+            raise TypeError('Unsupported data type: %s (%s)' % (val, type(val).__name__))
+
+
+def _write_item(item, out):
+    """Append one list element to ``out``.
+
+    Follows dicttoxml's list branch order, where numbers are tested before
+    bools, so a bool inside a list renders as ``True``/``False``.
+    """
+    if type(item) is str:
+        out.append('<item>%s</item>' % escape(item))
+    elif isinstance(item, numbers.Number):
+        out.append('<item>%s</item>' % item)
+    elif hasattr(item, 'isoformat'):
+        out.append('<item>%s</item>' % escape(item.isoformat()))
+    elif isinstance(item, dict):
+        out.append('<item>')
+        _write_dict(item, out)
+        out.append('</item>')
+    elif isinstance(item, Iterable):
+        out.append('<item >')
+        _write_list(item, out)
+        out.append('</item>')
+    elif item is None:
+        out.append('<item></item>')
+    else:
+        raise TypeError('Unsupported data type: %s (%s)' % (item, type(item).__name__))
+
+
+def _write_list(items, out):
+    for item in items:
+        _write_item(item, out)
+
+
+def _write_root_value(obj, out):
+    """Append the content of the root element, as dicttoxml.convert does."""
+    if type(obj) is bool:
+        out.append('<item>%s</item>' % ('true' if obj else 'false'))
+    elif obj is None:
+        out.append('<item></item>')
+    elif isinstance(obj, dict):
+        _write_dict(obj, out)
+    elif type(obj) is str or isinstance(obj, numbers.Number) or hasattr(obj, 'isoformat'):
+        _write_item(obj, out)
+    elif isinstance(obj, Iterable):
+        _write_list(obj, out)
+    else:
+        raise TypeError('Unsupported data type: %s (%s)' % (obj, type(obj).__name__))
+
+
+def encode_item(row):
+    """Encode one list element, e.g. a row inside ``<products>``."""
+    out = []
+    _write_item(row, out)
+    return ''.join(out)
+
+
+def dumps(data, root='response'):
+    """Encode ``data`` as a complete XML document and return UTF-8 bytes."""
+    out = [XML_DECLARATION, '<%s>' % root]
+    _write_root_value(data, out)
+    out.append('</%s>' % root)
+    return ''.join(out).encode('utf-8')
+